@@ -1,10 +1,13 @@
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
 from flask_cors import CORS
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+from .utils.engine import engine_options, configure_engine
+from .utils.replica import REPLICA_BIND, RoutingSession, start_request, record_writer
 
 # Load environment variables
 load_dotenv()
@@ -16,13 +19,56 @@ app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///agridrone.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool for server databases (PostgreSQL, MySQL)
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', '1').lower() not in ('0', 'false', 'no')
+
+# SQLite: milliseconds a writer waits for the lock, bytes of the file read through mmap
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+# Optional read replica for GET requests; users stay on the primary this many seconds after a write
+app.config['REPLICA_DATABASE_URI'] = os.getenv('REPLICA_DATABASE_URI')
+app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+if app.config['REPLICA_DATABASE_URI']:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: dict(
+        engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI=app.config['REPLICA_DATABASE_URI'])),
+        url=app.config['REPLICA_DATABASE_URI']
+    )}
+
 # Configure JWT
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
 
+# Seconds a JWT identity's role/availability is cached per worker (0 disables)
+app.config['PRINCIPAL_CACHE_TTL'] = float(os.getenv('PRINCIPAL_CACHE_TTL', 30))
+
+# Seconds the admin dashboard statistics are cached per worker (0 disables)
+app.config['STATS_CACHE_TTL'] = float(os.getenv('STATS_CACHE_TTL', 10))
+
+# Service request event stream: 'memory' for a single process, 'database' to share across workers
+app.config['EVENTS_BACKEND'] = os.getenv('EVENTS_BACKEND', 'memory')
+app.config['EVENTS_STREAM_TIMEOUT'] = float(os.getenv('EVENTS_STREAM_TIMEOUT', 300))
+
+# Jobs per day for operators who have not set up an availability calendar
+app.config['OPERATOR_DAILY_CAPACITY'] = int(os.getenv('OPERATOR_DAILY_CAPACITY', 8))
+
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+with app.app_context():
+    for engine in db.engines.values():
+        configure_engine(engine, app.config)
+app.before_request(start_request)
+app.after_request(record_writer)
 jwt = JWTManager(app)
+# Schema changes live in migrations/; batch mode lets SQLite alter tables
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations'),
+                  render_as_batch=True)
 
 # Configure CORS to allow requests from frontend
 CORS(app, 
@@ -37,6 +83,7 @@ from .routes.farmers import farmers_bp
 from .routes.operators import operators_bp
 from .routes.admin import admin_bp
 from .routes.weather import weather_bp
+from .routes.events import events_bp
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -44,6 +91,7 @@ app.register_blueprint(farmers_bp, url_prefix='/api/farmers')
 app.register_blueprint(operators_bp, url_prefix='/api/operators')
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
 app.register_blueprint(weather_bp, url_prefix='/api/weather')
+app.register_blueprint(events_bp, url_prefix='/api/events')
 
 # Root route
 # Root route
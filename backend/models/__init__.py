@@ -2,3 +2,6 @@
 from .user import User
 from .field import Field
 from .service_request import ServiceRequest
+from .event import ServiceRequestEvent
+from .availability import AvailabilityRule, AvailabilityInterval, AvailabilityBlackout
+from .rollup import RequestDailyRollup, OperatorDailyRollup
@@ -0,0 +1,74 @@
+from ..app import db
+from datetime import datetime
+
+# Operator availability calendar. On a given day an operator's capacity (jobs
+# per day) comes from, in order: a blackout covering the day (0), a dated
+# interval covering the day, the weekly rule for that weekday. Operators with
+# no calendar at all fall back to OPERATOR_DAILY_CAPACITY.
+# See utils/availability.py for the queries.
+
+class AvailabilityRule(db.Model):
+    """Recurring weekly availability"""
+    __tablename__ = 'availability_rules'
+    __table_args__ = (
+        db.UniqueConstraint('operator_id', 'weekday', name='uq_availability_rules_operator_weekday'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    operator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    capacity = db.Column(db.Integer, nullable=False)  # Jobs per day
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'weekday': self.weekday,
+            'capacity': self.capacity
+        }
+
+
+class AvailabilityInterval(db.Model):
+    """Dated availability that overrides the weekly rules, inclusive of both ends"""
+    __tablename__ = 'availability_intervals'
+    __table_args__ = (
+        db.Index('ix_availability_intervals_operator_dates', 'operator_id', 'start_date', 'end_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    operator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'capacity': self.capacity
+        }
+
+
+class AvailabilityBlackout(db.Model):
+    """Days an operator cannot work at all, inclusive of both ends"""
+    __tablename__ = 'availability_blackouts'
+    __table_args__ = (
+        db.Index('ix_availability_blackouts_operator_dates', 'operator_id', 'start_date', 'end_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    operator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    reason = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'reason': self.reason
+        }
@@ -0,0 +1,14 @@
+from ..app import db
+from datetime import datetime
+
+class ServiceRequestEvent(db.Model):
+    """Outbox of service request changes, shared between worker processes"""
+    __tablename__ = 'service_request_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(20), nullable=False)  # 'created', 'accepted', 'completed', 'cancelled'
+    payload = db.Column(db.Text, nullable=False)  # JSON encoded event
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<ServiceRequestEvent {self.id} {self.type}>'
@@ -1,15 +1,34 @@
 from ..app import db
+from ..utils.geo import encode_geohash
+from ..utils.geometry import analyze, decode_vertices
 from datetime import datetime
 
 class Field(db.Model):
     __tablename__ = 'fields'
+    __table_args__ = (
+        # Serves location lookups such as the operators' available-requests feed
+        db.Index('ix_fields_geohash', 'geohash'),
+        # Bounding box overlap queries (map viewports, routing)
+        db.Index('ix_fields_bbox', 'min_lat', 'min_lng'),
+        # A farmer's fields, newest first
+        db.Index('ix_fields_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    area = db.Column(db.Float)  # Area in hectares/acres
+    area = db.Column(db.Float)  # Area in acres, computed server-side for polygons
     coordinates = db.Column(db.Text, nullable=False)  # GeoJSON polygon as string
     crop_type = db.Column(db.String(50))
+    # Derived from coordinates whenever they are set, see _validate_coordinates
+    centroid_lat = db.Column(db.Float, nullable=True)
+    centroid_lng = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)
+    min_lat = db.Column(db.Float, nullable=True)
+    max_lat = db.Column(db.Float, nullable=True)
+    min_lng = db.Column(db.Float, nullable=True)
+    max_lng = db.Column(db.Float, nullable=True)
+    vertices = db.Column(db.LargeBinary, nullable=True)  # Packed outline, see geometry.encode_vertices
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -17,6 +36,57 @@ class Field(db.Model):
     # Relationships
     service_requests = db.relationship('ServiceRequest', backref='field', lazy=True)
     
+    @db.validates('coordinates')
+    def _validate_coordinates(self, key, coordinates):
+        # Parse once on write; raises ValueError for invalid outlines
+        self.apply_geometry(analyze(coordinates))
+        return coordinates
+    
+    @db.validates('area')
+    def _validate_area(self, key, area):
+        # Polygon areas are measured, only point fields keep the client's value
+        if self.vertices is not None:
+            return self.area
+        return area
+    
+    @staticmethod
+    def geometry_columns(geometry):
+        """Column values derived from an analyzed outline, e.g. for bulk inserts"""
+        columns = {}
+        if geometry.area_acres is not None:
+            columns['area'] = round(geometry.area_acres, 4)
+        columns['vertices'] = geometry.encoded
+        columns['centroid_lat'], columns['centroid_lng'] = geometry.centroid
+        columns['min_lat'], columns['max_lat'], columns['min_lng'], columns['max_lng'] = geometry.bbox
+        columns['geohash'] = encode_geohash(*geometry.centroid)
+        return columns
+    
+    def apply_geometry(self, geometry):
+        # Clear the outline first so the area validator accepts the measured value
+        was_polygon = self.vertices is not None
+        self.vertices = None
+        if was_polygon and geometry.area_acres is None:
+            # A polygon turned into a point: its measured area no longer applies
+            self.area = None
+        for name, value in self.geometry_columns(geometry).items():
+            setattr(self, name, value)
+    
+    def update_geometry(self):
+        """Recompute derived columns for rows written before they existed.
+        
+        Raises ValueError if the stored coordinates are invalid.
+        """
+        self.apply_geometry(analyze(self.coordinates))
+    
+    @property
+    def outline(self):
+        """The field outline as (lat, lng) tuples, without re-parsing JSON"""
+        if self.vertices is not None:
+            return decode_vertices(self.vertices)
+        if self.centroid_lat is not None:
+            return [(self.centroid_lat, self.centroid_lng)]
+        return []
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -25,6 +95,9 @@ class Field(db.Model):
             'area': self.area,
             'coordinates': self.coordinates,
             'crop_type': self.crop_type,
+            'centroid_lat': self.centroid_lat,
+            'centroid_lng': self.centroid_lng,
+            'bbox': [self.min_lat, self.min_lng, self.max_lat, self.max_lng] if self.min_lat is not None else None,
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
@@ -0,0 +1,42 @@
+from ..app import db
+
+# Daily aggregates behind the admin time-series reports, maintained as
+# service requests change state. See utils/rollups.py.
+
+class RequestDailyRollup(db.Model):
+    """Requests created on a day, by their current status and service type"""
+    __tablename__ = 'request_daily_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'status', 'service_type', name='uq_request_daily_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # Day the requests were created
+    status = db.Column(db.String(20), nullable=False)
+    service_type = db.Column(db.String(50), nullable=False)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    # Sum of completed_at - created_at over the completed requests in the bucket,
+    # and how many of them have a completed_at (the lead-time denominator)
+    lead_time_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    lead_time_requests = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<RequestDailyRollup {self.day} {self.status} {self.service_type}>'
+
+
+class OperatorDailyRollup(db.Model):
+    """Jobs an operator has accepted or completed, by scheduled day"""
+    __tablename__ = 'operator_daily_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('operator_id', 'day', name='uq_operator_daily_rollups_bucket'),
+        db.Index('ix_operator_daily_rollups_day', 'day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    operator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # Scheduled date of the jobs
+    jobs = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<OperatorDailyRollup {self.operator_id} {self.day}>'
@@ -3,6 +3,18 @@ from datetime import datetime
 
 class ServiceRequest(db.Model):
     __tablename__ = 'service_requests'
+    __table_args__ = (
+        # Joins from located fields to their open requests
+        db.Index('ix_service_requests_field_status', 'field_id', 'status'),
+        # Per-day bookings of an operator, for availability checks
+        db.Index('ix_service_requests_operator_date', 'operator_id', 'scheduled_date'),
+        # The list endpoints page newest first on (created_at, id), see utils/pagination.py
+        db.Index('ix_service_requests_farmer_created', 'farmer_id', 'created_at', 'id'),
+        db.Index('ix_service_requests_operator_created', 'operator_id', 'created_at', 'id'),
+        db.Index('ix_service_requests_created', 'created_at', 'id'),
+        # Status-filtered lists, including the open (pending) requests feed
+        db.Index('ix_service_requests_status_created', 'status', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     field_id = db.Column(db.Integer, db.ForeignKey('fields.id'), nullable=False)
@@ -1,9 +1,17 @@
 from ..app import db
+from ..utils.geo import encode_geohash
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Serves the nearby-operators search: role/availability equality plus geohash prefix ranges
+        db.Index('ix_users_role_available_geohash', 'role', 'is_available', 'geohash'),
+        # Admin user lists page newest first on (created_at, id), optionally by role
+        db.Index('ix_users_created', 'created_at', 'id'),
+        db.Index('ix_users_role_created', 'role', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -15,6 +23,7 @@ class User(db.Model):
     is_premium = db.Column(db.Boolean, default=False)
     latitude = db.Column(db.Float, nullable=True)  # Location data for operators
     longitude = db.Column(db.Float, nullable=True)  # Location data for operators
+    geohash = db.Column(db.String(12), nullable=True)  # Derived from latitude/longitude, see update_geohash
     is_available = db.Column(db.Boolean, default=True)  # Availability status for operators
     service_radius = db.Column(db.Float, default=50.0)  # Service radius in kilometers for operators
     hourly_rate = db.Column(db.Float, default=0.0)  # Hourly rate for operators
@@ -52,7 +61,14 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def update_geohash(self):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+    
     def to_dict(self):
+        is_operator = self.role == 'operator'
         return {
             'id': self.id,
             'email': self.email,
@@ -63,12 +79,18 @@ class User(db.Model):
             'is_premium': self.is_premium,
             'latitude': self.latitude,
             'longitude': self.longitude,
-            'is_available': self.is_available if self.role == 'operator' else None,
-            'service_radius': self.service_radius if self.role == 'operator' else None,
-            'hourly_rate': self.hourly_rate if self.role == 'operator' else None,
-            'service_details': self.service_details if self.role == 'operator' else None,
+            'is_available': self.is_available if is_operator else None,
+            'service_radius': self.service_radius if is_operator else None,
+            'hourly_rate': self.hourly_rate if is_operator else None,
+            'service_details': self.service_details if is_operator else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
     def __repr__(self):
         return f'<User {self.email}>'
+
+# Keep the geohash in sync with the coordinates on every write
+@db.event.listens_for(User, 'before_insert')
+@db.event.listens_for(User, 'before_update')
+def _sync_geohash(mapper, connection, target):
+    target.update_geohash()
@@ -1,26 +1,28 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required
 from ..models.user import User
 from ..models.field import Field
 from ..models.service_request import ServiceRequest
 from ..app import db
+from ..utils.auth import role_required, invalidate_principal
+from ..utils.cache import TTLCache
+from ..utils.events import EVENT_TYPES, publish_request_event
+from ..utils.pagination import paginate, apply_filters
+from ..utils.dispatch import run_dispatch
+from ..utils.export import EXPORTS, FORMATS, iter_rows, encode_rows, gzip_chunks
+from ..utils.rollups import timeseries
+from ..utils.availability import parse_date
+from ..utils.engine import pool_stats
+from ..utils.serialize import project, serialize, json_response, parse_view, eager, to_view
+from datetime import date, datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
 
 # Admin authentication middleware
-def admin_required(fn):
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        # Convert string ID to integer for database query
-        user = User.query.get(int(user_id))
-        
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Unauthorized access'}), 403
-        
-        return fn(*args, **kwargs)
-    
-    wrapper.__name__ = fn.__name__
-    return wrapper
+admin_required = role_required('admin')
+
+# Relations service request responses can embed with ?include=
+REQUEST_INCLUDES = ('field', 'farmer', 'operator')
 
 # User management
 @admin_bp.route('/users', methods=['GET'])
@@ -35,11 +37,15 @@ def get_users():
     if role:
         query = query.filter_by(role=role)
     
-    users = query.all()
+    try:
+        users, next_cursor = paginate(project(query, User), User, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'users': [user.to_dict() for user in users]
-    }), 200
+    return json_response({
+        'users': serialize(users, User),
+        'next_cursor': next_cursor
+    })
 
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -79,6 +85,7 @@ def update_user(user_id):
         user.set_password(data['password'])
     
     db.session.commit()
+    invalidate_principal(user_id)
     
     return jsonify({
         'message': 'User updated successfully',
@@ -96,6 +103,7 @@ def delete_user(user_id):
     
     db.session.delete(user)
     db.session.commit()
+    invalidate_principal(user_id)
     
     return jsonify({
         'message': 'User deleted successfully'
@@ -106,42 +114,54 @@ def delete_user(user_id):
 @jwt_required()
 @admin_required
 def get_operators():
-    operators = User.query.filter_by(role='operator').all()
+    query = User.query.filter_by(role='operator')
     
-    return jsonify({
-        'operators': [operator.to_dict() for operator in operators]
-    }), 200
+    try:
+        operators, next_cursor = paginate(project(query, User), User, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'operators': serialize(operators, User),
+        'next_cursor': next_cursor
+    })
 
 # Service request management
 @admin_bp.route('/service-requests', methods=['GET'])
 @jwt_required()
 @admin_required
 def get_service_requests():
-    # Optional query parameters for filtering
-    status = request.args.get('status')
+    # Optional status, service_type and date range filters are applied by paginate
+    try:
+        view = parse_view(request.args, ServiceRequest, REQUEST_INCLUDES)
+        service_requests, next_cursor = paginate(project(ServiceRequest.query, ServiceRequest, view),
+                                                 ServiceRequest, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    query = ServiceRequest.query
-    
-    if status:
-        query = query.filter_by(status=status)
-    
-    service_requests = query.all()
-    
-    return jsonify({
-        'service_requests': [sr.to_dict() for sr in service_requests]
-    }), 200
+    return json_response({
+        'service_requests': serialize(service_requests, ServiceRequest, view),
+        'next_cursor': next_cursor
+    })
 
 @admin_bp.route('/service-requests/<int:request_id>', methods=['GET'])
 @jwt_required()
 @admin_required
 def get_service_request(request_id):
-    service_request = ServiceRequest.query.get(request_id)
+    try:
+        view = parse_view(request.args, ServiceRequest, REQUEST_INCLUDES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    service_request = ServiceRequest.query.options(
+        *eager(ServiceRequest, view.include)
+    ).filter_by(id=request_id).first()
     
     if not service_request:
         return jsonify({'error': 'Service request not found'}), 404
     
     return jsonify({
-        'service_request': service_request.to_dict()
+        'service_request': to_view(service_request, view)
     }), 200
 
 @admin_bp.route('/service-requests/<int:request_id>', methods=['PUT'])
@@ -154,9 +174,15 @@ def update_service_request(request_id):
         return jsonify({'error': 'Service request not found'}), 404
     
     data = request.get_json()
+    previous_status = service_request.status
     
     if 'status' in data:
         service_request.status = data['status']
+        # Keep completed_at in step with the status, as the operator path does
+        if service_request.status == 'completed' and previous_status != 'completed':
+            service_request.completed_at = datetime.utcnow()
+        elif service_request.status != 'completed':
+            service_request.completed_at = None
     if 'operator_id' in data:
         service_request.operator_id = data['operator_id']
     if 'notes' in data:
@@ -164,34 +190,132 @@ def update_service_request(request_id):
     
     db.session.commit()
     
+    if service_request.status != previous_status and service_request.status in EVENT_TYPES:
+        publish_request_event(service_request.status, service_request)
+    
     return jsonify({
         'message': 'Service request updated successfully',
         'service_request': service_request.to_dict()
     }), 200
 
-# Dashboard statistics
-@admin_bp.route('/stats', methods=['GET'])
+# Assign pending service requests to operators in one batch
+@admin_bp.route('/dispatch', methods=['POST'])
 @jwt_required()
 @admin_required
-def get_stats():
-    # Count users by role
-    farmers_count = User.query.filter_by(role='farmer').count()
-    operators_count = User.query.filter_by(role='operator').count()
+def dispatch_requests():
+    data = request.get_json(silent=True) or {}
+    dry_run = bool(data.get('dry_run', request.args.get('dry_run', '').lower() in ('1', 'true')))
+    
+    try:
+        report = run_dispatch(dry_run=dry_run)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify(report), 200
+
+# Streaming exports for reports
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_rows(kind):
+    if kind not in EXPORTS:
+        return jsonify({'error': 'Unknown export'}), 404
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
     
-    # Count service requests by status
-    pending_count = ServiceRequest.query.filter_by(status='pending').count()
-    accepted_count = ServiceRequest.query.filter_by(status='accepted').count()
-    completed_count = ServiceRequest.query.filter_by(status='completed').count()
-    cancelled_count = ServiceRequest.query.filter_by(status='cancelled').count()
+    # The same filters as the matching list endpoints
+    model, names = EXPORTS[kind]
+    query = model.query
+    if kind == 'users' and request.args.get('role'):
+        query = query.filter_by(role=request.args['role'])
+    if kind == 'fields' and request.args.get('user_id'):
+        query = query.filter_by(user_id=request.args.get('user_id', type=int))
+    try:
+        query = apply_filters(query, model, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = query.order_by(model.created_at.desc(), model.id.desc())
     
-    # Count fields
-    fields_count = Field.query.count()
+    body = encode_rows(iter_rows(query, kind), names, fmt)
+    headers = {
+        'Content-Disposition': f'attachment; filename={kind}.{fmt}',
+        'Vary': 'Accept-Encoding',
+        'X-Accel-Buffering': 'no'
+    }
+    # Quality-aware, so "gzip;q=0" (gzip refused) gets the identity encoding
+    if request.accept_encodings['gzip'] > 0:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+# Time series reports served from the daily rollups
+@admin_bp.route('/reports/timeseries', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_timeseries():
+    metric = request.args.get('metric', 'requests')
+    interval = request.args.get('interval', 'day')
+    group_by = request.args.get('group_by') or None
+    
+    try:
+        end = parse_date(request.args['to'], 'to') if request.args.get('to') else date.today()
+        start = parse_date(request.args['from'], 'from') if request.args.get('from') else end - timedelta(days=29)
+        series = timeseries(
+            metric, start, end, interval=interval, group_by=group_by,
+            status=request.args.get('status'),
+            service_type=request.args.get('service_type'),
+            operator_id=request.args.get('operator_id', type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
+        'metric': metric,
+        'interval': interval,
+        'group_by': group_by,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'series': series
+    }), 200
+
+# Dashboard statistics
+_stats_cache = TTLCache(maxsize=1)
+
+def _count_stats():
+    """Count users by role, service requests by status and fields in one round trip"""
+    users = db.session.query(
+        db.literal('users').label('kind'), User.role.label('key'), db.func.count()
+    ).group_by(User.role)
+    service_requests = db.session.query(
+        db.literal('service_requests'), ServiceRequest.status, db.func.count()
+    ).group_by(ServiceRequest.status)
+    fields = db.session.query(
+        db.literal('fields'), db.literal(None, db.String), db.func.count(Field.id)
+    )
+    
+    counts = {'users': {}, 'service_requests': {}, 'fields': {}}
+    for kind, key, count in users.union_all(service_requests, fields).all():
+        counts[kind][key] = count
+    
+    farmers_count = counts['users'].get('farmer', 0)
+    operators_count = counts['users'].get('operator', 0)
+    admins_count = counts['users'].get('admin', 0)
+    
+    statuses = counts['service_requests']
+    pending_count = statuses.get('pending', 0)
+    accepted_count = statuses.get('accepted', 0)
+    completed_count = statuses.get('completed', 0)
+    cancelled_count = statuses.get('cancelled', 0)
+    
+    return {
         'users': {
             'farmers': farmers_count,
             'operators': operators_count,
-            'total': farmers_count + operators_count + User.query.filter_by(role='admin').count()
+            'total': farmers_count + operators_count + admins_count
         },
         'service_requests': {
             'pending': pending_count,
@@ -200,5 +324,27 @@ def get_stats():
             'cancelled': cancelled_count,
             'total': pending_count + accepted_count + completed_count + cancelled_count
         },
-        'fields': fields_count
-    }), 200
+        'fields': counts['fields'].get(None, 0)
+    }
+
+@admin_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_stats():
+    # The dashboard polls this endpoint, so counts may be served from a short-lived cache
+    ttl = current_app.config.get('STATS_CACHE_TTL', 0)
+    stats = _stats_cache.get('stats') if ttl > 0 else None
+    
+    if stats is None:
+        stats = _count_stats()
+        if ttl > 0:
+            _stats_cache.set('stats', stats, ttl=ttl)
+    
+    return jsonify(stats), 200
+
+@admin_bp.route('/db-stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_stats():
+    """Connection pool usage and checkout wait times of this worker"""
+    return jsonify(pool_stats(db.engine)), 200
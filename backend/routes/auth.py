@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from ..models.user import User
 from ..app import db
+from ..utils.auth import invalidate_principal
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -103,6 +104,7 @@ def update_profile():
             user.service_details = data['service_details']
     
     db.session.commit()
+    invalidate_principal(user.id)
     
     return jsonify({
         'message': 'Profile updated successfully',
@@ -0,0 +1,45 @@
+import json
+import time
+from flask import Blueprint, Response, current_app, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from ..app import db
+from ..utils.auth import current_principal
+from ..utils.events import get_broker, can_see
+
+events_bp = Blueprint('events', __name__)
+
+# Server-sent events stream of service request changes.
+# EventSource cannot send headers, so the JWT may also be passed as ?jwt=<token>.
+@events_bp.route('', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    principal = current_principal()
+    
+    if not principal:
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    subscription = get_broker().subscribe()
+    # The principal is a plain tuple, so the stream needs nothing more from the
+    # database; hand the connection back instead of holding it for the whole stream
+    db.session.remove()
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT', 15)
+    # Streams end periodically so a sync worker is not held forever; EventSource reconnects
+    lifetime = current_app.config.get('EVENTS_STREAM_TIMEOUT', 300)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            deadline = time.monotonic() + lifetime
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+                if event is None:
+                    yield ': keep-alive\n\n'
+                elif can_see(principal, event):
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['service_request'])}\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -4,47 +4,53 @@ from ..models.user import User
 from ..models.field import Field
 from ..models.service_request import ServiceRequest
 from ..app import db
-from datetime import datetime
+from ..utils.auth import role_required
+from ..utils.events import publish_request_event
+from ..utils.pagination import paginate
+from ..utils.geo import nearby_clause, rank_by_distance
+from ..utils.availability import free_on, has_capacity, lock_operators, parse_date
+from ..utils.imports import PeekableStream, detect_format, iter_features, import_fields
+from ..utils.batch import parse_ids, parse_items, create_requests, cancel_requests
+from ..utils.serialize import project, serialize, json_response, parse_view, eager, to_view
 
 farmers_bp = Blueprint('farmers', __name__)
 
+# Relations a farmer's service requests can embed with ?include=
+REQUEST_INCLUDES = ('field', 'operator')
+
 # Field management
 @farmers_bp.route('/fields', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def get_fields():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
-    fields = Field.query.filter_by(user_id=int(user_id)).all()
+    fields = project(Field.query.filter_by(user_id=int(user_id)), Field).all()
     
-    return jsonify({
-        'fields': [field.to_dict() for field in fields]
-    }), 200
+    return json_response({
+        'fields': serialize(fields, Field)
+    })
 
 @farmers_bp.route('/fields', methods=['POST'])
 @jwt_required()
+@role_required('farmer')
 def create_field():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     data = request.get_json()
     
-    new_field = Field(
-        name=data.get('name'),
-        description=data.get('description'),
-        area=data.get('area'),
-        coordinates=data.get('coordinates'),
-        crop_type=data.get('crop_type'),
-        user_id=int(user_id)
-    )
+    # Coordinates are parsed and validated as they are assigned
+    try:
+        new_field = Field(
+            name=data.get('name'),
+            description=data.get('description'),
+            area=data.get('area'),
+            coordinates=data.get('coordinates'),
+            crop_type=data.get('crop_type'),
+            user_id=int(user_id)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     db.session.add(new_field)
     db.session.commit()
@@ -54,15 +60,36 @@ def create_field():
         'field': new_field.to_dict()
     }), 201
 
+# Bulk import fields from a GeoJSON FeatureCollection or KML document, sent
+# as a multipart "file" upload or as the raw request body
+@farmers_bp.route('/fields/import', methods=['POST'])
+@jwt_required()
+@role_required('farmer')
+def import_fields_upload():
+    user_id = get_jwt_identity()
+    
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+    stream = PeekableStream(stream)
+    
+    fmt = request.args.get('format') or detect_format(filename, content_type, stream.head)
+    
+    try:
+        report = import_fields(iter_features(stream, fmt), int(user_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    report['message'] = f"Imported {report['imported']} fields"
+    return jsonify(report), 201 if report['imported'] else 200
+
 @farmers_bp.route('/fields/<int:field_id>', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def get_field(field_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     field = Field.query.filter_by(id=field_id, user_id=int(user_id)).first()
     
@@ -75,13 +102,9 @@ def get_field(field_id):
 
 @farmers_bp.route('/fields/<int:field_id>', methods=['PUT'])
 @jwt_required()
+@role_required('farmer')
 def update_field(field_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     field = Field.query.filter_by(id=field_id, user_id=int(user_id)).first()
     
@@ -94,10 +117,16 @@ def update_field(field_id):
         field.name = data['name']
     if 'description' in data:
         field.description = data['description']
+    # Coordinates first: a new outline decides whether the area is measured
+    # or taken from the request
+    if 'coordinates' in data:
+        try:
+            field.coordinates = data['coordinates']
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
     if 'area' in data:
         field.area = data['area']
-    if 'coordinates' in data:
-        field.coordinates = data['coordinates']
     if 'crop_type' in data:
         field.crop_type = data['crop_type']
     
@@ -110,13 +139,9 @@ def update_field(field_id):
 
 @farmers_bp.route('/fields/<int:field_id>', methods=['DELETE'])
 @jwt_required()
+@role_required('farmer')
 def delete_field(field_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     field = Field.query.filter_by(id=field_id, user_id=int(user_id)).first()
     
@@ -133,29 +158,48 @@ def delete_field(field_id):
 # Service request management
 @farmers_bp.route('/service-requests', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def get_service_requests():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        view = parse_view(request.args, ServiceRequest, REQUEST_INCLUDES)
+        query = project(ServiceRequest.query.filter_by(farmer_id=int(user_id)), ServiceRequest, view)
+        service_requests, next_cursor = paginate(query, ServiceRequest, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'service_requests': serialize(service_requests, ServiceRequest, view),
+        'next_cursor': next_cursor
+    })
+
+# Counts for the dashboard, which only loads the first page of each list
+@farmers_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@role_required('farmer')
+def get_stats():
+    user_id = get_jwt_identity()
     
-    service_requests = ServiceRequest.query.filter_by(farmer_id=int(user_id)).all()
+    statuses = dict(db.session.query(
+        ServiceRequest.status, db.func.count(ServiceRequest.id)
+    ).filter(ServiceRequest.farmer_id == int(user_id)).group_by(ServiceRequest.status).all())
     
     return jsonify({
-        'service_requests': [sr.to_dict() for sr in service_requests]
+        'service_requests': {
+            'pending': statuses.get('pending', 0),
+            'accepted': statuses.get('accepted', 0),
+            'completed': statuses.get('completed', 0),
+            'cancelled': statuses.get('cancelled', 0),
+            'total': sum(statuses.values())
+        }
     }), 200
 
 @farmers_bp.route('/service-requests', methods=['POST'])
 @jwt_required()
+@role_required('farmer')
 def create_service_request():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     data = request.get_json()
     
@@ -165,50 +209,107 @@ def create_service_request():
     if not field:
         return jsonify({'error': 'Field not found or not owned by you'}), 404
     
+    try:
+        scheduled_date = parse_date(data.get('scheduled_date'), 'scheduled_date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Optionally book a specific operator, e.g. one picked from the nearby search
+    operator_id = data.get('operator_id')
+    if operator_id is not None:
+        operator = User.query.filter_by(id=operator_id, role='operator', is_available=True).first()
+        if not operator:
+            return jsonify({'error': 'Operator not found or not available'}), 404
+        operator_id = operator.id
+    
+    if operator_id is not None:
+        # Bookings with this operator wait for each other from here to the commit
+        lock_operators([operator_id])
+    
     new_request = ServiceRequest(
         field_id=data.get('field_id'),
         farmer_id=int(user_id),
+        operator_id=operator_id,
         service_type=data.get('service_type'),
-        scheduled_date=datetime.strptime(data.get('scheduled_date'), '%Y-%m-%d').date(),
+        scheduled_date=scheduled_date,
         notes=data.get('notes')
     )
     
     db.session.add(new_request)
+    
+    # Count with the new request in place; the lock keeps other bookings out
+    # until this one commits or rolls back
+    if operator_id is not None:
+        db.session.flush()
+        if not has_capacity(operator_id, scheduled_date, exclude_request_id=new_request.id):
+            db.session.rollback()
+            return jsonify({'error': 'The operator has no availability left on that date'}), 409
+    
     db.session.commit()
+    publish_request_event('created', new_request)
     
     return jsonify({
         'message': 'Service request created successfully',
         'service_request': new_request.to_dict()
     }), 201
 
+@farmers_bp.route('/service-requests/batch', methods=['POST'])
+@jwt_required()
+@role_required('farmer')
+def create_service_requests_batch():
+    """Create many service requests in one transaction, with a result per item"""
+    user_id = get_jwt_identity()
+    
+    try:
+        items = parse_items(request.get_json(silent=True))
+        report = create_requests(items, int(user_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify(report), 201 if report['succeeded'] else 200
+
+@farmers_bp.route('/service-requests/batch-cancel', methods=['POST'])
+@jwt_required()
+@role_required('farmer')
+def cancel_service_requests_batch():
+    user_id = get_jwt_identity()
+    
+    try:
+        ids = parse_ids(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(cancel_requests(ids, int(user_id))), 200
+
 @farmers_bp.route('/service-requests/<int:request_id>', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def get_service_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        view = parse_view(request.args, ServiceRequest, REQUEST_INCLUDES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    service_request = ServiceRequest.query.filter_by(id=request_id, farmer_id=int(user_id)).first()
+    service_request = ServiceRequest.query.options(
+        *eager(ServiceRequest, view.include)
+    ).filter_by(id=request_id, farmer_id=int(user_id)).first()
     
     if not service_request:
         return jsonify({'error': 'Service request not found'}), 404
     
     return jsonify({
-        'service_request': service_request.to_dict()
+        'service_request': to_view(service_request, view)
     }), 200
 
 @farmers_bp.route('/service-requests/<int:request_id>', methods=['PUT'])
 @jwt_required()
+@role_required('farmer')
 def update_service_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     service_request = ServiceRequest.query.filter_by(id=request_id, farmer_id=int(user_id)).first()
     
@@ -231,7 +332,18 @@ def update_service_request(request_id):
     if 'service_type' in data:
         service_request.service_type = data['service_type']
     if 'scheduled_date' in data:
-        service_request.scheduled_date = datetime.strptime(data['scheduled_date'], '%Y-%m-%d').date()
+        try:
+            scheduled_date = parse_date(data['scheduled_date'], 'scheduled_date')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Moving a booking with an operator takes a place on the new day,
+        # checked the way create_service_request checks it
+        if service_request.operator_id is not None and scheduled_date != service_request.scheduled_date:
+            lock_operators([service_request.operator_id])
+            if not has_capacity(service_request.operator_id, scheduled_date, exclude_request_id=service_request.id):
+                db.session.rollback()
+                return jsonify({'error': 'The operator has no availability left on that date'}), 409
+        service_request.scheduled_date = scheduled_date
     if 'notes' in data:
         service_request.notes = data['notes']
     
@@ -244,13 +356,9 @@ def update_service_request(request_id):
 
 @farmers_bp.route('/service-requests/<int:request_id>', methods=['DELETE'])
 @jwt_required()
+@role_required('farmer')
 def cancel_service_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     service_request = ServiceRequest.query.filter_by(id=request_id, farmer_id=int(user_id)).first()
     
@@ -263,6 +371,7 @@ def cancel_service_request(request_id):
     
     service_request.status = 'cancelled'
     db.session.commit()
+    publish_request_event('cancelled', service_request)
     
     return jsonify({
         'message': 'Service request cancelled successfully'
@@ -271,44 +380,49 @@ def cancel_service_request(request_id):
 # Find nearby drone operators
 @farmers_bp.route('/nearby-operators', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def find_nearby_operators():
-    user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
-    
     # Get query parameters
     lat = request.args.get('latitude', type=float)
     lng = request.args.get('longitude', type=float)
     radius = request.args.get('radius', default=50, type=float)  # Default 50km radius
+    limit = request.args.get('limit', type=int)  # Optional cap on the number of results
     
     # If no coordinates provided, return error
     if lat is None or lng is None:
         return jsonify({'error': 'Latitude and longitude are required'}), 400
     
-    # Find operators within the radius
-    # Using a simplified distance calculation formula
-    # In a production app, you would use proper geospatial queries
-    # This is a simplified version using Euclidean distance
-    operators = User.query.filter_by(role='operator', is_available=True).all()
+    # Only fetch the columns needed for ranking, for operators whose geohash
+    # cell and bounding box can fall inside the search circle
+    query = db.session.query(
+        User.id, User.latitude, User.longitude, User.service_radius
+    ).filter_by(role='operator', is_available=True).filter(
+        nearby_clause(User.latitude, User.longitude, User.geohash, lat, lng, radius)
+    )
+    
+    # Optionally only operators with a free place in their calendar on that day
+    if request.args.get('date'):
+        try:
+            day = parse_date(request.args['date'], 'date')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(free_on(User.id, day))
+    
+    candidates = query.all()
+    
+    # Great-circle distance, honouring both the search radius and each operator's service radius
+    ranked = rank_by_distance(lat, lng, candidates, radius_km=radius, limit=limit)
+    
+    # Load and serialize only the operators that made the cut
+    operators = {}
+    if ranked:
+        operators = {op.id: op for op in User.query.filter(User.id.in_([op_id for _, op_id in ranked])).all()}
     
     nearby_operators = []
-    for operator in operators:
-        if operator.latitude and operator.longitude:
-            # Calculate approximate distance (simplified for demo)
-            # In a real app, use proper haversine formula or PostGIS
-            distance = ((operator.latitude - lat) ** 2 + 
-                        (operator.longitude - lng) ** 2) ** 0.5 * 111  # Rough conversion to km
-            
-            if distance <= radius and distance <= operator.service_radius:
-                operator_data = operator.to_dict()
-                operator_data['distance'] = round(distance, 2)
-                nearby_operators.append(operator_data)
-    
-    # Sort by distance
-    nearby_operators.sort(key=lambda x: x['distance'])
+    for distance, op_id in ranked:
+        operator_data = operators[op_id].to_dict()
+        operator_data['distance'] = round(distance, 2)
+        nearby_operators.append(operator_data)
     
     return jsonify({
         'operators': nearby_operators
@@ -317,14 +431,8 @@ def find_nearby_operators():
 # Get operator details by ID
 @farmers_bp.route('/operators/<int:operator_id>', methods=['GET'])
 @jwt_required()
+@role_required('farmer')
 def get_operator(operator_id):
-    user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
-    
     # Get the operator
     operator = User.query.filter_by(id=operator_id, role='operator').first()
     
@@ -338,14 +446,11 @@ def get_operator(operator_id):
 # Update farmer's location
 @farmers_bp.route('/update-location', methods=['POST'])
 @jwt_required()
+@role_required('farmer')
 def update_location():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
     user = User.query.get(int(user_id))
     
-    if not user or user.role != 'farmer':
-        return jsonify({'error': 'Unauthorized access'}), 403
-    
     data = request.get_json()
     
     if 'latitude' not in data or 'longitude' not in data:
@@ -1,69 +1,195 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.user import User
+from ..models.field import Field
 from ..models.service_request import ServiceRequest
+from ..models.availability import AvailabilityRule, AvailabilityInterval, AvailabilityBlackout
 from ..app import db
-from datetime import datetime
+from ..utils.geo import nearby_clause, rank_by_distance
+from ..utils.pagination import paginate, page_size, apply_filters, encode_distance_cursor, decode_distance_cursor
+from ..utils.auth import role_required, invalidate_principal
+from ..utils.events import publish_request_event
+from ..utils.coverage import field_coverage
+from ..utils.routing import plan_day, DEFAULT_TRAVEL_SPEED_KMH, DEFAULT_SERVICE_MINUTES
+from ..utils.availability import free_on, lock_operators, calendar_days, parse_calendar, parse_date, MAX_CALENDAR_DAYS
+from ..utils.batch import parse_ids, accept_requests, complete_requests
+from ..utils.serialize import project, serialize, json_response, parse_view, to_view
+from ..utils.rollups import record_transitions
+from datetime import datetime, date, timedelta
 
 operators_bp = Blueprint('operators', __name__)
 
+# Relations service requests can embed with ?include=; open requests don't
+# reveal the farmer until an operator has taken them
+AVAILABLE_INCLUDES = ('field',)
+ASSIGNED_INCLUDES = ('field', 'farmer')
+
 # Get available service requests
 @operators_bp.route('/service-requests/available', methods=['GET'])
 @jwt_required()
+@role_required('operator')
 def get_available_requests():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    operator = db.session.query(
+        User.latitude, User.longitude, User.service_radius
+    ).filter_by(id=int(user_id)).first()
     
-    # Get all pending service requests that don't have an operator assigned
-    service_requests = ServiceRequest.query.filter_by(
+    # Get pending service requests that don't have an operator assigned
+    query = ServiceRequest.query.filter_by(
         status='pending',
         operator_id=None
+    )
+    
+    try:
+        view = parse_view(request.args, ServiceRequest, AVAILABLE_INCLUDES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Without a location we cannot tell what is in range, so fall back to newest first
+    if operator.latitude is None or operator.longitude is None or not operator.service_radius:
+        try:
+            service_requests, next_cursor = paginate(project(query, ServiceRequest, view), ServiceRequest, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return json_response({
+            'service_requests': serialize(service_requests, ServiceRequest, view),
+            'next_cursor': next_cursor
+        })
+    
+    try:
+        limit = page_size(request.args)
+        filtered = apply_filters(query, ServiceRequest, request.args)
+        after = None
+        if request.args.get('cursor'):
+            distance, scheduled_date, request_id = decode_distance_cursor(request.args['cursor'])
+            after = (distance, (scheduled_date, request_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    lat, lng, radius = operator
+    
+    # Only requests on fields whose centroid can fall inside the service radius
+    candidates = filtered.join(Field, ServiceRequest.field_id == Field.id).filter(
+        nearby_clause(Field.centroid_lat, Field.centroid_lng, Field.geohash, lat, lng, radius)
+    ).with_entities(
+        ServiceRequest.id, ServiceRequest.scheduled_date, Field.centroid_lat, Field.centroid_lng
     ).all()
     
-    return jsonify({
-        'service_requests': [sr.to_dict() for sr in service_requests]
-    }), 200
+    # Keyed on (scheduled_date, id) so equal distances rank the earliest job first;
+    # the cursor is the last (distance, key) of the previous page
+    located = [((scheduled_date, request_id), centroid_lat, centroid_lng, None)
+               for request_id, scheduled_date, centroid_lat, centroid_lng in candidates]
+    ranked = rank_by_distance(lat, lng, located, radius_km=radius, limit=limit + 1, after=after)
+    
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        distance, (scheduled_date, request_id) = ranked[-1]
+        next_cursor = encode_distance_cursor(distance, scheduled_date, request_id)
+    
+    service_requests = {}
+    if ranked:
+        ids = [request_id for _, (_, request_id) in ranked]
+        page_rows = project(ServiceRequest.query.filter(ServiceRequest.id.in_(ids)), ServiceRequest, view).all()
+        service_requests = {row.id: item for row, item in zip(page_rows, serialize(page_rows, ServiceRequest, view))}
+    
+    results = []
+    for distance, (_, request_id) in ranked:
+        request_data = service_requests[request_id]
+        request_data['distance'] = round(distance, 2)
+        results.append(request_data)
+    
+    return json_response({
+        'service_requests': results,
+        'next_cursor': next_cursor
+    })
 
 # Get operator's assigned service requests
 @operators_bp.route('/service-requests', methods=['GET'])
 @jwt_required()
+@role_required('operator')
 def get_assigned_requests():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        view = parse_view(request.args, ServiceRequest, ASSIGNED_INCLUDES)
+        query = project(ServiceRequest.query.filter_by(operator_id=int(user_id)), ServiceRequest, view)
+        service_requests, next_cursor = paginate(query, ServiceRequest, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'service_requests': serialize(service_requests, ServiceRequest, view),
+        'next_cursor': next_cursor
+    })
+
+# Counts for the dashboard, which only loads the first page of each list
+@operators_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@role_required('operator')
+def get_stats():
+    user_id = get_jwt_identity()
     
-    service_requests = ServiceRequest.query.filter_by(operator_id=int(user_id)).all()
+    statuses = dict(db.session.query(
+        ServiceRequest.status, db.func.count(ServiceRequest.id)
+    ).filter(ServiceRequest.operator_id == int(user_id)).group_by(ServiceRequest.status).all())
     
     return jsonify({
-        'service_requests': [sr.to_dict() for sr in service_requests]
+        'service_requests': {
+            'pending': statuses.get('pending', 0),
+            'accepted': statuses.get('accepted', 0),
+            'completed': statuses.get('completed', 0),
+            'cancelled': statuses.get('cancelled', 0),
+            'total': sum(statuses.values())
+        }
     }), 200
 
 # Accept a service request
 @operators_bp.route('/service-requests/<int:request_id>/accept', methods=['POST'])
 @jwt_required()
+@role_required('operator')
 def accept_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    scheduled_date = db.session.query(ServiceRequest.scheduled_date).filter_by(id=request_id).scalar()
+    if scheduled_date is None:
+        return jsonify({'error': 'Service request not found or not available'}), 404
     
-    service_request = ServiceRequest.query.filter_by(id=request_id, status='pending').first()
+    # Claim the request with a single conditional UPDATE so that concurrent
+    # accepts cannot both succeed; only one of them will match the row.
+    # A request an admin pre-assigned to this operator can still be accepted.
+    # The operator must also have a free place in their calendar that day;
+    # their row is locked first so two accepts can't both take the last place.
+    lock_operators([int(user_id)])
+    claimed = ServiceRequest.query.filter(
+        ServiceRequest.id == request_id,
+        ServiceRequest.status == 'pending',
+        ServiceRequest.scheduled_date == scheduled_date,
+        db.or_(ServiceRequest.operator_id.is_(None), ServiceRequest.operator_id == int(user_id)),
+        free_on(int(user_id), scheduled_date, exclude_request_id=request_id)
+    ).update({
+        'operator_id': int(user_id),
+        'status': 'accepted',
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if claimed:
+        record_transitions([request_id], 'pending')
+    db.session.commit()
     
-    if not service_request:
+    if not claimed:
+        # Still open to this operator, so it was the calendar that said no
+        still_open = ServiceRequest.query.filter(
+            ServiceRequest.id == request_id,
+            ServiceRequest.status == 'pending',
+            db.or_(ServiceRequest.operator_id.is_(None), ServiceRequest.operator_id == int(user_id))
+        ).count()
+        if still_open:
+            return jsonify({'error': 'You have no availability left on the scheduled date'}), 409
         return jsonify({'error': 'Service request not found or not available'}), 404
     
-    service_request.operator_id = int(user_id)
-    service_request.status = 'accepted'
-    db.session.commit()
+    service_request = ServiceRequest.query.get(request_id)
+    publish_request_event('accepted', service_request)
     
     return jsonify({
         'message': 'Service request accepted successfully',
@@ -73,13 +199,9 @@ def accept_request(request_id):
 # Mark a service request as completed
 @operators_bp.route('/service-requests/<int:request_id>/complete', methods=['POST'])
 @jwt_required()
+@role_required('operator')
 def complete_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
-    
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
     
     service_request = ServiceRequest.query.filter_by(
         id=request_id,
@@ -93,25 +215,58 @@ def complete_request(request_id):
     service_request.status = 'completed'
     service_request.completed_at = datetime.utcnow()
     db.session.commit()
+    publish_request_event('completed', service_request)
     
     return jsonify({
         'message': 'Service request marked as completed',
         'service_request': service_request.to_dict()
     }), 200
 
+# Accept or complete many service requests in one transaction
+@operators_bp.route('/service-requests/batch-accept', methods=['POST'])
+@jwt_required()
+@role_required('operator')
+def accept_requests_batch():
+    user_id = get_jwt_identity()
+    
+    try:
+        ids = parse_ids(request.get_json(silent=True))
+        report = accept_requests(ids, int(user_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify(report), 200
+
+@operators_bp.route('/service-requests/batch-complete', methods=['POST'])
+@jwt_required()
+@role_required('operator')
+def complete_requests_batch():
+    user_id = get_jwt_identity()
+    
+    try:
+        ids = parse_ids(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(complete_requests(ids, int(user_id))), 200
+
 # Get details of a specific service request
 @operators_bp.route('/service-requests/<int:request_id>', methods=['GET'])
 @jwt_required()
+@role_required('operator')
 def get_service_request(request_id):
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        view = parse_view(request.args, ServiceRequest)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Operators can view both their assigned requests and available requests
-    service_request = ServiceRequest.query.filter(
+    # Operators can view both their assigned requests and available requests;
+    # the field is joined in rather than lazily loaded afterwards
+    service_request = ServiceRequest.query.options(db.joinedload(ServiceRequest.field)).filter(
         (ServiceRequest.id == request_id) & 
         ((ServiceRequest.operator_id == int(user_id)) | 
          (ServiceRequest.status == 'pending' and ServiceRequest.operator_id == None))
@@ -123,40 +278,170 @@ def get_service_request(request_id):
     # Get field details
     field = service_request.field
     
+    # Coverage plan for the field, optionally tuned from the query string
+    try:
+        coverage = field_coverage(
+            field,
+            service_request.service_type,
+            swath=request.args.get('swath', type=float),
+            heading=request.args.get('heading', type=float),
+            speed=request.args.get('speed', type=float)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     return jsonify({
-        'service_request': service_request.to_dict(),
-        'field': field.to_dict()
+        'service_request': to_view(service_request, view),
+        'field': field.to_dict(),
+        'coverage': coverage
     }), 200
 
-# Update availability calendar (simplified version)
-@operators_bp.route('/availability', methods=['POST'])
+# Plan the visiting order for a day's accepted jobs
+@operators_bp.route('/route-plan', methods=['GET'])
 @jwt_required()
-def update_availability():
+@role_required('operator')
+def get_route_plan():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
-    user = User.query.get(int(user_id))
     
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+        start = datetime.strptime(request.args.get('start', '08:00'), '%H:%M').time()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD and start HH:MM'}), 400
     
-    # In a real application, this would store availability in a separate table
-    # For this simplified version, we'll just return a success message
+    speed = request.args.get('speed', DEFAULT_TRAVEL_SPEED_KMH, type=float)
+    service_minutes = request.args.get('service_minutes', DEFAULT_SERVICE_MINUTES, type=float)
+    if not speed or speed <= 0 or service_minutes is None or service_minutes < 0:
+        return jsonify({'error': 'speed must be positive and service_minutes non-negative'}), 400
+    
+    operator = db.session.query(User.latitude, User.longitude).filter_by(id=int(user_id)).first()
+    if operator.latitude is None or operator.longitude is None:
+        return jsonify({'error': 'Set your location before planning a route'}), 400
+    
+    jobs = db.session.query(
+        ServiceRequest.id, Field.id, Field.name, Field.centroid_lat, Field.centroid_lng
+    ).join(Field, ServiceRequest.field_id == Field.id).filter(
+        ServiceRequest.operator_id == int(user_id),
+        ServiceRequest.status == 'accepted',
+        ServiceRequest.scheduled_date == day,
+        Field.centroid_lat.isnot(None)
+    ).all()
+    
+    fields = {request_id: (field_id, name) for request_id, field_id, name, _, _ in jobs}
+    plan = plan_day(
+        (operator.latitude, operator.longitude),
+        [(request_id, lat, lng) for request_id, _, _, lat, lng in jobs],
+        datetime.combine(day, start),
+        speed_kmh=speed,
+        service_minutes=service_minutes
+    )
+    
+    stops = []
+    for stop in plan['stops']:
+        field_id, field_name = fields[stop['key']]
+        stops.append({
+            'service_request_id': stop['key'],
+            'field_id': field_id,
+            'field_name': field_name,
+            'latitude': stop['latitude'],
+            'longitude': stop['longitude'],
+            'leg_distance_km': stop['leg_distance_km'],
+            'eta': stop['arrival'].isoformat(),
+            'departure': stop['departure'].isoformat()
+        })
     
     return jsonify({
-        'message': 'Availability updated successfully'
+        'date': day.isoformat(),
+        'stops': stops,
+        'total_distance_km': plan['total_distance_km'],
+        'finish': plan['finish'].isoformat(),
+        'converged': plan['converged'],
+        'solve_ms': plan['solve_ms']
     }), 200
 
+# Get the availability calendar, with capacity and bookings per day
+@operators_bp.route('/availability', methods=['GET'])
+@jwt_required()
+@role_required('operator')
+def get_availability():
+    user_id = int(get_jwt_identity())
+    
+    try:
+        start = parse_date(request.args.get('from') or date.today().isoformat(), 'from')
+        end = parse_date(request.args['to'], 'to') if request.args.get('to') else start + timedelta(days=27)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if end < start or (end - start).days >= MAX_CALENDAR_DAYS:
+        return jsonify({'error': f'to must be within {MAX_CALENDAR_DAYS} days after from'}), 400
+    
+    return jsonify(_calendar(user_id, start, end)), 200
+
+# Update availability calendar: replace the weekly rules and/or add intervals and blackouts
+@operators_bp.route('/availability', methods=['POST'])
+@jwt_required()
+@role_required('operator')
+def update_availability():
+    user_id = int(get_jwt_identity())
+    
+    try:
+        weekly, intervals, blackouts = parse_calendar(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if weekly is not None:
+        AvailabilityRule.query.filter_by(operator_id=user_id).delete()
+        db.session.add_all([AvailabilityRule(operator_id=user_id, weekday=weekday, capacity=capacity)
+                            for weekday, capacity in weekly.items()])
+    db.session.add_all([AvailabilityInterval(operator_id=user_id, start_date=start, end_date=end, capacity=capacity)
+                        for start, end, capacity in intervals])
+    db.session.add_all([AvailabilityBlackout(operator_id=user_id, start_date=start, end_date=end, reason=reason)
+                        for start, end, reason in blackouts])
+    db.session.commit()
+    
+    start = date.today()
+    calendar = _calendar(user_id, start, start + timedelta(days=27))
+    calendar['message'] = 'Availability updated successfully'
+    return jsonify(calendar), 200
+
+# Remove a dated interval or blackout
+@operators_bp.route('/availability/<kind>/<int:entry_id>', methods=['DELETE'])
+@jwt_required()
+@role_required('operator')
+def delete_availability(kind, entry_id):
+    model = {'intervals': AvailabilityInterval, 'blackouts': AvailabilityBlackout}.get(kind)
+    if model is None:
+        return jsonify({'error': 'Unknown availability entry type'}), 404
+    
+    deleted = model.query.filter_by(id=entry_id, operator_id=int(get_jwt_identity())).delete()
+    db.session.commit()
+    
+    if not deleted:
+        return jsonify({'error': 'Availability entry not found'}), 404
+    
+    return jsonify({'message': 'Availability entry deleted successfully'}), 200
+
+def _calendar(operator_id, start, end):
+    return {
+        'weekly': [rule.to_dict() for rule in
+                   AvailabilityRule.query.filter_by(operator_id=operator_id).order_by(AvailabilityRule.weekday)],
+        'intervals': [interval.to_dict() for interval in AvailabilityInterval.query.filter(
+            AvailabilityInterval.operator_id == operator_id, AvailabilityInterval.end_date >= start
+        ).order_by(AvailabilityInterval.start_date)],
+        'blackouts': [blackout.to_dict() for blackout in AvailabilityBlackout.query.filter(
+            AvailabilityBlackout.operator_id == operator_id, AvailabilityBlackout.end_date >= start
+        ).order_by(AvailabilityBlackout.start_date)],
+        'days': calendar_days(operator_id, start, end)
+    }
+
 # Update operator's location and availability
 @operators_bp.route('/update-location', methods=['POST'])
 @jwt_required()
+@role_required('operator')
 def update_location():
     user_id = get_jwt_identity()
-    # Convert string ID to integer for database query
     user = User.query.get(int(user_id))
     
-    if not user or user.role != 'operator':
-        return jsonify({'error': 'Unauthorized access'}), 403
-    
     data = request.get_json()
     
     if 'latitude' in data and 'longitude' in data:
@@ -170,6 +455,7 @@ def update_location():
         user.service_radius = data['service_radius']
     
     db.session.commit()
+    invalidate_principal(user.id)
     
     return jsonify({
         'message': 'Location and availability updated successfully',
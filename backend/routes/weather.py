@@ -1,7 +1,15 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
 from dotenv import load_dotenv
+from ..models.field import Field
+from ..models.service_request import ServiceRequest
+from ..app import db
+from ..utils.auth import role_required, current_principal
+from ..utils.spray import forecast_columns, score_slots
+from ..utils.weather import WeatherCache, MemoryStore, UpstreamError, bucket_key
+from ..utils.upstream import UpstreamClient
 
 # Load environment variables
 load_dotenv()
@@ -12,38 +20,72 @@ weather_bp = Blueprint('weather', __name__)
 API_KEY = os.environ.get('OPENWEATHER_API_KEY')
 BASE_URL = 'https://api.openweathermap.org/data/2.5'
 
+# Cache settings: TTLs in seconds, bucket size in degrees
+CURRENT_TTL = float(os.environ.get('WEATHER_CURRENT_TTL', 600))
+FORECAST_TTL = float(os.environ.get('WEATHER_FORECAST_TTL', 1800))
+STALE_TTL = float(os.environ.get('WEATHER_STALE_TTL', 600))
+CACHE_BUCKET = float(os.environ.get('WEATHER_CACHE_BUCKET', 0.01))
+CACHE_MAX_BYTES = int(os.environ.get('WEATHER_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+weather_cache = WeatherCache(MemoryStore(max_bytes=CACHE_MAX_BYTES), stale_ttl=STALE_TTL)
+
+# Pooled upstream client: timeouts in seconds, retries per call
+weather_client = UpstreamClient(
+    'OpenWeatherMap',
+    pool_size=int(os.environ.get('WEATHER_POOL_SIZE', 10)),
+    connect_timeout=float(os.environ.get('WEATHER_CONNECT_TIMEOUT', 3.05)),
+    read_timeout=float(os.environ.get('WEATHER_READ_TIMEOUT', 10)),
+    max_retries=int(os.environ.get('WEATHER_MAX_RETRIES', 2))
+)
+
+def _fetch_json(endpoint, lat, lon, units):
+    """Call OpenWeatherMap and return the decoded JSON body"""
+    # Make request to OpenWeatherMap API
+    print(f"Making request to: {BASE_URL}/{endpoint}?lat={lat}&lon={lon}&units={units}")
+    
+    return weather_client.get_json(f"{BASE_URL}/{endpoint}", params={
+        'lat': lat,
+        'lon': lon,
+        'units': units,
+        'appid': API_KEY
+    })
+
+def _cached_weather(kind, endpoint, ttl, error_message):
+    """Serve a weather lookup for the request's coordinates through the cache"""
+    # Get query parameters
+    lat = request.args.get('lat')
+    lon = request.args.get('lon')
+    units = request.args.get('units', 'metric')
+    
+    # Validate parameters
+    if not lat or not lon:
+        return jsonify({'error': 'Latitude and longitude are required'}), 400
+    
+    try:
+        key = bucket_key(kind, float(lat), float(lon), units, CACHE_BUCKET)
+    except ValueError:
+        return jsonify({'error': 'Latitude and longitude must be numbers'}), 400
+    
+    # Check if API key is available
+    if not API_KEY:
+        print("WARNING: OpenWeatherMap API key is not set in environment variables")
+        return jsonify({'error': 'Weather API key is not configured'}), 500
+    
+    try:
+        data = weather_cache.get_or_fetch(
+            key, lambda: _fetch_json(endpoint, lat, lon, units), ttl)
+    except UpstreamError as e:
+        print(f"OpenWeatherMap API error: {str(e)}")
+        return jsonify({'error': error_message}), e.status_code
+    
+    # Return weather data
+    return jsonify(data)
+
 @weather_bp.route('/current', methods=['GET'])
 def get_current_weather():
     """Get current weather by coordinates"""
     try:
-        # Get query parameters
-        lat = request.args.get('lat')
-        lon = request.args.get('lon')
-        units = request.args.get('units', 'metric')
-        
-        # Validate parameters
-        if not lat or not lon:
-            return jsonify({'error': 'Latitude and longitude are required'}), 400
-        
-        # Check if API key is available
-        if not API_KEY:
-            print("WARNING: OpenWeatherMap API key is not set in environment variables")
-            return jsonify({'error': 'Weather API key is not configured'}), 500
-        
-        # Make request to OpenWeatherMap API
-        url = f"{BASE_URL}/weather?lat={lat}&lon={lon}&units={units}&appid={API_KEY}"
-        print(f"Making request to: {url.replace(API_KEY, 'API_KEY_HIDDEN')}")
-        
-        response = requests.get(url)
-        
-        # Check if request was successful
-        if response.status_code != 200:
-            print(f"OpenWeatherMap API error: Status {response.status_code}, Response: {response.text}")
-            return jsonify({'error': 'Failed to fetch weather data'}), response.status_code
-        
-        # Return weather data
-        return jsonify(response.json())
-    
+        return _cached_weather('current', 'weather', CURRENT_TTL, 'Failed to fetch weather data')
     except Exception as e:
         print(f"Exception in weather API: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -52,34 +94,140 @@ def get_current_weather():
 def get_forecast():
     """Get 5-day forecast by coordinates"""
     try:
-        # Get query parameters
-        lat = request.args.get('lat')
-        lon = request.args.get('lon')
-        units = request.args.get('units', 'metric')
-        
-        # Validate parameters
-        if not lat or not lon:
-            return jsonify({'error': 'Latitude and longitude are required'}), 400
-        
-        # Check if API key is available
-        if not API_KEY:
-            print("WARNING: OpenWeatherMap API key is not set in environment variables")
-            return jsonify({'error': 'Weather API key is not configured'}), 500
-            
-        # Make request to OpenWeatherMap API
-        url = f"{BASE_URL}/forecast?lat={lat}&lon={lon}&units={units}&appid={API_KEY}"
-        print(f"Making request to: {url.replace(API_KEY, 'API_KEY_HIDDEN')}")
-        
-        response = requests.get(url)
-        
-        # Check if request was successful
-        if response.status_code != 200:
-            print(f"OpenWeatherMap API error: Status {response.status_code}, Response: {response.text}")
-            return jsonify({'error': 'Failed to fetch forecast data'}), response.status_code
-        
-        # Return forecast data
-        return jsonify(response.json())
-    
+        return _cached_weather('forecast', 'forecast', FORECAST_TTL, 'Failed to fetch forecast data')
     except Exception as e:
         print(f"Exception in weather API: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
+@weather_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def get_cache_stats():
+    """Hit/miss counters and memory usage of the weather cache"""
+    return jsonify(weather_cache.stats()), 200
+
+@weather_bp.route('/upstream-stats', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def get_upstream_stats():
+    """Connection pool usage, latency and circuit breaker state of the weather client"""
+    return jsonify(weather_client.stats()), 200
+
+# Spray windows for a batch of fields or service requests
+MAX_SPRAY_WINDOW_ITEMS = 500
+
+def _spray_targets(principal, data):
+    """Resolve the request body into (item, field_id, lat, lng, service_type) rows.
+    
+    Ownership is checked with one IN query. Returns the rows and a list of
+    per-item errors for ids that are missing or not visible to the user.
+    """
+    field_ids = [int(i) for i in data.get('field_ids', [])]
+    request_ids = [int(i) for i in data.get('service_request_ids', [])]
+    
+    if len(field_ids) + len(request_ids) > MAX_SPRAY_WINDOW_ITEMS:
+        raise ValueError(f'At most {MAX_SPRAY_WINDOW_ITEMS} items can be requested at once')
+    
+    targets = []
+    errors = []
+    
+    if field_ids:
+        if principal.role == 'operator':
+            raise ValueError('Operators must request spray windows by service_request_ids')
+        query = db.session.query(Field.id, Field.centroid_lat, Field.centroid_lng).filter(Field.id.in_(field_ids))
+        if principal.role == 'farmer':
+            query = query.filter(Field.user_id == principal.id)
+        found = {row.id: row for row in query}
+        service_type = data.get('service_type', 'spraying')
+        for field_id in field_ids:
+            row = found.get(field_id)
+            if row is None:
+                errors.append({'field_id': field_id, 'error': 'Field not found'})
+            else:
+                targets.append(({'field_id': field_id}, row.centroid_lat, row.centroid_lng, service_type))
+    
+    if request_ids:
+        query = db.session.query(
+            ServiceRequest.id, ServiceRequest.field_id, ServiceRequest.service_type,
+            Field.centroid_lat, Field.centroid_lng
+        ).join(Field, ServiceRequest.field_id == Field.id).filter(ServiceRequest.id.in_(request_ids))
+        if principal.role == 'farmer':
+            query = query.filter(ServiceRequest.farmer_id == principal.id)
+        elif principal.role == 'operator':
+            query = query.filter(db.or_(
+                ServiceRequest.operator_id == principal.id,
+                db.and_(ServiceRequest.status == 'pending', ServiceRequest.operator_id.is_(None))
+            ))
+        found = {row.id: row for row in query}
+        for request_id in request_ids:
+            row = found.get(request_id)
+            if row is None:
+                errors.append({'service_request_id': request_id, 'error': 'Service request not found'})
+            else:
+                item = {'service_request_id': request_id, 'field_id': row.field_id}
+                targets.append((item, row.centroid_lat, row.centroid_lng, row.service_type))
+    
+    return targets, errors
+
+@weather_bp.route('/spray-windows', methods=['POST'])
+@jwt_required()
+def get_spray_windows():
+    """Safe 3-hour application slots over the next five days for many fields at once"""
+    principal = current_principal()
+    
+    if not principal:
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    if not API_KEY:
+        print("WARNING: OpenWeatherMap API key is not set in environment variables")
+        return jsonify({'error': 'Weather API key is not configured'}), 500
+    
+    data = request.get_json() or {}
+    
+    try:
+        targets, errors = _spray_targets(principal, data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One forecast per geo bucket, however many fields share it
+    buckets = {}
+    for item, lat, lng, service_type in targets:
+        if lat is None or lng is None:
+            errors.append(dict(item, error='Field location is unknown'))
+            continue
+        key = bucket_key('forecast', lat, lng, 'metric', CACHE_BUCKET)
+        buckets.setdefault(key, (lat, lng))
+    
+    def fetch(key):
+        lat, lng = buckets[key]
+        try:
+            return key, weather_cache.get_or_fetch(
+                key, lambda: _fetch_json('forecast', lat, lng, 'metric'), FORECAST_TTL)
+        except UpstreamError as e:
+            return key, e
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(len(buckets), weather_client.pool_size))) as pool:
+        forecasts = dict(pool.map(fetch, list(buckets)))
+    
+    # Score each distinct (bucket, service type) once and share the result
+    columns = {}
+    windows = {}
+    results = []
+    for item, lat, lng, service_type in targets:
+        if lat is None or lng is None:
+            continue
+        key = bucket_key('forecast', lat, lng, 'metric', CACHE_BUCKET)
+        forecast = forecasts[key]
+        if isinstance(forecast, UpstreamError):
+            errors.append(dict(item, error='Failed to fetch forecast data'))
+            continue
+        if key not in columns:
+            columns[key] = forecast_columns(forecast)
+        if (key, service_type) not in windows:
+            windows[(key, service_type)] = score_slots(columns[key], service_type)
+        results.append(dict(item, service_type=service_type, windows=windows[(key, service_type)]))
+    
+    return jsonify({
+        'results': results,
+        'errors': errors
+    }), 200
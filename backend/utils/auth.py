@@ -0,0 +1,61 @@
+from collections import namedtuple
+from functools import wraps
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt_identity
+from ..app import db
+from ..models.user import User
+from .cache import TTLCache
+
+# The subset of a user that protected routes need to authorize a request
+Principal = namedtuple('Principal', ['id', 'role', 'is_available'])
+
+# Every worker keeps its own cache, so entries expire after a short TTL to
+# bound staleness for changes made through another worker
+_principals = TTLCache()
+
+
+def load_principal(user_id):
+    """Return the Principal for a user id, or None if the user does not exist"""
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 30)
+    if ttl <= 0:
+        return _query_principal(user_id)
+
+    principal = _principals.get(user_id)
+    if principal is None:
+        principal = _query_principal(user_id)
+        if principal is not None:
+            _principals.set(user_id, principal, ttl=ttl)
+    return principal
+
+
+def _query_principal(user_id):
+    row = db.session.query(User.id, User.role, User.is_available).filter_by(id=user_id).first()
+    return Principal(*row) if row else None
+
+
+def invalidate_principal(user_id):
+    """Drop a cached principal after the user's role or availability changes"""
+    _principals.pop(int(user_id))
+
+
+def current_principal():
+    """Return the Principal for the JWT identity of the current request"""
+    return load_principal(int(get_jwt_identity()))
+
+
+def role_required(*roles):
+    """Reject the request with 403 unless the JWT user has one of ``roles``.
+
+    Must be applied below ``@jwt_required()``.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            principal = current_principal()
+
+            if not principal or principal.role not in roles:
+                return jsonify({'error': 'Unauthorized access'}), 403
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,263 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, case, exists, func, or_, select
+from ..app import db
+from ..models.user import User
+from ..models.availability import AvailabilityRule, AvailabilityInterval, AvailabilityBlackout
+from ..models.service_request import ServiceRequest
+
+# Capacity checks against the operator availability calendar.
+#
+# The *_expression helpers build SQL that works both for a single operator id
+# and correlated against User.id, so "which operators are free on day D" is a
+# filter inside the query that selects them rather than a loop over operators.
+#
+# A count of bookings only stays true until another transaction books the same
+# operator. Writers that book places call lock_operators() first, so bookings
+# with one operator are serialized on its users row (SELECT ... FOR UPDATE on
+# server databases; SQLite already lets only one transaction write at a time).
+
+MAX_CALENDAR_DAYS = 92  # Longest range the day-by-day calendar view returns
+
+# Requests in these states hold one of the operator's places for the day
+BOOKED_STATUSES = ('pending', 'accepted', 'completed')
+
+# Aliased so the count also works inside an UPDATE of service_requests
+_booked = ServiceRequest.__table__.alias('booked')
+
+
+def capacity_expression(operator_id, day):
+    """SQL for the number of jobs an operator can take on ``day``"""
+    blackout = exists().where(
+        AvailabilityBlackout.operator_id == operator_id,
+        AvailabilityBlackout.start_date <= day,
+        AvailabilityBlackout.end_date >= day
+    )
+    interval = select(AvailabilityInterval.capacity).where(
+        AvailabilityInterval.operator_id == operator_id,
+        AvailabilityInterval.start_date <= day,
+        AvailabilityInterval.end_date >= day
+    ).order_by(AvailabilityInterval.id.desc()).limit(1).scalar_subquery()
+    rule = select(AvailabilityRule.capacity).where(
+        AvailabilityRule.operator_id == operator_id,
+        AvailabilityRule.weekday == day.weekday()
+    ).limit(1).scalar_subquery()
+    # Once an operator keeps a calendar, days it does not mention are off
+    has_calendar = or_(
+        exists().where(AvailabilityRule.operator_id == operator_id),
+        exists().where(AvailabilityInterval.operator_id == operator_id)
+    )
+    default = current_app.config['OPERATOR_DAILY_CAPACITY']
+
+    return case(
+        (blackout, 0),
+        else_=func.coalesce(interval, rule, case((has_calendar, 0), else_=default))
+    )
+
+
+def booked_expression(operator_id, day, exclude_request_id=None):
+    """SQL for the number of jobs already booked with an operator on ``day``"""
+    conditions = [
+        _booked.c.operator_id == operator_id,
+        _booked.c.scheduled_date == day,
+        _booked.c.status.in_(BOOKED_STATUSES)
+    ]
+    if exclude_request_id is not None:
+        conditions.append(_booked.c.id != exclude_request_id)
+    return select(func.count(_booked.c.id)).where(and_(*conditions)).scalar_subquery()
+
+
+def free_on(operator_id, day, exclude_request_id=None):
+    """SQL condition: the operator has at least one free place on ``day``"""
+    return capacity_expression(operator_id, day) > booked_expression(operator_id, day, exclude_request_id)
+
+
+def has_capacity(operator_id, day, exclude_request_id=None):
+    """Check a single operator in one query"""
+    return bool(db.session.execute(select(free_on(operator_id, day, exclude_request_id))).scalar())
+
+
+def lock_operators(operator_ids):
+    """Lock operators' rows until the end of the transaction, before counting their bookings.
+
+    Rows are locked in id order so two writers never wait on each other.
+    """
+    operator_ids = sorted(set(operator_ids))
+    if operator_ids:
+        db.session.execute(
+            select(User.id).where(User.id.in_(operator_ids)).order_by(User.id).with_for_update()
+        ).all()
+
+
+def _day_capacity(day, rules, intervals, blackouts, has_calendar, default):
+    # Same precedence as capacity_expression; intervals are newest first
+    if any(b.start_date <= day <= b.end_date for b in blackouts):
+        return 0
+    interval = next((i for i in intervals if i.start_date <= day <= i.end_date), None)
+    if interval is not None:
+        return interval.capacity
+    return rules.get(day.weekday(), 0 if has_calendar else default)
+
+
+def _calendars(operator_ids, start, end):
+    """Calendar rows of many operators that touch a range, from three queries in total.
+
+    Returns a function ``(operator_id, day) -> capacity`` for days in the range.
+    """
+    rules = {}
+    for rule in AvailabilityRule.query.filter(AvailabilityRule.operator_id.in_(operator_ids)):
+        rules.setdefault(rule.operator_id, {})[rule.weekday] = rule.capacity
+    intervals = {}
+    with_intervals = set()
+    for interval in AvailabilityInterval.query.filter(
+        AvailabilityInterval.operator_id.in_(operator_ids)
+    ).order_by(AvailabilityInterval.id.desc()):
+        with_intervals.add(interval.operator_id)
+        if interval.start_date <= end and interval.end_date >= start:
+            intervals.setdefault(interval.operator_id, []).append(interval)
+    blackouts = {}
+    for blackout in AvailabilityBlackout.query.filter(
+        AvailabilityBlackout.operator_id.in_(operator_ids),
+        AvailabilityBlackout.start_date <= end,
+        AvailabilityBlackout.end_date >= start
+    ):
+        blackouts.setdefault(blackout.operator_id, []).append(blackout)
+    default = current_app.config['OPERATOR_DAILY_CAPACITY']
+
+    def capacity(operator_id, day):
+        return _day_capacity(day, rules.get(operator_id, {}), intervals.get(operator_id, []),
+                             blackouts.get(operator_id, []),
+                             operator_id in rules or operator_id in with_intervals, default)
+    return capacity
+
+
+def iter_capacities(operator_ids, start, end):
+    """Yield ``(operator_id, day, capacity)`` over a range, from three queries in total"""
+    operator_ids = list(operator_ids)
+    capacity = _calendars(operator_ids, start, end)
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    for operator_id in operator_ids:
+        for day in days:
+            yield operator_id, day, capacity(operator_id, day)
+
+
+def calendar_days(operator_id, start, end):
+    """Capacity, bookings and free places per day for one operator.
+
+    Loads the operator's calendar rows once and resolves each day with the
+    same precedence as capacity_expression.
+    """
+    rules = {rule.weekday: rule.capacity for rule in AvailabilityRule.query.filter_by(operator_id=operator_id)}
+    intervals = AvailabilityInterval.query.filter(
+        AvailabilityInterval.operator_id == operator_id,
+        AvailabilityInterval.start_date <= end,
+        AvailabilityInterval.end_date >= start
+    ).order_by(AvailabilityInterval.id.desc()).all()
+    blackouts = AvailabilityBlackout.query.filter(
+        AvailabilityBlackout.operator_id == operator_id,
+        AvailabilityBlackout.start_date <= end,
+        AvailabilityBlackout.end_date >= start
+    ).all()
+    has_calendar = bool(rules) or AvailabilityInterval.query.filter_by(operator_id=operator_id).first() is not None
+    booked = dict(db.session.query(ServiceRequest.scheduled_date, func.count(ServiceRequest.id)).filter(
+        ServiceRequest.operator_id == operator_id,
+        ServiceRequest.scheduled_date.between(start, end),
+        ServiceRequest.status.in_(BOOKED_STATUSES)
+    ).group_by(ServiceRequest.scheduled_date).all())
+    default = current_app.config['OPERATOR_DAILY_CAPACITY']
+
+    days = []
+    day = start
+    while day <= end:
+        capacity = _day_capacity(day, rules, intervals, blackouts, has_calendar, default)
+        count = booked.get(day, 0)
+        days.append({
+            'date': day.isoformat(),
+            'capacity': capacity,
+            'booked': count,
+            'free': max(0, capacity - count)
+        })
+        day += timedelta(days=1)
+    return days
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(value or '', '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def _capacity(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('capacity must be a non-negative integer')
+    return value
+
+
+def _items(data, key):
+    items = data.get(key) or []
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError(f'{key} must be a list of objects')
+    return items
+
+
+def _date_range(item):
+    start = parse_date(item.get('start_date'), 'start_date')
+    end = parse_date(item.get('end_date') or item.get('start_date'), 'end_date')
+    if end < start:
+        raise ValueError('end_date must not be before start_date')
+    return start, end
+
+
+def parse_calendar(data):
+    """Validate an availability update payload.
+
+    Returns ``(weekly, intervals, blackouts)``; weekly is None when the
+    payload does not replace the weekly rules. Raises ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+
+    weekly = None
+    if 'weekly' in data:
+        weekly = {}
+        for rule in _items(data, 'weekly'):
+            weekday = rule.get('weekday')
+            if isinstance(weekday, bool) or not isinstance(weekday, int) or not 0 <= weekday <= 6:
+                raise ValueError('weekday must be an integer from 0 (Monday) to 6 (Sunday)')
+            weekly[weekday] = _capacity(rule.get('capacity'))
+
+    intervals = []
+    for item in _items(data, 'intervals'):
+        start, end = _date_range(item)
+        intervals.append((start, end, _capacity(item.get('capacity'))))
+
+    blackouts = []
+    for item in _items(data, 'blackouts'):
+        start, end = _date_range(item)
+        blackouts.append((start, end, item.get('reason')))
+
+    return weekly, intervals, blackouts
+
+
+def free_places(pairs):
+    """Capacity minus bookings for many (operator_id, day) pairs.
+
+    Four queries however many pairs: the operators' calendars, and their
+    bookings on those days counted in one grouped query. Negative values
+    mean the day is overbooked.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    operator_ids = list({operator_id for operator_id, _ in pairs})
+    days = list({day for _, day in pairs})
+    capacity = _calendars(operator_ids, min(days), max(days))
+    booked = {(operator_id, day): count for operator_id, day, count in db.session.query(
+        ServiceRequest.operator_id, ServiceRequest.scheduled_date, func.count(ServiceRequest.id)
+    ).filter(
+        ServiceRequest.operator_id.in_(operator_ids),
+        ServiceRequest.scheduled_date.in_(days),
+        ServiceRequest.status.in_(BOOKED_STATUSES)
+    ).group_by(ServiceRequest.operator_id, ServiceRequest.scheduled_date)}
+    return {pair: capacity(*pair) - booked.get(pair, 0) for pair in pairs}
@@ -0,0 +1,314 @@
+from datetime import datetime
+from ..app import db
+from ..models.user import User
+from ..models.field import Field
+from ..models.service_request import ServiceRequest
+from .availability import free_places, lock_operators, parse_date
+from .events import publish_request_event
+from .rollups import record_transitions
+
+# Batch service request endpoints: many requests per call, with ownership
+# checked by one IN query, one bulk write and one transaction, and a result
+# code per item in the order the items were sent.
+
+MAX_BATCH_SIZE = 500
+
+# Bookings lock their operators (see availability.lock_operators) before
+# counting free places. Capacity is also re-checked after writing; if a
+# booking that took no lock slipped in, the batch starts over
+MAX_ATTEMPTS = 3
+
+
+def parse_ids(data):
+    """Unique request ids from a {"ids": [...]} body, in the order given"""
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids must be a non-empty list of service request ids')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch is limited to {MAX_BATCH_SIZE} items')
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        raise ValueError('ids must be integers')
+    return list(dict.fromkeys(ids))
+
+
+def parse_items(data):
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError('requests must be a non-empty list of service requests')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch is limited to {MAX_BATCH_SIZE} items')
+    return items
+
+
+def summarize(results):
+    succeeded = sum(1 for result in results if result['status'] < 300)
+    return {
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
+    }
+
+
+def _failure(index, status, error):
+    return {'index': index, 'status': status, 'error': error}
+
+
+def _overbooked(pairs):
+    """Whether any of the days the batch booked places on is now over capacity"""
+    return any(places < 0 for places in free_places(pairs).values())
+
+
+def _publish(event_type, ids):
+    """Publish events for committed changes, loading the rows in one query"""
+    if not ids:
+        return
+    for service_request in ServiceRequest.query.filter(ServiceRequest.id.in_(list(ids))).order_by(ServiceRequest.id):
+        publish_request_event(event_type, service_request)
+
+
+def _insert(rows):
+    """Insert rows with one multi-row INSERT ... RETURNING; ids in row order.
+
+    A single statement assigns its new ids in VALUES order, so sorting the
+    returned ids lines them up with the rows whatever order RETURNING uses.
+    """
+    if not rows:
+        return []
+    stamp = datetime.utcnow()
+    table = ServiceRequest.__table__
+    statement = table.insert().values([dict(row, created_at=stamp, updated_at=stamp) for row in rows])
+    return sorted(request_id for request_id, in db.session.execute(statement.returning(table.c.id)))
+
+
+def create_requests(items, farmer_id):
+    """Create many service requests for one farmer.
+
+    Raises RuntimeError if availability kept changing underneath the batch.
+    """
+    results = [None] * len(items)
+    rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _failure(index, 400, 'Each request must be an object')
+            continue
+        try:
+            scheduled_date = parse_date(item.get('scheduled_date'), 'scheduled_date')
+        except ValueError as e:
+            results[index] = _failure(index, 400, str(e))
+            continue
+        service_type = item.get('service_type')
+        if not isinstance(service_type, str) or not service_type:
+            results[index] = _failure(index, 400, 'service_type is required')
+            continue
+        rows.append((index, {
+            'field_id': item.get('field_id'),
+            'farmer_id': farmer_id,
+            'operator_id': item.get('operator_id'),
+            'service_type': service_type,
+            'scheduled_date': scheduled_date,
+            'notes': item.get('notes')
+        }))
+
+    # Ownership and operator checks for the whole batch, one query each
+    field_ids = {row['field_id'] for _, row in rows if isinstance(row['field_id'], int)}
+    owned = {field_id for field_id, in db.session.query(Field.id).filter(
+        Field.id.in_(field_ids), Field.user_id == farmer_id
+    )} if field_ids else set()
+    operator_ids = {row['operator_id'] for _, row in rows if isinstance(row['operator_id'], int)}
+    operators = {operator_id for operator_id, in db.session.query(User.id).filter(
+        User.id.in_(operator_ids), User.role == 'operator', User.is_available.is_(True)
+    )} if operator_ids else set()
+
+    valid = []
+    for index, row in rows:
+        if row['field_id'] not in owned:
+            results[index] = _failure(index, 404, 'Field not found or not owned by you')
+        elif row['operator_id'] is not None and row['operator_id'] not in operators:
+            results[index] = _failure(index, 404, 'Operator not found or not available')
+        else:
+            valid.append((index, row))
+
+    table = ServiceRequest.__table__
+    for attempt in range(MAX_ATTEMPTS):
+        # A rollback releases the locks, so each attempt takes them again
+        lock_operators(row['operator_id'] for _, row in valid if row['operator_id'] is not None)
+        # Hand out each operator's free places per day in the order items were sent
+        pairs = [(row['operator_id'], row['scheduled_date']) for _, row in valid if row['operator_id'] is not None]
+        places = free_places(pairs)
+        accepted = []
+        conflicts = []
+        used = set()
+        for index, row in valid:
+            pair = (row['operator_id'], row['scheduled_date'])
+            if row['operator_id'] is not None:
+                if places[pair] <= 0:
+                    conflicts.append(index)
+                    continue
+                places[pair] -= 1
+                used.add(pair)
+            accepted.append((index, row))
+
+        try:
+            created = _insert([row for _, row in accepted])
+            # Checked after the insert, like create_service_request
+            if _overbooked(used):
+                db.session.rollback()
+                continue
+            record_transitions(created, None)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        break
+    else:
+        raise RuntimeError('Availability changed while booking; please retry')
+
+    for index in conflicts:
+        results[index] = _failure(index, 409, 'The operator has no availability left on that date')
+    for (index, _), request_id in zip(accepted, created):
+        results[index] = {'index': index, 'status': 201, 'id': request_id}
+
+    _publish('created', created)
+    return summarize(results)
+
+
+def _transition(ids, conditions, values):
+    """One conditional UPDATE over many requests; returns the ids it changed.
+
+    As in accept_request the conditions are part of the UPDATE itself, so a
+    request that changed concurrently is simply not matched.
+    """
+    if not ids:
+        return set()
+    table = ServiceRequest.__table__
+    statement = table.update().where(table.c.id.in_(ids), *conditions).values(
+        updated_at=datetime.utcnow(), **values
+    ).returning(table.c.id)
+    return {request_id for request_id, in db.session.execute(statement)}
+
+
+def cancel_requests(ids, farmer_id):
+    """Cancel a farmer's pending requests"""
+    table = ServiceRequest.__table__
+    statuses = dict(db.session.query(ServiceRequest.id, ServiceRequest.status).filter(
+        ServiceRequest.id.in_(ids), ServiceRequest.farmer_id == farmer_id
+    ))
+    try:
+        cancelled = _transition(
+            [request_id for request_id in ids if statuses.get(request_id) == 'pending'],
+            [table.c.farmer_id == farmer_id, table.c.status == 'pending'],
+            {'status': 'cancelled'}
+        )
+        record_transitions(cancelled, 'pending')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    results = []
+    for index, request_id in enumerate(ids):
+        if request_id in cancelled:
+            results.append({'index': index, 'status': 200, 'id': request_id})
+        elif request_id not in statuses:
+            results.append(dict(_failure(index, 404, 'Service request not found'), id=request_id))
+        else:
+            results.append(dict(_failure(
+                index, 400, 'Cannot cancel a service request that has been accepted or completed'
+            ), id=request_id))
+
+    _publish('cancelled', cancelled)
+    return summarize(results)
+
+
+def accept_requests(ids, operator_id):
+    """Accept many open requests, up to the operator's free places per day.
+
+    Raises RuntimeError if availability kept changing underneath the batch.
+    """
+    table = ServiceRequest.__table__
+    open_to_me = [
+        table.c.status == 'pending',
+        db.or_(table.c.operator_id.is_(None), table.c.operator_id == operator_id)
+    ]
+    for attempt in range(MAX_ATTEMPTS):
+        lock_operators([operator_id])
+        dates = dict(db.session.execute(
+            db.select(table.c.id, table.c.scheduled_date).where(table.c.id.in_(ids), *open_to_me)
+        ).all())
+        # A pre-assigned request already holds one of this operator's places
+        preassigned = {request_id for request_id, in db.session.execute(
+            db.select(table.c.id).where(table.c.id.in_(list(dates)), table.c.operator_id == operator_id)
+        )} if dates else set()
+        pairs = [(operator_id, day) for day in set(dates.values())]
+        places = free_places(pairs)
+
+        chosen = []
+        full = set()
+        used = set()
+        for request_id in ids:
+            if request_id not in dates:
+                continue
+            pair = (operator_id, dates[request_id])
+            if request_id not in preassigned:
+                if places[pair] <= 0:
+                    full.add(request_id)
+                    continue
+                places[pair] -= 1
+                used.add(pair)
+            chosen.append(request_id)
+
+        try:
+            accepted = _transition(chosen, open_to_me, {'operator_id': operator_id, 'status': 'accepted'})
+            if _overbooked(used):
+                db.session.rollback()
+                continue
+            record_transitions(accepted, 'pending')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        break
+    else:
+        raise RuntimeError('Availability changed while accepting; please retry')
+
+    results = []
+    for index, request_id in enumerate(ids):
+        if request_id in accepted:
+            results.append({'index': index, 'status': 200, 'id': request_id})
+        elif request_id in full:
+            results.append(dict(_failure(
+                index, 409, 'You have no availability left on the scheduled date'
+            ), id=request_id))
+        else:
+            results.append(dict(_failure(index, 404, 'Service request not found or not available'), id=request_id))
+
+    _publish('accepted', accepted)
+    return summarize(results)
+
+
+def complete_requests(ids, operator_id):
+    """Mark many of an operator's accepted requests as completed"""
+    table = ServiceRequest.__table__
+    try:
+        completed = _transition(
+            ids,
+            [table.c.operator_id == operator_id, table.c.status == 'accepted'],
+            {'status': 'completed', 'completed_at': datetime.utcnow()}
+        )
+        record_transitions(completed, 'accepted')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    results = []
+    for index, request_id in enumerate(ids):
+        if request_id in completed:
+            results.append({'index': index, 'status': 200, 'id': request_id})
+        else:
+            results.append(dict(_failure(
+                index, 404, 'Service request not found or not assigned to you'
+            ), id=request_id))
+
+    _publish('completed', completed)
+    return summarize(results)
@@ -0,0 +1,460 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import io
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the path so we can import from the backend package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Benchmarks run against a throwaway SQLite file, never the configured database
+_DB_DIR = tempfile.mkdtemp(prefix='agridrone-bench-')
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(_DB_DIR, 'bench.db')
+
+from flask import jsonify
+from backend.app import app, db
+from backend.models.user import User
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.geo import encode_geohash, nearby_clause, rank_by_distance
+from backend.utils.coverage import plan_coverage, field_coverage
+from backend.utils.routing import distance_matrix, nearest_neighbour, route_length, plan_day
+from backend.utils.dispatch import candidate_edges, solve_assignment
+from backend.utils.imports import iter_geojson_features, iter_kml_placemarks, import_fields
+from backend.utils.export import iter_rows, encode_rows, gzip_chunks, EXPORTS
+from backend.utils.rollups import backfill, timeseries
+from backend.utils.serialize import project, serialize, json_response
+
+# Sample points are drawn from a box roughly covering India
+REGION = {'min_lat': 8.0, 'max_lat': 35.0, 'min_lng': 68.0, 'max_lng': 97.0}
+
+
+def _reset_database():
+    db.drop_all()
+    db.create_all()
+
+
+def _random_point(rng):
+    return (rng.uniform(REGION['min_lat'], REGION['max_lat']),
+            rng.uniform(REGION['min_lng'], REGION['max_lng']))
+
+
+def _insert_operators(count, rng):
+    """Bulk insert operators directly, skipping per-row password hashing"""
+    rows = []
+    for i in range(count):
+        lat, lng = _random_point(rng)
+        rows.append({
+            'email': f'bench-operator-{i}@example.com',
+            'password_hash': 'x',
+            'first_name': 'Bench',
+            'last_name': f'Operator {i}',
+            'role': 'operator',
+            'is_premium': False,
+            'latitude': lat,
+            'longitude': lng,
+            'geohash': encode_geohash(lat, lng),
+            'is_available': True,
+            'service_radius': rng.choice([20.0, 30.0, 50.0, 80.0]),
+            'hourly_rate': 50.0,
+        })
+    db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+
+
+def _time_queries(fn, points, radius):
+    timings = []
+    for lat, lng in points:
+        db.session.expire_all()
+        start = time.perf_counter()
+        fn(lat, lng, radius)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _full_scan(lat, lng, radius):
+    operators = User.query.filter_by(role='operator', is_available=True).all()
+    return [op for op in operators
+            if ((op.latitude - lat) ** 2 + (op.longitude - lng) ** 2) ** 0.5 * 111 <= radius]
+
+
+def _indexed(lat, lng, radius):
+    candidates = db.session.query(
+        User.id, User.latitude, User.longitude, User.service_radius
+    ).filter_by(role='operator', is_available=True).filter(
+        nearby_clause(User.latitude, User.longitude, User.geohash, lat, lng, radius)
+    ).all()
+    return rank_by_distance(lat, lng, candidates, radius_km=radius)
+
+
+def bench_nearby(counts, queries, radius, seed):
+    """Nearby-operator lookup latency versus operator count"""
+    rng = random.Random(seed)
+    print(f"{'operators':>10} {'full scan ms':>14} {'indexed ms':>12} {'speedup':>9}")
+    for count in counts:
+        _reset_database()
+        _insert_operators(count, rng)
+        points = [_random_point(rng) for _ in range(queries)]
+        scan = _time_queries(_full_scan, points, radius)
+        indexed = _time_queries(_indexed, points, radius)
+        print(f"{count:>10} {scan:>14.2f} {indexed:>12.2f} {scan / indexed:>8.1f}x")
+
+
+def _irregular_field(vertices, radius_m, rng):
+    """Irregular concave field: a few lobes plus small jitter along the edge"""
+    lat, lng = _random_point(rng)
+    meters_per_degree = 111320.0
+    phases = [rng.uniform(0, 2 * math.pi) for _ in range(3)]
+    points = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius_m * (1 + 0.25 * math.sin(3 * angle + phases[0]) + 0.1 * math.sin(7 * angle + phases[1])
+                        + 0.05 * math.sin(17 * angle + phases[2]) + rng.uniform(-0.01, 0.01))
+        points.append([lat + r * math.cos(angle) / meters_per_degree,
+                       lng + r * math.sin(angle) / (meters_per_degree * math.cos(math.radians(lat)))])
+    return Field(name='bench', coordinates=json.dumps(points), user_id=1)
+
+
+def bench_coverage(vertex_counts, radius, swath, repeats, seed):
+    """Coverage planning latency versus field outline complexity"""
+    rng = random.Random(seed)
+    print(f"{'vertices':>9} {'acres':>9} {'passes':>7} {'turns':>6} {'plan ms':>9} {'cached ms':>10}")
+    for count in vertex_counts:
+        field = _irregular_field(count, radius, rng)
+        outline = field.outline
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            plan = plan_coverage(outline, swath=swath)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        field_coverage(field, 'spraying', swath=swath)
+        cached = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            field_coverage(field, 'spraying', swath=swath)
+            cached.append((time.perf_counter() - start) * 1000)
+
+        print(f"{count:>9} {field.area:>9.1f} {plan['passes']:>7} {plan['turns']:>6} "
+              f"{statistics.median(timings):>9.2f} {statistics.median(cached):>10.3f}")
+
+
+def bench_route(stop_counts, spread, repeats, seed):
+    """Daily route planning latency and quality versus number of stops"""
+    rng = random.Random(seed)
+    print(f"{'stops':>6} {'greedy km':>10} {'planned km':>11} {'saved':>7} {'median ms':>10} {'max ms':>8} {'converged':>10}")
+    for count in stop_counts:
+        lat, lng = _random_point(rng)
+        stops = [(i, lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread))
+                 for i in range(count)]
+        origin = (lat, lng)
+
+        matrix = distance_matrix([origin] + [(s_lat, s_lng) for _, s_lat, s_lng in stops])
+        greedy = route_length(nearest_neighbour(matrix), matrix)
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            plan = plan_day(origin, stops, datetime(2026, 1, 1, 8))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        planned = plan['total_distance_km']
+        print(f"{count:>6} {greedy:>10.1f} {planned:>11.1f} {(1 - planned / greedy) * 100:>6.1f}% "
+              f"{statistics.median(timings):>10.2f} {max(timings):>8.2f} {str(plan['converged']):>10}")
+
+
+def bench_dispatch(request_counts, operators, capacity, days, seed):
+    """Batch dispatch candidate generation and assignment time versus backlog size"""
+    rng = random.Random(seed)
+    operator_rows = []
+    for i in range(operators):
+        lat, lng = _random_point(rng)
+        operator_rows.append((i, lat, lng, rng.choice([20.0, 30.0, 50.0, 80.0]), rng.choice([0.0, 40.0, 60.0])))
+
+    print(f"{'requests':>9} {'edges':>9} {'assigned':>9} {'candidates ms':>14} {'solve ms':>9}")
+    for count in request_counts:
+        requests = [(i,) + _random_point(rng) + (rng.randrange(days),) for i in range(count)]
+
+        start = time.perf_counter()
+        edges = candidate_edges(requests, operator_rows)
+        candidates_ms = (time.perf_counter() - start) * 1000
+
+        def slot_of(request_index, op_index):
+            return op_index, requests[request_index][3]
+
+        slots = {slot_of(i, op) for i, options in edges.items() for _, op, _ in options}
+        start = time.perf_counter()
+        solution = solve_assignment(edges, slot_of, dict.fromkeys(slots, capacity))
+        solve_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{count:>9} {sum(len(options) for options in edges.values()):>9} {len(solution):>9} "
+              f"{candidates_ms:>14.1f} {solve_ms:>9.1f}")
+
+
+def _feature_collection(count, vertices, rng):
+    features = []
+    for i in range(count):
+        field = _irregular_field(vertices, rng.uniform(100, 400), rng)
+        ring = [[lng, lat] for lat, lng in field.outline]
+        features.append({'type': 'Feature', 'properties': {'name': f'Field {i}', 'crop_type': 'Wheat'},
+                         'geometry': {'type': 'Polygon', 'coordinates': [ring + ring[:1]]}})
+    return features
+
+
+def _kml(features):
+    placemarks = []
+    for feature in features:
+        coordinates = ' '.join(f'{lng},{lat},0' for lng, lat in feature['geometry']['coordinates'][0])
+        placemarks.append(f"<Placemark><name>{feature['properties']['name']}</name><Polygon><outerBoundaryIs>"
+                          f"<LinearRing><coordinates>{coordinates}</coordinates></LinearRing>"
+                          f"</outerBoundaryIs></Polygon></Placemark>")
+    return ('<?xml version="1.0"?><kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+            + ''.join(placemarks) + '</Document></kml>').encode()
+
+
+def bench_import(counts, vertices, seed):
+    """Bulk field import throughput for GeoJSON and KML uploads"""
+    rng = random.Random(seed)
+    print(f"{'fields':>7} {'format':>8} {'MB':>6} {'seconds':>8} {'fields/s':>9}")
+    for count in counts:
+        features = _feature_collection(count, vertices, rng)
+        documents = {
+            'geojson': json.dumps({'type': 'FeatureCollection', 'features': features}).encode(),
+            'kml': _kml(features),
+        }
+        for fmt, document in documents.items():
+            _reset_database()
+            parse = iter_geojson_features if fmt == 'geojson' else iter_kml_placemarks
+            start = time.perf_counter()
+            report = import_fields(parse(io.BytesIO(document)), user_id=1)
+            elapsed = time.perf_counter() - start
+            assert report['imported'] == count, report['errors'][:3]
+            print(f"{count:>7} {fmt:>8} {len(document) / 1e6:>6.1f} {elapsed:>8.2f} {count / elapsed:>9.0f}")
+
+
+def _measure(fn):
+    """Run fn, returning (seconds, peak traced memory in MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def bench_export(counts, seed):
+    """Peak memory and time of the streaming export versus building the JSON list"""
+    rng = random.Random(seed)
+    statuses = ['pending', 'accepted', 'completed', 'cancelled']
+    names = EXPORTS['service-requests'][1]
+    print(f"{'rows':>8} {'list MB':>8} {'list s':>7} {'ndjson MB':>10} {'ndjson s':>9} {'csv+gzip MB':>12} {'csv+gzip s':>11}")
+    for count in counts:
+        _reset_database()
+        now = datetime.utcnow()
+        table = ServiceRequest.__table__
+        for start in range(0, count, 10000):
+            db.session.execute(table.insert(), [{
+                'field_id': 1, 'farmer_id': 1, 'service_type': 'spraying', 'status': rng.choice(statuses),
+                'scheduled_date': date(2030, 1, 1 + i % 28), 'notes': 'Spray the north block first',
+                'created_at': now, 'updated_at': now
+            } for i in range(start, min(count, start + 10000))])
+        db.session.commit()
+        query = ServiceRequest.query.order_by(ServiceRequest.created_at.desc(), ServiceRequest.id.desc())
+
+        def build_list():
+            json.dumps([sr.to_dict() for sr in query.all()])
+            db.session.expunge_all()
+
+        def stream(fmt, compress):
+            body = encode_rows(iter_rows(query, 'service-requests'), names, fmt)
+            for _ in gzip_chunks(body) if compress else body:
+                pass
+
+        listed = _measure(build_list)
+        ndjson = _measure(lambda: stream('ndjson', False))
+        compressed = _measure(lambda: stream('csv', True))
+        print(f"{count:>8} {listed[1]:>8.1f} {listed[0]:>7.2f} {ndjson[1]:>10.1f} {ndjson[0]:>9.2f} "
+              f"{compressed[1]:>12.1f} {compressed[0]:>11.2f}")
+
+
+def _raw_requests_report(start, end):
+    """Requests per day and status, scanning service_requests"""
+    day = db.func.date(ServiceRequest.created_at)
+    return db.session.query(day, ServiceRequest.status, db.func.count(ServiceRequest.id)).filter(
+        ServiceRequest.created_at >= start, ServiceRequest.created_at < end + timedelta(days=1)
+    ).group_by(day, ServiceRequest.status).all()
+
+
+def _raw_lead_time_report(start, end):
+    day = db.func.date(ServiceRequest.created_at)
+    seconds = (db.func.julianday(ServiceRequest.completed_at) - db.func.julianday(ServiceRequest.created_at)) * 86400
+    return db.session.query(day, db.func.count(ServiceRequest.id), db.func.avg(seconds)).filter(
+        ServiceRequest.status == 'completed',
+        ServiceRequest.created_at >= start, ServiceRequest.created_at < end + timedelta(days=1)
+    ).group_by(day).all()
+
+
+def bench_rollups(counts, days, repeats, seed):
+    """Time-series report latency from the rollup tables versus scanning service_requests"""
+    rng = random.Random(seed)
+    statuses = ['pending', 'accepted', 'completed', 'cancelled']
+    services = ['spraying', 'fertilizing', 'seeding', 'surveying']
+    end = date(2030, 12, 31)
+    start = end - timedelta(days=days - 1)
+    print(f"{'requests':>9} {'backfill s':>11} {'report':>12} {'raw ms':>8} {'rollup ms':>10}")
+    for count in counts:
+        _reset_database()
+        table = ServiceRequest.__table__
+        for first in range(0, count, 10000):
+            rows = []
+            for _ in range(first, min(count, first + 10000)):
+                created = datetime.combine(start, datetime.min.time()) + timedelta(seconds=rng.randrange(days * 86400))
+                status = rng.choice(statuses)
+                rows.append({
+                    'field_id': 1, 'farmer_id': 1, 'service_type': rng.choice(services), 'status': status,
+                    'operator_id': rng.randrange(1, 200) if status in ('accepted', 'completed') else None,
+                    'scheduled_date': (created + timedelta(days=rng.randrange(14))).date(),
+                    'created_at': created, 'updated_at': created,
+                    'completed_at': created + timedelta(hours=rng.uniform(2, 240)) if status == 'completed' else None
+                })
+            db.session.execute(table.insert(), rows)
+        db.session.commit()
+
+        began = time.perf_counter()
+        backfill()
+        backfill_s = time.perf_counter() - began
+
+        reports = [
+            ('requests', lambda: _raw_requests_report(start, end),
+             lambda: timeseries('requests', start, end, group_by='status')),
+            ('lead_time', lambda: _raw_lead_time_report(start, end),
+             lambda: timeseries('lead_time', start, end, interval='week')),
+        ]
+        for name, raw, rollup in reports:
+            raw_ms = min(_timed(raw) for _ in range(repeats))
+            rollup_ms = min(_timed(rollup) for _ in range(repeats))
+            print(f"{count:>9} {backfill_s:>11.2f} {name:>12} {raw_ms:>8.1f} {rollup_ms:>10.1f}")
+
+
+def bench_serialize(counts, repeats, seed):
+    """List response time with to_dict() and jsonify versus projected rows and the fast encoder"""
+    rng = random.Random(seed)
+    statuses = ['pending', 'accepted', 'completed', 'cancelled']
+    print(f"{'rows':>8} {'model':>15} {'to_dict ms':>11} {'projected ms':>13} {'speedup':>8}")
+    for count in counts:
+        _reset_database()
+        _insert_operators(count, rng)
+        now = datetime.utcnow()
+        table = ServiceRequest.__table__
+        for start in range(0, count, 10000):
+            db.session.execute(table.insert(), [{
+                'field_id': 1, 'farmer_id': 1, 'operator_id': i + 1, 'service_type': 'spraying',
+                'status': rng.choice(statuses), 'scheduled_date': date(2030, 1, 1 + i % 28),
+                'notes': 'Spray the north block first', 'created_at': now, 'updated_at': now,
+                'completed_at': now
+            } for i in range(start, min(count, start + 10000))])
+        db.session.commit()
+
+        for model, key in ((ServiceRequest, 'service_requests'), (User, 'users')):
+            query = model.query.order_by(model.created_at.desc(), model.id.desc())
+
+            def orm():
+                jsonify({key: [row.to_dict() for row in query.all()]}).get_data()
+                db.session.expunge_all()
+
+            def projected():
+                json_response({key: serialize(project(query, model).all(), model)}).get_data()
+
+            orm_ms = min(_timed(orm) for _ in range(repeats))
+            fast_ms = min(_timed(projected) for _ in range(repeats))
+            print(f"{count:>8} {model.__name__:>15} {orm_ms:>11.1f} {fast_ms:>13.1f} {orm_ms / fast_ms:>7.1f}x")
+
+
+def _timed(fn):
+    began = time.perf_counter()
+    fn()
+    return (time.perf_counter() - began) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AgriDrone backend benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    nearby = subparsers.add_parser('nearby', help=bench_nearby.__doc__)
+    nearby.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 50000])
+    nearby.add_argument('--queries', type=int, default=20)
+    nearby.add_argument('--radius', type=float, default=50.0)
+    nearby.add_argument('--seed', type=int, default=42)
+
+    coverage = subparsers.add_parser('coverage', help=bench_coverage.__doc__)
+    coverage.add_argument('--vertices', type=int, nargs='+', default=[100, 1000, 5000, 20000])
+    coverage.add_argument('--radius', type=float, default=600.0, help='field radius in meters')
+    coverage.add_argument('--swath', type=float, default=5.0)
+    coverage.add_argument('--repeats', type=int, default=10)
+    coverage.add_argument('--seed', type=int, default=42)
+
+    route = subparsers.add_parser('route', help=bench_route.__doc__)
+    route.add_argument('--stops', type=int, nargs='+', default=[10, 50, 100, 200])
+    route.add_argument('--spread', type=float, default=0.5, help='stop scatter in degrees')
+    route.add_argument('--repeats', type=int, default=10)
+    route.add_argument('--seed', type=int, default=42)
+
+    dispatch = subparsers.add_parser('dispatch', help=bench_dispatch.__doc__)
+    dispatch.add_argument('--requests', type=int, nargs='+', default=[1000, 10000, 50000])
+    dispatch.add_argument('--operators', type=int, default=2000)
+    dispatch.add_argument('--capacity', type=int, default=8, help='jobs per operator per day')
+    dispatch.add_argument('--days', type=int, default=7)
+    dispatch.add_argument('--seed', type=int, default=42)
+
+    imports = subparsers.add_parser('import', help=bench_import.__doc__)
+    imports.add_argument('--counts', type=int, nargs='+', default=[1000, 10000])
+    imports.add_argument('--vertices', type=int, default=40, help='vertices per field outline')
+    imports.add_argument('--seed', type=int, default=42)
+
+    exports = subparsers.add_parser('export', help=bench_export.__doc__)
+    exports.add_argument('--counts', type=int, nargs='+', default=[10000, 100000])
+    exports.add_argument('--seed', type=int, default=42)
+
+    rollups = subparsers.add_parser('rollups', help=bench_rollups.__doc__)
+    rollups.add_argument('--counts', type=int, nargs='+', default=[100000, 500000])
+    rollups.add_argument('--days', type=int, default=365, help='days the requests are spread over')
+    rollups.add_argument('--repeats', type=int, default=5)
+    rollups.add_argument('--seed', type=int, default=42)
+
+    serialization = subparsers.add_parser('serialize', help=bench_serialize.__doc__)
+    serialization.add_argument('--counts', type=int, nargs='+', default=[1000, 10000])
+    serialization.add_argument('--repeats', type=int, default=5)
+    serialization.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.benchmark == 'nearby':
+            bench_nearby(args.counts, args.queries, args.radius, args.seed)
+        elif args.benchmark == 'coverage':
+            bench_coverage(args.vertices, args.radius, args.swath, args.repeats, args.seed)
+        elif args.benchmark == 'route':
+            bench_route(args.stops, args.spread, args.repeats, args.seed)
+        elif args.benchmark == 'dispatch':
+            bench_dispatch(args.requests, args.operators, args.capacity, args.days, args.seed)
+        elif args.benchmark == 'import':
+            bench_import(args.counts, args.vertices, args.seed)
+        elif args.benchmark == 'export':
+            bench_export(args.counts, args.seed)
+        elif args.benchmark == 'rollups':
+            bench_rollups(args.counts, args.days, args.repeats, args.seed)
+        elif args.benchmark == 'serialize':
+            bench_serialize(args.counts, args.repeats, args.seed)
+
+
+if __name__ == '__main__':
+    main()
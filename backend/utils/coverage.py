@@ -0,0 +1,206 @@
+import math
+import hashlib
+from .cache import TTLCache
+from .geometry import decode_vertices, ring
+from .spray import SERVICE_TYPE_ALIASES
+
+# Boustrophedon (lawnmower) coverage planning for field outlines.
+#
+# The outline is projected to a local metric plane and rotated so that passes
+# run along the requested heading. Parallel sweep lines one swath apart are
+# then intersected with the polygon edges and flown back and forth. The path
+# lists each sprayed segment as a pair of waypoints; between pairs the drone
+# flies with spraying off.
+
+METERS_PER_DEGREE = math.pi / 180 * 6371008.8
+
+DEFAULT_SWATH_M = 5.0
+DEFAULT_SPEED_MS = 5.0
+DEFAULT_TURN_SECONDS = 8.0
+MAX_PASSES = 2000  # Keeps a tiny swath on a large field from stalling the request
+
+# Liters per hectare; services that apply nothing have no volume
+APPLICATION_RATES = {
+    'spraying': 10.0,
+    'fertilizing': 20.0,
+}
+
+# Plans only depend on the outline and the parameters, so they never go stale
+_plans = TTLCache(maxsize=256, ttl=24 * 60 * 60)
+
+
+def application_rate(service_type):
+    service_type = SERVICE_TYPE_ALIASES.get(service_type, service_type)
+    return APPLICATION_RATES.get(service_type, 0.0)
+
+
+def geometry_hash(vertices):
+    """Stable digest of a packed outline (Field.vertices)"""
+    return hashlib.blake2b(vertices, digest_size=16).hexdigest()
+
+
+def _project(points):
+    """Project (lat, lng) points onto a local plane in meters around their center"""
+    lat0 = (min(point[0] for point in points) + max(point[0] for point in points)) / 2
+    lng0 = (min(point[1] for point in points) + max(point[1] for point in points)) / 2
+    scale = math.cos(math.radians(lat0)) * METERS_PER_DEGREE
+    projected = [((lng - lng0) * scale, (lat - lat0) * METERS_PER_DEGREE) for lat, lng in points]
+
+    def unproject(x, y):
+        return lat0 + y / METERS_PER_DEGREE, lng0 + x / scale
+
+    return projected, unproject
+
+
+def longest_edge_heading(projected):
+    """Heading (degrees clockwise from north, 0-180) of the longest outline edge.
+
+    Flying parallel to the longest edge is a cheap heuristic for few turns.
+    """
+    best = 0.0
+    heading = 0.0
+    count = len(projected)
+    for i in range(count):
+        x1, y1 = projected[i]
+        x2, y2 = projected[(i + 1) % count]
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length > best:
+            best = length
+            heading = math.degrees(math.atan2(x2 - x1, y2 - y1)) % 180.0
+    return heading
+
+
+def sweep_segments(rotated, swath):
+    """Clip sweep lines ``u = const`` against the polygon.
+
+    Returns ``(lines, u_values)`` where lines[k] is the sorted list of
+    ``(v_start, v_end)`` inside segments on line k. Work is driven by the
+    edges: each edge only computes crossings for the lines it spans, so
+    the cost is O(edges + crossings) instead of O(edges * lines).
+    """
+    u_min = min(u for u, _ in rotated)
+    u_max = max(u for u, _ in rotated)
+    width = u_max - u_min
+    # Rounding keeps projection noise from adding a pass to an exact fit
+    count = max(1, math.ceil(round(width / swath, 6)))
+    if count > MAX_PASSES:
+        raise ValueError(f'Swath width is too small for this field (over {MAX_PASSES} passes)')
+
+    # Center the passes so the margins at both sides are equal
+    base = u_min + (width - (count - 1) * swath) / 2
+    crossings = [[] for _ in range(count)]
+
+    size = len(rotated)
+    for i in range(size):
+        u1, v1 = rotated[i]
+        u2, v2 = rotated[(i + 1) % size]
+        if u1 == u2:
+            continue
+        lo, hi = (u1, u2) if u1 < u2 else (u2, u1)
+        # Half-open [lo, hi) so a line through a vertex is counted once
+        first = max(0, math.ceil((lo - base) / swath))
+        last = min(count - 1, math.ceil((hi - base) / swath) - 1)
+        slope = (v2 - v1) / (u2 - u1)
+        for k in range(first, last + 1):
+            u = base + k * swath
+            if lo <= u < hi:
+                crossings[k].append(v1 + (u - u1) * slope)
+
+    lines = []
+    for values in crossings:
+        values.sort()
+        # Even-odd rule: consecutive crossings bound the inside segments
+        lines.append([(values[j], values[j + 1]) for j in range(0, len(values) - 1, 2)
+                      if values[j + 1] > values[j]])
+    return lines, [base + k * swath for k in range(count)]
+
+
+def plan_coverage(points, swath=DEFAULT_SWATH_M, heading=None, speed=DEFAULT_SPEED_MS,
+                  turn_seconds=DEFAULT_TURN_SECONDS, rate=0.0):
+    """Plan a back-and-forth coverage path over a polygon of (lat, lng) points.
+
+    ``heading`` is the pass direction in degrees clockwise from north and
+    defaults to the longest edge. ``rate`` is the application rate in
+    liters per hectare. Raises ValueError for invalid parameters.
+    """
+    points = ring(points)
+    if len(points) < 3:
+        raise ValueError('Coverage planning needs a polygon outline')
+    if not 0 < swath < math.inf:
+        raise ValueError('swath must be a positive number of meters')
+    if not 0 < speed < math.inf:
+        raise ValueError('speed must be a positive number of meters per second')
+    if heading is not None and not math.isfinite(heading):
+        raise ValueError('heading must be a number of degrees')
+
+    projected, unproject = _project(points)
+    if heading is None:
+        heading = longest_edge_heading(projected)
+    theta = math.radians(heading)
+    cos_t = math.cos(theta)
+    sin_t = math.sin(theta)
+    # u runs across the passes, v along them
+    rotated = [(x * cos_t - y * sin_t, x * sin_t + y * cos_t) for x, y in projected]
+
+    lines, u_values = sweep_segments(rotated, swath)
+
+    path = []
+    spray_m = 0.0
+    transit_m = 0.0
+    turns = 0
+    previous = None
+    direction = 1
+    for u, line in zip(u_values, lines):
+        if not line:
+            continue
+        ordered = line if direction > 0 else [(end, start) for start, end in reversed(line)]
+        for start, end in ordered:
+            if previous is not None:
+                gap = math.hypot(u - previous[0], start - previous[1])
+                transit_m += gap
+                # A notch narrower than a swath is crossed straight, with
+                # spraying off, rather than flown around as a turn
+                if u != previous[0] or gap >= swath:
+                    turns += 1
+            spray_m += abs(end - start)
+            path.append((u, start))
+            path.append((u, end))
+            previous = (u, end)
+        direction = -direction
+
+    covered_ha = spray_m * swath / 10000.0
+    waypoints = []
+    for u, v in path:
+        lat, lng = unproject(u * cos_t + v * sin_t, -u * sin_t + v * cos_t)
+        waypoints.append([round(lat, 7), round(lng, 7)])
+
+    return {
+        'heading': round(heading % 360.0, 2),
+        'swath_width': swath,
+        'passes': sum(1 for line in lines if line),
+        'turns': turns,
+        'spray_distance_m': round(spray_m, 1),
+        'transit_distance_m': round(transit_m, 1),
+        'flight_time_s': round((spray_m + transit_m) / speed + turns * turn_seconds, 1),
+        'covered_area_ha': round(covered_ha, 4),
+        'spray_volume_l': round(covered_ha * rate, 2),
+        'path': waypoints,
+    }
+
+
+def field_coverage(field, service_type=None, swath=None, heading=None, speed=None):
+    """Cached coverage plan for a Field, or None for single-point fields"""
+    if field.vertices is None:
+        return None
+
+    swath = DEFAULT_SWATH_M if swath is None else swath
+    speed = DEFAULT_SPEED_MS if speed is None else speed
+    rate = application_rate(service_type)
+    key = (geometry_hash(field.vertices), swath, heading, speed, rate)
+
+    plan = _plans.get(key)
+    if plan is None:
+        plan = plan_coverage(decode_vertices(field.vertices), swath=swath, heading=heading,
+                             speed=speed, rate=rate)
+        _plans.set(key, plan)
+    return plan
@@ -1,5 +1,6 @@
 from ..app import db
 from ..models.user import User
+from ..models.field import Field
 
 def init_db():
     """Initialize the database with some sample data"""
@@ -95,6 +96,18 @@ def init_db():
             )
             db.session.add(new_operator)
     
+    # Fill in geohashes for rows created before the column existed
+    for user in User.query.filter(User.geohash.is_(None), User.latitude.isnot(None),
+                                  User.longitude.isnot(None)).all():
+        user.update_geohash()
+    
+    # Same for field geometry (centroid, bounding box, packed outline, area)
+    for field in Field.query.filter(Field.min_lat.is_(None)).all():
+        try:
+            field.update_geometry()
+        except ValueError as e:
+            print(f"Skipping field {field.id} ({field.name}): {str(e)}")
+    
     # Commit changes
     db.session.commit()
     
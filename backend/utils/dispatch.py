@@ -0,0 +1,303 @@
+import time
+import heapq
+import math
+import argparse
+from collections import deque, defaultdict
+from datetime import date, datetime
+from ..app import app, db
+from ..models.user import User
+from ..models.field import Field
+from ..models.service_request import ServiceRequest
+from .geo import distances_km, bounding_box, longitude_ranges
+from .events import publish_request_event
+from .availability import free_places, lock_operators
+from .batch import MAX_ATTEMPTS
+from .rollups import record_transitions
+
+# Batch dispatcher: assigns pending, unassigned service requests to available
+# operators in one pass.
+#
+# Candidates are generated sparsely: requests are bucketed on a lat/lng grid
+# and every operator only looks at the cells its service radius overlaps.
+# Each request keeps its cheapest MAX_CANDIDATES operators, and a capacitated
+# auction then picks the assignment with (near) minimum total cost, within
+# the free places each operator's availability calendar has on each day.
+
+GRID_DEGREES = 0.25
+MAX_CANDIDATES = 20
+COST_PER_KM = 1.0  # Travel there and back
+SERVICE_HOURS = 1.0  # Billable hours assumed per job when weighing hourly_rate
+RADIUS_PENALTY = 10.0  # Added at the edge of an operator's radius, scaled by distance / radius
+EPSILON = 0.5  # Auction bid increment; the result is within EPSILON per request of optimal
+COMMIT_CHUNK = 500
+
+
+def job_cost(distance_km, service_radius, hourly_rate):
+    return (2 * COST_PER_KM * distance_km + SERVICE_HOURS * (hourly_rate or 0.0)
+            + RADIUS_PENALTY * distance_km / service_radius)
+
+
+def candidate_edges(requests, operators, max_candidates=MAX_CANDIDATES):
+    """Operators able to serve each request, cheapest first.
+
+    ``requests`` are ``(request_id, lat, lng, scheduled_date)`` and
+    ``operators`` ``(operator_id, lat, lng, service_radius, hourly_rate)``.
+    Returns ``{request index: [(cost, operator index, distance_km), ...]}``.
+    """
+    grid = defaultdict(list)
+    for index, (_, lat, lng, _) in enumerate(requests):
+        grid[(math.floor(lat / GRID_DEGREES), math.floor(lng / GRID_DEGREES))].append(index)
+
+    edges = defaultdict(list)
+    for op_index, (_, lat, lng, radius, rate) in enumerate(operators):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+        nearby = []
+        for row in range(math.floor(min_lat / GRID_DEGREES), math.floor(max_lat / GRID_DEGREES) + 1):
+            for low, high in longitude_ranges(min_lng, max_lng):
+                for col in range(math.floor(low / GRID_DEGREES), math.floor(high / GRID_DEGREES) + 1):
+                    nearby.extend(grid.get((row, col), ()))
+        if not nearby:
+            continue
+
+        distances = distances_km(lat, lng, [requests[i][1] for i in nearby], [requests[i][2] for i in nearby])
+        for index, distance in zip(nearby, distances):
+            if distance <= radius:
+                edges[index].append((job_cost(distance, radius, rate), op_index, distance))
+
+    for index, options in edges.items():
+        if len(options) > max_candidates:
+            edges[index] = heapq.nsmallest(max_candidates, options)
+        else:
+            options.sort()
+    return edges
+
+
+def solve_assignment(edges, slot_of, capacity, epsilon=EPSILON, unassigned_cost=None):
+    """Capacitated min-cost assignment by auction.
+
+    ``edges`` maps a request to its ``(cost, operator, distance)`` options,
+    ``slot_of(request, operator)`` names the capacity bucket the job would
+    use (operator and day) and ``capacity`` maps buckets to free places.
+    Each request left unassigned adds ``unassigned_cost`` to the total being
+    minimized. Returns ``{request: (operator, cost, distance)}``.
+    """
+    if not edges:
+        return {}
+
+    # By default any single option beats leaving a request out. A much
+    # larger penalty would force maximum cardinality, but lets bidding wars
+    # drag on for far longer in heavily contested areas.
+    if unassigned_cost is None:
+        unassigned_cost = max(option[0] for options in edges.values() for option in options) + 1.0
+
+    holders = defaultdict(list)  # slot -> min-heap of (bid, request)
+    prices = defaultdict(float)
+    choice = {}
+    queue = deque(edges)
+
+    while queue:
+        request_index = queue.popleft()
+        best = None
+        best_value = -unassigned_cost
+        second_value = -unassigned_cost
+        for option in edges[request_index]:
+            slot = slot_of(request_index, option[1])
+            if capacity.get(slot, 0) <= 0:
+                continue
+            value = -option[0] - prices[slot]
+            if value > best_value:
+                second_value = best_value
+                best_value = value
+                best = (slot, option)
+            elif value > second_value:
+                second_value = value
+
+        if best is None:
+            continue
+
+        slot, option = best
+        bid = prices[slot] + best_value - second_value + epsilon
+        heap = holders[slot]
+        heapq.heappush(heap, (bid, request_index))
+        choice[request_index] = option
+
+        if len(heap) > capacity[slot]:
+            _, evicted = heapq.heappop(heap)
+            choice.pop(evicted, None)
+            queue.append(evicted)
+        if len(heap) >= capacity[slot]:
+            prices[slot] = heap[0][0]
+
+    return {index: (option[1], option[0], option[2]) for index, option in choice.items()}
+
+
+def _load(today):
+    requests = db.session.query(
+        ServiceRequest.id, Field.centroid_lat, Field.centroid_lng, ServiceRequest.scheduled_date
+    ).join(Field, ServiceRequest.field_id == Field.id).filter(
+        ServiceRequest.status == 'pending',
+        ServiceRequest.operator_id.is_(None),
+        ServiceRequest.scheduled_date >= today,
+        Field.centroid_lat.isnot(None)
+    ).all()
+
+    operators = db.session.query(
+        User.id, User.latitude, User.longitude, User.service_radius, User.hourly_rate
+    ).filter(
+        User.role == 'operator',
+        User.is_available == True,
+        User.latitude.isnot(None),
+        User.longitude.isnot(None),
+        User.service_radius > 0
+    ).all()
+
+    return requests, operators
+
+
+def _commit(assignments, dates):
+    """Apply assignments in one transaction; returns the request ids that were assigned.
+
+    ``dates`` maps request ids to their scheduled dates. The update is
+    conditional, like accept_request, so a request an operator accepted
+    manually while the dispatcher was solving is left alone. Operators are
+    locked and their free places counted again before writing, as in the
+    batch endpoints, since bookings made during the solve use them up; the
+    assignments that no longer fit are dropped.
+
+    Raises RuntimeError if availability kept changing underneath the commit.
+    """
+    table = ServiceRequest.__table__
+    statement = table.update().where(
+        table.c.id == db.bindparam('request_id'),
+        table.c.status == 'pending',
+        table.c.operator_id.is_(None)
+    ).values(operator_id=db.bindparam('new_operator_id'), status='accepted', updated_at=datetime.utcnow())
+
+    for attempt in range(MAX_ATTEMPTS):
+        # A rollback releases the locks, so each attempt takes them again
+        lock_operators(assignments.values())
+        places = free_places((operator_id, dates[request_id]) for request_id, operator_id in assignments.items())
+        rows = []
+        for request_id, operator_id in assignments.items():
+            pair = (operator_id, dates[request_id])
+            if places[pair] > 0:
+                places[pair] -= 1
+                rows.append({'request_id': request_id, 'new_operator_id': operator_id})
+
+        try:
+            for start in range(0, len(rows), COMMIT_CHUNK):
+                db.session.execute(statement, rows[start:start + COMMIT_CHUNK])
+
+            assigned = []
+            ids = [row['request_id'] for row in rows]
+            for start in range(0, len(ids), COMMIT_CHUNK):
+                assigned.extend(request_id for request_id, operator_id in db.session.query(
+                    ServiceRequest.id, ServiceRequest.operator_id
+                ).filter(ServiceRequest.id.in_(ids[start:start + COMMIT_CHUNK])).all()
+                    if operator_id == assignments[request_id])
+            # Checked after writing, like the batch endpoints
+            used = {(assignments[request_id], dates[request_id]) for request_id in assigned}
+            if any(free < 0 for free in free_places(used).values()):
+                db.session.rollback()
+                continue
+            record_transitions(assigned, 'pending')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return assigned
+    raise RuntimeError('Availability changed while dispatching; please retry')
+
+
+def run_dispatch(dry_run=False, today=None):
+    """Assign pending requests to operators and return a report.
+
+    With ``dry_run`` the proposed assignments are reported but not saved.
+    """
+    timings = {}
+    started = time.perf_counter()
+    today = today or date.today()
+
+    requests, operators = _load(today)
+    timings['load_ms'] = (time.perf_counter() - started) * 1000
+
+    mark = time.perf_counter()
+    edges = candidate_edges(requests, operators)
+    timings['candidates_ms'] = (time.perf_counter() - mark) * 1000
+
+    mark = time.perf_counter()
+    pairs = ((operators[op_index][0], requests[index][3])
+             for index, options in edges.items() for _, op_index, _ in options)
+    capacity = {pair: max(0, free) for pair, free in free_places(pairs).items()}
+    timings['capacity_ms'] = (time.perf_counter() - mark) * 1000
+
+    def slot_of(request_index, op_index):
+        return operators[op_index][0], requests[request_index][3]
+
+    mark = time.perf_counter()
+    solution = solve_assignment(edges, slot_of, capacity)
+    timings['solve_ms'] = (time.perf_counter() - mark) * 1000
+
+    proposed = {requests[index][0]: operators[op_index][0] for index, (op_index, _, _) in solution.items()}
+    assigned = []
+    mark = time.perf_counter()
+    if not dry_run and proposed:
+        assigned = _commit(proposed, {request_id: day for request_id, _, _, day in requests})
+        for start in range(0, len(assigned), COMMIT_CHUNK):
+            for service_request in ServiceRequest.query.filter(
+                    ServiceRequest.id.in_(assigned[start:start + COMMIT_CHUNK])).all():
+                publish_request_event('accepted', service_request)
+    timings['commit_ms'] = (time.perf_counter() - mark) * 1000
+    timings['total_ms'] = (time.perf_counter() - started) * 1000
+
+    return {
+        'dry_run': dry_run,
+        'pending_requests': len(requests),
+        'available_operators': len(operators),
+        'candidate_edges': sum(len(options) for options in edges.values()),
+        'unreachable': len(requests) - len(edges),
+        'proposed': len(proposed),
+        'assigned': len(assigned),
+        'total_cost': round(sum(cost for _, cost, _ in solution.values()), 2),
+        'total_distance_km': round(sum(distance for _, _, distance in solution.values()), 2),
+        'assignments': [
+            {'service_request_id': requests[index][0], 'operator_id': operators[op_index][0],
+             'distance_km': round(distance, 2), 'cost': round(cost, 2)}
+            for index, (op_index, cost, distance) in solution.items()
+        ] if dry_run else None,
+        'timings_ms': {name: round(value, 2) for name, value in timings.items()},
+    }
+
+
+def main():
+    """Run from cron, or with --interval as a long-lived worker:
+    python -m backend.utils.dispatch [--dry-run] [--interval SECONDS]
+    """
+    parser = argparse.ArgumentParser(description='Assign pending service requests to operators')
+    parser.add_argument('--dry-run', action='store_true', help='report assignments without saving them')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='keep running, dispatching every INTERVAL seconds')
+    args = parser.parse_args()
+
+    with app.app_context():
+        while True:
+            try:
+                report = run_dispatch(dry_run=args.dry_run)
+            except RuntimeError as e:
+                if args.interval <= 0:
+                    raise
+                print(e)
+                db.session.remove()
+                time.sleep(args.interval)
+                continue
+            print(f"{report['proposed']} of {report['pending_requests']} pending requests matched "
+                  f"({report['assigned']} assigned) across {report['available_operators']} operators "
+                  f"in {report['timings_ms']['total_ms']:.0f} ms {report['timings_ms']}")
+            if args.interval <= 0:
+                break
+            db.session.remove()
+            time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
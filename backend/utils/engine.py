@@ -0,0 +1,144 @@
+import time
+import threading
+from collections import deque
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Database engine configuration.
+#
+# SQLite runs in WAL mode so readers don't block the writer (and the other way
+# round), with synchronous=NORMAL (safe in WAL mode), a busy timeout so a
+# second writer waits instead of failing with "database is locked", and a
+# memory-mapped read path. The pragmas are set on every new connection.
+#
+# Server databases (PostgreSQL, MySQL) get a sized pool with pre-ping, so
+# connections dropped by the server or a proxy are replaced before use, and
+# recycling, so none outlives the server's idle timeout.
+#
+# Queue pools time every checkout; pool_stats() reports the waits, timeouts
+# and current pool usage.
+
+
+class PoolStats:
+    """Checkout wait times and timeouts of one connection pool"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self._waits.append(seconds * 1000)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def report(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, total_wait = self.checkouts, self.timeouts, self.total_wait
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else None
+
+        return {
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'wait_ms': {
+                'mean': round(total_wait * 1000 / checkouts, 3) if checkouts else None,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(waits[-1], 3) if waits else None
+            }
+        }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited.
+
+    Use timed_queue_pool() to get a subclass with its own PoolStats;
+    recreate() (engine.dispose()) builds the same class, so the stats carry over.
+    """
+
+    stats = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def timed_queue_pool():
+    return type('TimedQueuePool', (TimedQueuePool,), {'stats': PoolStats()})
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        # In-memory databases keep Flask-SQLAlchemy's single shared connection
+        return {} if _is_memory_sqlite(url) else {'poolclass': timed_queue_pool()}
+    return {
+        'poolclass': timed_queue_pool(),
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+
+def configure_engine(engine, config):
+    """Install the per-connection SQLite pragmas on an engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        'PRAGMA synchronous = NORMAL',
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}"
+    ]
+    if not _is_memory_sqlite(engine.url):
+        # WAL is stored in the database file; in-memory databases can't use it
+        pragmas.insert(0, 'PRAGMA journal_mode = WAL')
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def pool_stats(engine):
+    """Current pool usage and checkout wait statistics of an engine"""
+    pool = engine.pool
+    report = {'dialect': engine.dialect.name, 'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        report.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            # QueuePool counts overflow up from -pool_size
+            'overflow': max(pool.overflow(), 0)
+        })
+    if isinstance(pool, TimedQueuePool):
+        report.update(pool.stats.report())
+    return report
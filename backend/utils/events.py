@@ -0,0 +1,185 @@
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from ..models.event import ServiceRequestEvent
+
+# Publish/subscribe for service request status changes, consumed by the
+# /api/events server-sent events stream. Handlers publish after they commit.
+
+EVENT_TYPES = ('created', 'accepted', 'completed', 'cancelled')
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, queue_size):
+        self._broker = broker
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def get(self, timeout=None):
+        """Return the next event, or None if nothing arrived within ``timeout``"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client must not block publishers; it will miss events
+            pass
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """Fans events out to subscribers in the current process only"""
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        self.dispatch(dict(event, id=next(self._ids)))
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class DatabaseBroker(MemoryBroker):
+    """Shares events between worker processes through the events table.
+
+    Publishing inserts a row; one background thread per process polls for
+    new rows and dispatches them to that process's subscribers.
+    """
+
+    def __init__(self, engine, poll_interval=1.0, retention=timedelta(hours=1), queue_size=256):
+        super().__init__(queue_size)
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._table = ServiceRequestEvent.__table__
+        self._poller = None
+        self._stopped = threading.Event()
+
+    def publish(self, event):
+        with self.engine.begin() as connection:
+            connection.execute(self._table.insert().values(
+                type=event['type'],
+                payload=json.dumps(event),
+                created_at=datetime.utcnow()
+            ))
+
+    def subscribe(self):
+        with self._lock:
+            if self._poller is None:
+                # Start after the newest row before returning, so nothing
+                # published after subscribe() is missed
+                table = self._table
+                with self.engine.connect() as connection:
+                    last_id = connection.execute(
+                        table.select().with_only_columns(table.c.id).order_by(table.c.id.desc()).limit(1)
+                    ).scalar() or 0
+                self._poller = threading.Thread(target=self._poll, args=(last_id,), name='event-poller', daemon=True)
+                self._poller.start()
+        return super().subscribe()
+
+    def stop(self):
+        """Stop the poller thread, if it was started"""
+        self._stopped.set()
+        if self._poller is not None:
+            self._poller.join()
+
+    def _poll(self, last_id):
+        table = self._table
+        last_cleanup = time.monotonic()
+        while not self._stopped.is_set():
+            rows = []
+            try:
+                with self.engine.connect() as connection:
+                    rows = connection.execute(
+                        table.select().where(table.c.id > last_id).order_by(table.c.id).limit(500)
+                    ).all()
+                for row in rows:
+                    last_id = row.id
+                    self.dispatch(dict(json.loads(row.payload), id=row.id))
+
+                if time.monotonic() - last_cleanup > 60:
+                    with self.engine.begin() as connection:
+                        connection.execute(table.delete().where(
+                            table.c.created_at < datetime.utcnow() - self.retention))
+                    last_cleanup = time.monotonic()
+            except Exception:
+                # The poller has no app context; keep polling after a failure
+                logger.exception('Event poller error')
+
+            if not rows:
+                self._stopped.wait(self.poll_interval)
+
+
+def get_broker():
+    """Return this process's broker, creating it from EVENTS_BACKEND on first use"""
+    broker = current_app.extensions.get('events')
+    if broker is None:
+        backend = current_app.config.get('EVENTS_BACKEND', 'memory')
+        if backend == 'database':
+            from ..app import db
+            broker = DatabaseBroker(db.engine, poll_interval=current_app.config.get('EVENTS_POLL_INTERVAL', 1.0))
+        elif backend == 'memory':
+            broker = MemoryBroker()
+        else:
+            raise ValueError(f'Unknown EVENTS_BACKEND: {backend}')
+        broker = current_app.extensions.setdefault('events', broker)
+    return broker
+
+
+def publish_request_event(event_type, service_request):
+    """Announce a committed change to a service request"""
+    try:
+        get_broker().publish({
+            'type': event_type,
+            'service_request': service_request.to_dict()
+        })
+    except Exception as e:
+        # The change is already committed; a lost notification only delays clients
+        current_app.logger.exception(f"Failed to publish {event_type} event: {str(e)}")
+
+
+def can_see(principal, event):
+    """Whether a user may receive an event about a service request"""
+    service_request = event['service_request']
+    if principal.role == 'admin':
+        return True
+    if principal.role == 'farmer':
+        return service_request['farmer_id'] == principal.id
+    if principal.role == 'operator':
+        if service_request['operator_id'] == principal.id:
+            return True
+        # An accepted request leaves every operator's available feed
+        if event['type'] == 'accepted':
+            return True
+        # Unassigned requests appearing on or leaving the available feed
+        return service_request['operator_id'] is None and event['type'] in ('created', 'cancelled')
+    return False
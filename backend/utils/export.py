@@ -0,0 +1,93 @@
+import io
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from ..app import db
+from ..models.user import User
+from ..models.field import Field
+from ..models.service_request import ServiceRequest
+
+# Streaming exports for admin reporting.
+#
+# Rows are read with yield_per, so the driver hands them over in batches from
+# an open cursor, serialized and (optionally) gzipped chunk by chunk. Memory
+# use depends on EXPORT_BATCH and FLUSH_BYTES, not on the size of the table.
+
+EXPORT_BATCH = 1000
+FLUSH_BYTES = 64 * 1024
+GZIP_LEVEL = 6
+FORMATS = ('ndjson', 'csv')
+
+# Exported columns per kind, the flat equivalent of each model's to_dict.
+# Only plain columns are selected; password hashes and packed outlines never are.
+EXPORTS = {
+    'service-requests': (ServiceRequest, (
+        'id', 'field_id', 'farmer_id', 'operator_id', 'service_type', 'status',
+        'scheduled_date', 'notes', 'created_at', 'completed_at'
+    )),
+    'users': (User, (
+        'id', 'email', 'first_name', 'last_name', 'phone', 'role', 'is_premium', 'latitude',
+        'longitude', 'is_available', 'service_radius', 'hourly_rate', 'service_details', 'created_at'
+    )),
+    'fields': (Field, (
+        'id', 'name', 'description', 'area', 'coordinates', 'crop_type', 'centroid_lat',
+        'centroid_lng', 'min_lat', 'min_lng', 'max_lat', 'max_lng', 'user_id', 'created_at'
+    )),
+}
+
+# As in User.to_dict, operator settings are only reported for operators
+_OPERATOR_ONLY = ('is_available', 'service_radius', 'hourly_rate', 'service_details')
+
+
+def _value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(query, kind):
+    """Yield export rows as tuples in the order of the kind's columns"""
+    model, names = EXPORTS[kind]
+    statement = query.with_entities(*[getattr(model, name) for name in names]).statement
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH))
+    operator_only = [names.index(name) for name in _OPERATOR_ONLY] if model is User else []
+    role = names.index('role') if model is User else None
+    for row in result:
+        row = [_value(value) for value in row]
+        if operator_only and row[role] != 'operator':
+            for index in operator_only:
+                row[index] = None
+        yield row
+
+
+def encode_rows(rows, names, fmt):
+    """Serialize rows to NDJSON or CSV, yielding bytes in FLUSH_BYTES chunks"""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(names, row)), separators=(',', ':')))
+            buffer.write('\n')
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """Compress a byte stream into a single gzip member as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
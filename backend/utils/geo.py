@@ -0,0 +1,190 @@
+import math
+import heapq
+from sqlalchemy import and_, or_
+
+# Geospatial helpers shared by the location-aware routes
+
+EARTH_RADIUS_KM = 6371.0088  # Mean Earth radius
+# Slightly under the true ~111.2km per degree so bounding boxes err on the large side
+KM_PER_DEGREE = 111.0
+GEOHASH_PRECISION = 6  # Stored precision, cells are roughly 1.2km x 0.6km
+MAX_COVERING_CELLS = 16  # Upper bound on prefix ranges sent to the database
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometers"""
+    return distances_km(lat1, lng1, (lat2,), (lng2,))[0]
+
+
+def distances_km(lat, lng, lats, lngs):
+    """Great-circle distances from one point to many, in a single pass.
+
+    ``lats`` and ``lngs`` are parallel sequences of degrees. Terms that only
+    depend on the origin are computed once instead of per candidate.
+    """
+    radians = math.radians
+    sin = math.sin
+    cos = math.cos
+    asin = math.asin
+    sqrt = math.sqrt
+
+    phi = radians(lat)
+    lam = radians(lng)
+    cos_phi = cos(phi)
+    diameter = 2 * EARTH_RADIUS_KM
+
+    result = []
+    append = result.append
+    for other_lat, other_lng in zip(lats, lngs):
+        other_phi = radians(other_lat)
+        h = (sin((other_phi - phi) / 2) ** 2 +
+             cos_phi * cos(other_phi) * sin((radians(other_lng) - lam) / 2) ** 2)
+        append(diameter * asin(sqrt(min(h, 1.0))))
+    return result
+
+
+def rank_by_distance(lat, lng, rows, radius_km=None, limit=None, after=None):
+    """Rank candidate rows by distance from a point.
+
+    Each row is a ``(key, latitude, longitude, reach_km)`` tuple, typically
+    selected straight from the database. Rows farther than ``radius_km`` or
+    than their own ``reach_km`` (when not None) are dropped. Returns
+    ``(distance_km, key)`` pairs, nearest first; with ``limit`` only the top
+    entries are selected, without sorting the rest. ``after`` is the last
+    pair of a previous page; only pairs ranked after it are returned.
+    """
+    rows = [row for row in rows if row[1] is not None and row[2] is not None]
+    distances = distances_km(lat, lng, [row[1] for row in rows], [row[2] for row in rows])
+
+    matches = [(distance, row[0]) for distance, row in zip(distances, rows)
+               if (radius_km is None or distance <= radius_km) and
+               (row[3] is None or distance <= row[3])]
+    if after is not None:
+        matches = [match for match in matches if match > after]
+
+    if limit is not None and limit < len(matches):
+        return heapq.nsmallest(limit, matches)
+    matches.sort()
+    return matches
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """Return the (lat, lng) size in degrees of a geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle.
+
+    Longitudes may fall outside [-180, 180] when the box crosses the
+    antimeridian; use longitude_ranges() to split them.
+    """
+    angular = math.radians(radius_km / KM_PER_DEGREE)
+    min_lat = lat - math.degrees(angular)
+    max_lat = lat + math.degrees(angular)
+
+    # A circle touching a pole spans every meridian
+    cos_lat = math.cos(math.radians(lat))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat <= math.sin(angular):
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    dlng = math.degrees(math.asin(math.sin(angular) / cos_lat))
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+
+def longitude_ranges(min_lng, max_lng):
+    """Split a longitude interval at the antimeridian"""
+    if max_lng - min_lng >= 360.0:
+        return [(-180.0, 180.0)]
+    if min_lng < -180.0:
+        return [(min_lng + 360.0, 180.0), (-180.0, max_lng)]
+    if max_lng > 180.0:
+        return [(min_lng, 180.0), (-180.0, max_lng - 360.0)]
+    return [(min_lng, max_lng)]
+
+
+def covering_geohashes(lat, lng, radius_km, max_cells=MAX_COVERING_CELLS):
+    """Return the geohash prefixes whose cells cover the search circle.
+
+    The finest precision that needs at most ``max_cells`` cells is used.
+    Returns None when even single-character cells would exceed the limit,
+    in which case callers should rely on the bounding box alone.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        rows = range(int((min_lat + 90.0) // cell_lat),
+                     min(int((max_lat + 90.0) // cell_lat), int(180.0 / cell_lat) - 1) + 1)
+        lng_cells = int(round(360.0 / cell_lng))
+        first_col = int(math.floor((min_lng + 180.0) / cell_lng))
+        last_col = int(math.floor((max_lng + 180.0) / cell_lng))
+        cols = {col % lng_cells for col in range(first_col, last_col + 1)}
+
+        if len(rows) * len(cols) > max_cells:
+            continue
+
+        cells = set()
+        for row in rows:
+            center_lat = -90.0 + (row + 0.5) * cell_lat
+            for col in cols:
+                center_lng = -180.0 + (col + 0.5) * cell_lng
+                cells.add(encode_geohash(center_lat, center_lng, precision))
+        return sorted(cells)
+
+    return None
+
+
+def nearby_clause(lat_column, lng_column, geohash_column, lat, lng, radius_km):
+    """Build an index-friendly filter selecting rows near a point.
+
+    Combines geohash prefix ranges (which an index on the geohash column
+    can serve directly) with an exact bounding box on the coordinates.
+    Rows still need an exact distance check afterwards.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+
+    clauses = [lat_column.between(min_lat, max_lat)]
+    clauses.append(or_(*[lng_column.between(low, high)
+                         for low, high in longitude_ranges(min_lng, max_lng)]))
+
+    cells = covering_geohashes(lat, lng, radius_km)
+    if cells:
+        # '~' sorts after every base32 character, so [cell, cell~) is a prefix range
+        clauses.append(or_(*[and_(geohash_column >= cell, geohash_column < cell + '~')
+                             for cell in cells]))
+
+    return and_(*clauses)
@@ -0,0 +1,195 @@
+import json
+import math
+import struct
+from collections import namedtuple
+
+# Parsing helpers for Field.coordinates
+#
+# Fields arrive in a few shapes: the frontend sends a JSON array of
+# [latitude, longitude] pairs, older rows hold a plain "lat,lng" point,
+# and API clients may send a GeoJSON Polygon or Feature (which orders
+# positions as [longitude, latitude]).
+
+
+def parse_coordinates(text):
+    """Return the field outline as a list of (lat, lng) tuples.
+
+    Raises ValueError if the text is not one of the supported formats.
+    """
+    if not text or not isinstance(text, str):
+        raise ValueError('Coordinates are required')
+
+    text = text.strip()
+    if not text.startswith(('[', '{')):
+        parts = text.split(',')
+        if len(parts) != 2:
+            raise ValueError('Coordinates must be a polygon or a "lat,lng" point')
+        return [_checked(float(parts[0]), float(parts[1]))]
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ValueError('Coordinates are not valid JSON')
+
+    return points_from_json(data)
+
+
+def points_from_json(data):
+    """Outline points from decoded JSON: a [lat, lng] array or GeoJSON polygon"""
+    try:
+        if isinstance(data, dict):
+            if data.get('type') == 'Feature':
+                data = data.get('geometry') or {}
+            if data.get('type') != 'Polygon' or not data.get('coordinates'):
+                raise ValueError('Only GeoJSON Polygon geometries are supported')
+            # GeoJSON: outer ring first, positions are [lng, lat]
+            points = [_checked(position[1], position[0]) for position in data['coordinates'][0]]
+        elif isinstance(data, list):
+            points = [_checked(pair[0], pair[1]) for pair in data]
+        else:
+            points = []
+    except (TypeError, IndexError, KeyError):
+        raise ValueError('Coordinates are malformed')
+
+    if not points:
+        raise ValueError('Coordinates must contain at least one point')
+    return points
+
+
+def _checked(lat, lng):
+    lat = float(lat)
+    lng = float(lng)
+    if not -90.0 <= lat <= 90.0 or not -180.0 <= lng <= 180.0:
+        raise ValueError('Coordinates are out of range')
+    return lat, lng
+
+
+WGS84_RADIUS_M = 6378137.0
+SQUARE_METERS_PER_ACRE = 4046.8564224
+VERTEX_SCALE = 10 ** 7  # Vertices are stored as integer 1e-7 degrees (about 1cm)
+MIN_AREA_M2 = 0.01  # Smaller outlines are degenerate, e.g. collinear vertices
+
+# Everything derived from a field outline, computed once when it is written.
+# area_acres is None for single-point fields.
+Geometry = namedtuple('Geometry', ['points', 'area_acres', 'centroid', 'bbox', 'encoded'])
+
+
+def ring(points):
+    """Drop a repeated closing vertex"""
+    if len(points) > 1 and points[0] == points[-1]:
+        return points[:-1]
+    return points
+
+
+def centroid(points):
+    """Vertex centroid of an outline, ignoring a repeated closing vertex"""
+    points = ring(points)
+    lat = sum(point[0] for point in points) / len(points)
+    lng = sum(point[1] for point in points) / len(points)
+    return lat, lng
+
+
+def geodesic_area_m2(points):
+    """Area of a polygon on the WGS84 sphere in square meters"""
+    points = ring(points)
+    total = 0.0
+    count = len(points)
+    for i in range(count):
+        lat1, lng1 = points[i]
+        lat2, lng2 = points[(i + 1) % count]
+        total += math.radians(lng2 - lng1) * (2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2)))
+    return abs(total) * WGS84_RADIUS_M ** 2 / 2
+
+
+def planar_area_m2(points):
+    """Shoelace area in a local equirectangular projection, in square meters.
+
+    Exact zero for collinear vertices, which the geodesic formula is not.
+    """
+    points = ring(points)
+    origin_lat, origin_lng = points[0]
+    meters = math.radians(WGS84_RADIUS_M)
+    scale = math.cos(math.radians(origin_lat))
+    projected = [((lng - origin_lng) * scale * meters, (lat - origin_lat) * meters) for lat, lng in points]
+    count = len(projected)
+    area2 = sum(projected[i][0] * projected[(i + 1) % count][1] - projected[(i + 1) % count][0] * projected[i][1]
+                for i in range(count))
+    return abs(area2) / 2
+
+
+def polygon_centroid(points):
+    """Area-weighted centroid, computed in a local equirectangular projection.
+
+    Falls back to the vertex centroid for degenerate (zero-area) outlines.
+    """
+    points = ring(points)
+    origin_lat, origin_lng = points[0]
+    scale = math.cos(math.radians(origin_lat))
+    projected = [((lng - origin_lng) * scale, lat - origin_lat) for lat, lng in points]
+
+    area2 = 0.0
+    cx = 0.0
+    cy = 0.0
+    count = len(projected)
+    for i in range(count):
+        x1, y1 = projected[i]
+        x2, y2 = projected[(i + 1) % count]
+        cross = x1 * y2 - x2 * y1
+        area2 += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+
+    if abs(area2) < 1e-18:
+        return centroid(points)
+    return origin_lat + cy / (3 * area2), origin_lng + cx / (3 * area2 * scale)
+
+
+def encode_vertices(points):
+    """Pack (lat, lng) pairs as little-endian int32 pairs, 8 bytes per vertex"""
+    values = []
+    for lat, lng in points:
+        values.append(int(round(lat * VERTEX_SCALE)))
+        values.append(int(round(lng * VERTEX_SCALE)))
+    return struct.pack(f'<{len(values)}i', *values)
+
+
+def decode_vertices(blob):
+    """Inverse of encode_vertices"""
+    values = struct.unpack(f'<{len(blob) // 4}i', blob)
+    return [(values[i] / VERTEX_SCALE, values[i + 1] / VERTEX_SCALE) for i in range(0, len(values), 2)]
+
+
+def analyze(text):
+    """Parse, validate and measure a field outline.
+
+    A polygon needs at least three distinct vertices and a non-zero area.
+    A single "lat,lng" point is still accepted for older fields.
+    Raises ValueError describing the first problem found.
+    """
+    return measure(parse_coordinates(text))
+
+
+def measure(points):
+    """Validate and measure parsed outline points, see analyze"""
+    outline = ring(points)
+
+    if len(points) == 1:
+        lat, lng = points[0]
+        return Geometry(outline, None, (lat, lng), (lat, lat, lng, lng), None)
+
+    if len(set(outline)) < 3:
+        raise ValueError('A field polygon needs at least three distinct points')
+
+    if planar_area_m2(outline) < MIN_AREA_M2:
+        raise ValueError('A field polygon must enclose an area')
+    area = geodesic_area_m2(outline)
+
+    lats = [point[0] for point in outline]
+    lngs = [point[1] for point in outline]
+    return Geometry(
+        outline,
+        area / SQUARE_METERS_PER_ACRE,
+        polygon_centroid(outline),
+        (min(lats), max(lats), min(lngs), max(lngs)),
+        encode_vertices(outline)
+    )
@@ -0,0 +1,287 @@
+import re
+import json
+import codecs
+from xml.etree import ElementTree
+from ..app import db
+from ..models.field import Field
+from .geometry import measure, points_from_json
+
+# Bulk field import from GeoJSON FeatureCollections and KML documents.
+#
+# Uploads are parsed incrementally: only the feature being read (plus one
+# read chunk) is held in memory, up to MAX_FEATURE_SIZE, and valid fields are
+# inserted in executemany batches inside a single transaction.
+
+CHUNK_SIZE = 64 * 1024
+INSERT_BATCH = 500
+MAX_IMPORT_FEATURES = 50000
+MAX_REPORTED_ERRORS = 100
+# Characters one feature may take up; larger ones are rejected rather than buffered
+MAX_FEATURE_SIZE = 16 * 1024 * 1024
+
+_FEATURES = re.compile(r'"features"\s*:\s*\[')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+
+
+def _scan_value(buffer, scan):
+    """Index just past the object or array that starts the buffer.
+
+    Returns None if it continues beyond the buffer. ``scan`` holds
+    [position, depth, in_string] and carries on from where the last call
+    stopped, so each character is looked at once however many chunks a
+    feature spans.
+    """
+    position, depth, in_string = scan
+    while True:
+        if in_string:
+            # Stops at the closing quote, the end, or a backslash split from its escape
+            position = _STRING_BODY.match(buffer, position).end()
+            if position >= len(buffer) or buffer[position] != '"':
+                break
+            position += 1
+            in_string = False
+            continue
+        match = _STRUCTURE.search(buffer, position)
+        if not match:
+            position = len(buffer)
+            break
+        char, position = match.group(), match.end()
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return position
+    scan[:] = [position, depth, in_string]
+    return None
+
+
+def iter_geojson_features(stream, chunk_size=CHUNK_SIZE, max_feature_size=None):
+    """Yield the features of a FeatureCollection one at a time.
+
+    Raises ValueError if the document is not a FeatureCollection, ends early
+    or has a feature longer than ``max_feature_size`` characters
+    (MAX_FEATURE_SIZE by default).
+    """
+    max_feature_size = max_feature_size or MAX_FEATURE_SIZE
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    state = {'buffer': '', 'eof': False, 'scan': [0, 0, False]}
+
+    def fill():
+        if len(state['buffer']) > max_feature_size:
+            raise ValueError(f'A feature is longer than the {max_feature_size} character limit')
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            state['eof'] = True
+            state['buffer'] += text.decode(b'', final=True)
+            return
+        state['buffer'] += text.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+    # Skip to the start of the features array, keeping only a short tail
+    # in case the key is split across two chunks
+    while True:
+        match = _FEATURES.search(state['buffer'])
+        if match:
+            break
+        if state['eof']:
+            raise ValueError('Expected a GeoJSON FeatureCollection')
+        state['buffer'] = state['buffer'][-32:]
+        fill()
+    state['buffer'] = state['buffer'][match.end():]
+
+    while True:
+        buffer = state['buffer'].lstrip(' \t\r\n,')
+        state['buffer'] = buffer
+        if not buffer:
+            if state['eof']:
+                raise ValueError('The FeatureCollection ended unexpectedly')
+            fill()
+            continue
+        if buffer[0] == ']':
+            return
+
+        # Decode a feature only once it is complete, rather than trying
+        # again from its start after every chunk
+        if buffer[0] in '{[' and _scan_value(buffer, state['scan']) is None:
+            if state['eof']:
+                raise ValueError('The FeatureCollection contains invalid JSON')
+            fill()
+            continue
+        try:
+            feature, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            # Only a bare value can still be waiting for the next chunk
+            if state['eof'] or buffer[0] in '{[':
+                raise ValueError('The FeatureCollection contains invalid JSON')
+            fill()
+            continue
+
+        state['buffer'] = buffer[end:]
+        state['scan'] = [0, 0, False]
+        yield feature
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_kml_placemarks(stream):
+    """Yield KML Placemarks as GeoJSON-like features with [lng, lat] rings.
+
+    Raises ValueError if the document is not well-formed XML.
+    """
+    open_elements = []
+    try:
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if _local(element.tag) != 'Placemark':
+                continue
+
+            properties = {}
+            ring = None
+            error = None
+            for child in element.iter():
+                tag = _local(child.tag)
+                if tag in ('name', 'description') and tag not in properties:
+                    properties[tag] = (child.text or '').strip()
+                elif tag in ('Data', 'SimpleData') and child.get('name'):
+                    value = child.text if tag == 'SimpleData' else next(
+                        (v.text for v in child if _local(v.tag) == 'value'), None)
+                    properties[child.get('name')] = (value or '').strip()
+                elif tag == 'outerBoundaryIs' and ring is None:
+                    coordinates = next((c for c in child.iter() if _local(c.tag) == 'coordinates'), None)
+                    if coordinates is not None and coordinates.text:
+                        # KML tuples are "lng,lat[,alt]" separated by whitespace
+                        try:
+                            ring = [[float(value) for value in position.split(',')[:2]]
+                                    for position in coordinates.text.split()]
+                        except ValueError:
+                            error = 'Placemark coordinates are malformed'
+
+            feature = {'type': 'Feature', 'properties': properties,
+                       'geometry': {'type': 'Polygon', 'coordinates': [ring]} if ring else None}
+            if error:
+                feature['error'] = error
+            yield feature
+
+            # Detach parsed placemarks so memory stays flat
+            if open_elements:
+                open_elements[-1].remove(element)
+    except ElementTree.ParseError as e:
+        raise ValueError(f'Invalid KML: {e}')
+
+
+def _field_row(feature, index, user_id):
+    if not isinstance(feature, dict) or feature.get('type') != 'Feature':
+        raise ValueError('Not a GeoJSON Feature')
+    if feature.get('error'):
+        raise ValueError(feature['error'])
+    properties = feature.get('properties') or {}
+    if not isinstance(properties, dict):
+        raise ValueError('Feature properties must be an object')
+    geometry = feature.get('geometry')
+    if not geometry:
+        raise ValueError('Feature has no polygon geometry')
+
+    outline = measure(points_from_json(geometry))
+    if outline.area_acres is None:
+        raise ValueError('Feature has no polygon geometry')
+
+    name = str(properties.get('name') or f'Imported field {index + 1}')[:100]
+    description = properties.get('description')
+    crop_type = properties.get('crop_type') or properties.get('crop')
+    row = {
+        'name': name,
+        'description': str(description) if description is not None else None,
+        # Stored in the frontend's [[lat, lng], ...] format
+        'coordinates': json.dumps([[lat, lng] for lat, lng in outline.points]),
+        'crop_type': str(crop_type)[:50] if crop_type else None,
+        'user_id': user_id,
+    }
+    row.update(Field.geometry_columns(outline))
+    return row
+
+
+class PeekableStream:
+    """Wrap a non-seekable upload so its first bytes can be inspected"""
+
+    def __init__(self, stream, size=256):
+        self.stream = stream
+        self.head = stream.read(size)
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.stream.read(), b''
+            return data
+        data, self.head = self.head[:size], self.head[size:]
+        return data
+
+
+def detect_format(filename, content_type, head):
+    """'kml' or 'geojson' from the file name, content type or first bytes"""
+    filename = (filename or '').lower()
+    if filename.endswith('.kml') or 'kml' in (content_type or ''):
+        return 'kml'
+    if filename.endswith(('.geojson', '.json')) or 'json' in (content_type or ''):
+        return 'geojson'
+    return 'kml' if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<') else 'geojson'
+
+
+def iter_features(stream, fmt):
+    if fmt == 'kml':
+        return iter_kml_placemarks(stream)
+    if fmt == 'geojson':
+        return iter_geojson_features(stream)
+    raise ValueError('format must be geojson or kml')
+
+
+def import_fields(features, user_id):
+    """Validate and insert fields from an iterable of features.
+
+    Invalid features are skipped and reported; everything else is inserted
+    in one transaction. Raises ValueError (after rolling back) if the upload
+    itself cannot be parsed or has too many features.
+    """
+    table = Field.__table__
+    batch = []
+    imported = 0
+    errors = []
+    failed = 0
+
+    try:
+        for index, feature in enumerate(features):
+            if index >= MAX_IMPORT_FEATURES:
+                raise ValueError(f'An import is limited to {MAX_IMPORT_FEATURES} fields')
+            try:
+                batch.append(_field_row(feature, index, user_id))
+            except (ValueError, TypeError, AttributeError) as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    properties = feature.get('properties') if isinstance(feature, dict) else None
+                    name = properties.get('name') if isinstance(properties, dict) else None
+                    errors.append({'index': index, 'name': name, 'error': str(e)})
+                continue
+
+            if len(batch) >= INSERT_BATCH:
+                db.session.execute(table.insert(), batch)
+                imported += len(batch)
+                batch = []
+
+        if batch:
+            db.session.execute(table.insert(), batch)
+            imported += len(batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {'imported': imported, 'failed': failed, 'errors': errors}
@@ -0,0 +1,113 @@
+import base64
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, or_
+
+# Keyset pagination shared by the list endpoints. Pages are ordered newest
+# first on (created_at, id) and the cursor encodes the last row of a page,
+# so fetching any page costs the same regardless of how deep it is.
+#
+# Lists ranked by distance page on (distance, scheduled_date, id) instead.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) pair encoded in a cursor token"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def encode_distance_cursor(distance, scheduled_date, row_id):
+    """Cursor for lists ranked by (distance, scheduled_date, id), nearest first"""
+    raw = f"{distance!r}|{scheduled_date.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_distance_cursor(cursor):
+    """Return the (distance, scheduled_date, id) triple encoded in a distance cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        distance, scheduled_date, row_id = raw.split('|')
+        return float(distance), date.fromisoformat(scheduled_date), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def apply_filters(query, model, args):
+    """Push the common list filters from the query string into SQL.
+
+    Supports ``status`` and ``service_type`` on models that have those
+    columns, and an inclusive ``date_from``/``date_to`` range on created_at.
+    """
+    for name in ('status', 'service_type'):
+        value = args.get(name)
+        if value and hasattr(model, name):
+            query = query.filter(getattr(model, name) == value)
+
+    if args.get('date_from'):
+        query = query.filter(model.created_at >= _parse_date(args['date_from'], 'date_from'))
+    if args.get('date_to'):
+        # Inclusive of the whole end day
+        end = _parse_date(args['date_to'], 'date_to') + timedelta(days=1)
+        query = query.filter(model.created_at < end)
+
+    return query
+
+
+def page_size(args):
+    """Return the requested page size, clamped to MAX_PAGE_SIZE"""
+    value = args.get('limit')
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate(query, model, args):
+    """Filter and page a query from request args.
+
+    Returns ``(items, next_cursor)`` where next_cursor is None on the last
+    page. Raises ValueError for malformed parameters.
+    """
+    query = apply_filters(query, model, args)
+
+    limit = page_size(args)
+
+    cursor = args.get('cursor')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    return items, next_cursor
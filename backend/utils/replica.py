@@ -0,0 +1,83 @@
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+from .cache import TTLCache
+
+# Read-replica routing.
+#
+# With REPLICA_DATABASE_URI set, the session sends the queries of GET and HEAD
+# requests to the replica and everything else to the primary. A request goes
+# back to the primary for the rest of its work as soon as it writes, and a
+# user who wrote stays on the primary for REPLICA_STICKY_SECONDS afterwards, so
+# the replica's lag never hides their own changes from them.
+#
+# Every worker keeps its own list of recent writers, like the principal cache;
+# the window should comfortably exceed the replica's normal lag.
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+_recent_writers = TTLCache(maxsize=100000)
+
+
+def _identity():
+    """The JWT identity of the current request, None before or without a JWT"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def _writes(clause, session):
+    if session._flushing or isinstance(clause, UpdateBase):
+        return True
+    # SELECT ... FOR UPDATE takes locks, which only mean something on the primary
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica bind where it is safe to.
+
+    Outside requests (CLI, background threads) everything uses the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if _writes(clause, self):
+                g.db_read_only = False
+                g.db_wrote = True
+            elif _reads_from_replica():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reads_from_replica():
+    """Decide once per request, on its first query"""
+    read_only = g.get('db_read_only')
+    if read_only is None:
+        identity = _identity()
+        read_only = request.method in READ_METHODS and (
+            identity is None or _recent_writers.get(identity) is None
+        )
+        g.db_read_only = read_only
+    return read_only
+
+
+def start_request():
+    """before_request hook: routing is decided afresh for every request"""
+    g.db_read_only = None
+    g.db_wrote = False
+
+
+def record_writer(response):
+    """after_request hook: keep users who just wrote on the primary for a while"""
+    ttl = current_app.config.get('REPLICA_STICKY_SECONDS', 0)
+    wrote = request.method not in READ_METHODS or g.get('db_wrote', False)
+    if ttl > 0 and wrote and response.status_code < 400:
+        identity = _identity()
+        if identity is not None:
+            _recent_writers.set(identity, True, ttl=ttl)
+    return response
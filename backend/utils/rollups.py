@@ -0,0 +1,354 @@
+import time
+import argparse
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..app import app, db
+from ..models.user import User
+from ..models.service_request import ServiceRequest
+from ..models.rollup import RequestDailyRollup, OperatorDailyRollup
+from .availability import iter_capacities
+
+# Daily rollups for the admin reports.
+#
+# Each service request contributes to one request bucket (created day, status,
+# service type) and, once accepted, to one operator bucket (operator, scheduled
+# day). A change applies the difference between the request's contribution
+# before and after it, as "count = count + delta" upserts in the same
+# transaction as the change itself:
+#
+# - ORM writes (single create/cancel/complete, admin and farmer edits) are
+#   picked up from attribute history in an after_flush listener.
+# - Bulk UPDATEs that bypass the ORM (accept, batch endpoints, dispatch) call
+#   record_transitions() with the ids they changed.
+#
+# backfill() rebuilds both tables from service_requests.
+
+JOB_STATUSES = ('accepted', 'completed')
+INTERVALS = ('day', 'week', 'month')
+# Metric -> the group_by values it supports
+METRICS = {
+    'requests': ('status', 'service_type'),
+    'lead_time': ('service_type',),
+    'utilization': ('operator',),
+}
+MAX_REPORT_DAYS = 731
+BACKFILL_BATCH = 1000
+
+_COLUMNS = ('created_at', 'status', 'service_type', 'operator_id', 'scheduled_date', 'completed_at')
+
+
+def _contribute(row, sign, requests, operators):
+    """Add one request's share of the rollups, times ``sign``, to the deltas"""
+    if row['created_at'] is None or row['service_type'] is None:
+        return
+    status = row['status'] or 'pending'
+    bucket = requests[(row['created_at'].date(), status, row['service_type'])]
+    bucket[0] += sign
+    if status == 'completed' and row['completed_at'] is not None:
+        bucket[1] += sign * (row['completed_at'] - row['created_at']).total_seconds()
+        bucket[2] += sign
+    if row['operator_id'] is not None and status in JOB_STATUSES and row['scheduled_date'] is not None:
+        jobs = operators[(row['operator_id'], row['scheduled_date'])]
+        jobs[0] += sign
+        jobs[1] += sign if status == 'completed' else 0
+
+
+def _upsert(connection, table, keys, counters, rows):
+    """Add the rows' counters to their buckets, creating missing buckets"""
+    name = connection.dialect.name
+    if name in ('postgresql', 'sqlite'):
+        dialect = postgresql if name == 'postgresql' else sqlite
+        statement = dialect.insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: table.c[column] + statement.excluded[column] for column in counters}
+        )
+        connection.execute(statement, rows)
+    elif name in ('mysql', 'mariadb'):
+        statement = mysql.insert(table)
+        statement = statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in counters}
+        )
+        connection.execute(statement, rows)
+    else:
+        # No native upsert: update, and insert the buckets that did not exist.
+        # Unlike the upserts above, two transactions creating the same new
+        # bucket at once can make one of them fail on the unique constraint.
+        for row in rows:
+            updated = connection.execute(
+                table.update().where(*[table.c[key] == row[key] for key in keys]).values(
+                    {column: table.c[column] + row[column] for column in counters}
+                )
+            )
+            if updated.rowcount == 0:
+                connection.execute(table.insert(), row)
+
+
+def record(connection, old_rows, new_rows):
+    """Apply the rollup changes for requests going from old_rows to new_rows.
+
+    Rows are mappings with the _COLUMNS keys; either list may be empty.
+    """
+    requests = defaultdict(lambda: [0, 0.0, 0])
+    operators = defaultdict(lambda: [0, 0])
+    for row in old_rows:
+        _contribute(row, -1, requests, operators)
+    for row in new_rows:
+        _contribute(row, 1, requests, operators)
+
+    # Sorted so concurrent transactions lock buckets in the same order
+    request_rows = [
+        {'day': day, 'status': status, 'service_type': service_type, 'requests': count,
+         'lead_time_seconds': lead, 'lead_time_requests': timed}
+        for (day, status, service_type), (count, lead, timed) in sorted(requests.items()) if count or lead or timed
+    ]
+    operator_rows = [
+        {'operator_id': operator_id, 'day': day, 'jobs': jobs, 'completed': completed}
+        for (operator_id, day), (jobs, completed) in sorted(operators.items()) if jobs or completed
+    ]
+    if request_rows:
+        _upsert(connection, RequestDailyRollup.__table__, ['day', 'status', 'service_type'],
+                ['requests', 'lead_time_seconds', 'lead_time_requests'], request_rows)
+    if operator_rows:
+        _upsert(connection, OperatorDailyRollup.__table__, ['operator_id', 'day'],
+                ['jobs', 'completed'], operator_rows)
+
+
+def record_transitions(ids, old_status):
+    """Record bulk status changes made outside the ORM, before committing.
+
+    ``old_status`` is the status every changed request had before (None for
+    new requests); completed_at is only ever set by the change itself.
+    """
+    if not ids:
+        return
+    table = ServiceRequest.__table__
+    rows = db.session.execute(
+        select(*[table.c[name] for name in _COLUMNS]).where(table.c.id.in_(list(ids)))
+    ).mappings().all()
+    old_rows = [] if old_status is None else [dict(row, status=old_status, completed_at=None) for row in rows]
+    record(db.session.connection(), old_rows, rows)
+
+
+def _snapshots(target):
+    """(before, after) column values of a flushed ServiceRequest"""
+    state = inspect(target)
+    after = {name: getattr(target, name) for name in _COLUMNS}
+    before = dict(after)
+    for name in _COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            before[name] = history.deleted[0]
+    return before, after
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_orm_changes(session, flush_context):
+    old_rows = []
+    new_rows = []
+    for target in session.new:
+        if isinstance(target, ServiceRequest):
+            new_rows.append(_snapshots(target)[1])
+    for target in session.dirty:
+        if isinstance(target, ServiceRequest) and session.is_modified(target):
+            before, after = _snapshots(target)
+            if before != after:
+                old_rows.append(before)
+                new_rows.append(after)
+    for target in session.deleted:
+        if isinstance(target, ServiceRequest):
+            old_rows.append(_snapshots(target)[0])
+    if old_rows or new_rows:
+        record(session.connection(), old_rows, new_rows)
+
+
+# Load previous values when these attributes change, so history has them even
+# for rows that were expired by an earlier commit
+for _name in _COLUMNS:
+    event.listen(getattr(ServiceRequest, _name), 'set', lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+def backfill():
+    """Rebuild both rollup tables from service_requests in one transaction"""
+    table = ServiceRequest.__table__
+    requests = defaultdict(lambda: [0, 0.0, 0])
+    operators = defaultdict(lambda: [0, 0])
+    try:
+        db.session.execute(RequestDailyRollup.__table__.delete())
+        db.session.execute(OperatorDailyRollup.__table__.delete())
+        result = db.session.execute(
+            select(*[table.c[name] for name in _COLUMNS]).execution_options(yield_per=BACKFILL_BATCH)
+        ).mappings()
+        scanned = 0
+        for row in result:
+            _contribute(row, 1, requests, operators)
+            scanned += 1
+        rows = [
+            {'day': day, 'status': status, 'service_type': service_type, 'requests': count,
+             'lead_time_seconds': lead, 'lead_time_requests': timed}
+            for (day, status, service_type), (count, lead, timed) in sorted(requests.items())
+        ]
+        if rows:
+            db.session.execute(RequestDailyRollup.__table__.insert(), rows)
+        rows = [
+            {'operator_id': operator_id, 'day': day, 'jobs': jobs, 'completed': completed}
+            for (operator_id, day), (jobs, completed) in sorted(operators.items())
+        ]
+        if rows:
+            db.session.execute(OperatorDailyRollup.__table__.insert(), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'requests': scanned, 'request_buckets': len(requests), 'operator_buckets': len(operators)}
+
+
+def period_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _periods(start, end, interval):
+    periods = []
+    day = start
+    while day <= end:
+        period = period_start(day, interval)
+        if not periods or periods[-1] != period:
+            periods.append(period)
+        day += timedelta(days=1)
+    return periods
+
+
+def timeseries(metric, start, end, interval='day', group_by=None, status=None, service_type=None, operator_id=None):
+    """Report a metric per period from the rollup tables.
+
+    Returns a list of series, one per group (a single series with key None
+    when not grouped). Raises ValueError for unsupported parameters.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    if group_by is not None and group_by not in METRICS[metric]:
+        raise ValueError(f"{metric} can be grouped by {', '.join(METRICS[metric])}")
+    if end < start:
+        raise ValueError('to must not be before from')
+    if (end - start).days >= MAX_REPORT_DAYS:
+        raise ValueError(f'A report covers at most {MAX_REPORT_DAYS} days')
+
+    periods = _periods(start, end, interval)
+    if metric == 'utilization':
+        totals = _utilization(start, end, interval, group_by, operator_id)
+    else:
+        totals = _request_totals(metric, start, end, interval, group_by, status, service_type)
+
+    series = []
+    for key in sorted(totals, key=lambda key: (key is not None, key if key is not None else 0)):
+        points = []
+        for period in periods:
+            values = totals[key].get(period)
+            points.append(_point(metric, period, values))
+        series.append({'key': key, 'points': points})
+    if not series:
+        series.append({'key': None, 'points': [_point(metric, period, None) for period in periods]})
+    return series
+
+
+def _point(metric, period, values):
+    point = {'period': period.isoformat()}
+    if metric == 'requests':
+        point['requests'] = values[0] if values else 0
+    elif metric == 'lead_time':
+        completed, seconds, timed = values if values else (0, 0.0, 0)
+        point['completed'] = completed
+        # Only completions with a completed_at contribute lead time
+        point['average_hours'] = round(seconds / timed / 3600, 2) if timed else None
+    else:
+        jobs, completed, capacity = values if values else (0, 0, 0)
+        point.update({
+            'jobs': jobs,
+            'completed': completed,
+            'capacity': capacity,
+            'utilization': round(jobs / capacity, 4) if capacity else None
+        })
+    return point
+
+
+def _request_totals(metric, start, end, interval, group_by, status, service_type):
+    rollup = RequestDailyRollup
+    group = getattr(rollup, group_by) if group_by else None
+    query = db.session.query(
+        rollup.day, *([group] if group is not None else []),
+        func.sum(rollup.requests), func.sum(rollup.lead_time_seconds), func.sum(rollup.lead_time_requests)
+    ).filter(rollup.day.between(start, end))
+    if metric == 'lead_time':
+        query = query.filter(rollup.status == 'completed')
+    elif status:
+        query = query.filter(rollup.status == status)
+    if service_type:
+        query = query.filter(rollup.service_type == service_type)
+    query = query.group_by(rollup.day, *([group] if group is not None else []))
+
+    totals = defaultdict(dict)
+    for row in query:
+        day, key = row[0], (row[1] if group is not None else None)
+        count, seconds, timed = row[-3:]
+        period = totals[key].setdefault(period_start(day, interval), [0, 0.0, 0])
+        period[0] += count
+        period[1] += seconds
+        period[2] += timed
+    if metric == 'requests':
+        # Drop keys whose requests all moved to another bucket
+        totals = {key: values for key, values in totals.items() if any(v[0] for v in values.values())}
+    return totals
+
+
+def _utilization(start, end, interval, group_by, operator_id):
+    rollup = OperatorDailyRollup
+    operators = db.session.query(User.id).filter(User.role == 'operator')
+    if operator_id is not None:
+        operators = operators.filter(User.id == operator_id)
+    operator_ids = [row[0] for row in operators]
+
+    totals = defaultdict(dict)
+    query = db.session.query(rollup.operator_id, rollup.day, rollup.jobs, rollup.completed).filter(
+        rollup.day.between(start, end)
+    )
+    if operator_id is not None:
+        query = query.filter(rollup.operator_id == operator_id)
+    for op, day, jobs, completed in query:
+        values = totals[op if group_by else None].setdefault(period_start(day, interval), [0, 0, 0])
+        values[0] += jobs
+        values[1] += completed
+
+    for op, day, capacity in iter_capacities(operator_ids, start, end):
+        if capacity:
+            values = totals[op if group_by else None].setdefault(period_start(day, interval), [0, 0, 0])
+            values[2] += capacity
+    return totals
+
+
+def main():
+    """python -m backend.utils.rollups backfill"""
+    parser = argparse.ArgumentParser(description='Maintain the reporting rollup tables')
+    parser.add_argument('command', choices=['backfill'])
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        if args.command == 'backfill':
+            start = time.perf_counter()
+            report = backfill()
+            print(f"Rebuilt {report['request_buckets']} request and {report['operator_buckets']} operator "
+                  f"buckets from {report['requests']} requests in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
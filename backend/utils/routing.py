@@ -0,0 +1,194 @@
+import math
+import time
+from datetime import timedelta
+from .geo import EARTH_RADIUS_KM
+
+# Daily visiting order for an operator's jobs.
+#
+# The route is an open path from the operator's location (index 0 of the
+# distance matrix) through every stop. A nearest-neighbour tour is improved
+# with 2-opt and Or-opt moves until no move helps or the time budget runs out,
+# so the result is always a valid order even for very large days.
+
+DEFAULT_TIME_BUDGET = 0.04  # Seconds of local search after the greedy tour
+OR_OPT_SEGMENTS = (1, 2, 3)
+DEFAULT_TRAVEL_SPEED_KMH = 40.0  # Road transit between fields
+DEFAULT_SERVICE_MINUTES = 30.0  # Time spent on site per job
+
+
+def distance_matrix(points):
+    """Great-circle distances in km between all (lat, lng) points.
+
+    Points are converted to unit vectors once, so each pair only needs the
+    chord length and one asin; the matrix is symmetric and filled in halves.
+    """
+    vectors = []
+    for lat, lng in points:
+        phi = math.radians(lat)
+        lam = math.radians(lng)
+        vectors.append((math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)))
+
+    asin = math.asin
+    diameter = 2 * EARTH_RADIUS_KM
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        x1, y1, z1 = vectors[i]
+        row = matrix[i]
+        for j in range(i + 1, size):
+            x2, y2, z2 = vectors[j]
+            half_chord = ((x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2) ** 0.5 / 2
+            distance = diameter * asin(min(half_chord, 1.0))
+            row[j] = distance
+            matrix[j][i] = distance
+    return matrix
+
+
+def route_length(tour, matrix):
+    return sum(matrix[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+
+
+def nearest_neighbour(matrix):
+    """Greedy tour starting at index 0"""
+    unvisited = set(range(1, len(matrix)))
+    tour = [0]
+    while unvisited:
+        row = matrix[tour[-1]]
+        closest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(closest)
+        tour.append(closest)
+    return tour
+
+
+def _two_opt_pass(tour, matrix, deadline):
+    """Apply improving segment reversals; returns True if the tour changed"""
+    improved = False
+    size = len(tour)
+    for i in range(1, size - 1):
+        a = tour[i - 1]
+        b = tour[i]
+        row_a = matrix[a]
+        row_b = matrix[b]
+        d_ab = row_a[b]
+        for j in range(i + 1, size):
+            c = tour[j]
+            if j + 1 < size:
+                d = tour[j + 1]
+                delta = row_a[c] + row_b[d] - d_ab - matrix[c][d]
+            else:
+                # Open path: reversing the tail only changes its first edge
+                delta = row_a[c] - d_ab
+            if delta < -1e-9:
+                tour[i:j + 1] = reversed(tour[i:j + 1])
+                improved = True
+                b = tour[i]
+                row_b = matrix[b]
+                d_ab = row_a[b]
+        if time.perf_counter() > deadline:
+            break
+    return improved
+
+
+def _or_opt_pass(tour, matrix, deadline):
+    """Move short runs of stops to a cheaper position; True if the tour changed"""
+    improved = False
+    for length in OR_OPT_SEGMENTS:
+        i = 1
+        while i + length <= len(tour):
+            size = len(tour)
+            first = tour[i]
+            last = tour[i + length - 1]
+            prev = tour[i - 1]
+            nxt = tour[i + length] if i + length < size else None
+
+            # Cost saved by cutting the run out
+            removed = matrix[prev][first] - (matrix[prev][nxt] if nxt is not None else 0.0)
+            if nxt is not None:
+                removed += matrix[last][nxt]
+
+            best = None
+            best_gain = 1e-9
+            for j in range(size - 1 if nxt is None else size):
+                if i - 1 <= j <= i + length - 1:
+                    continue
+                left = tour[j]
+                right = tour[j + 1] if j + 1 < size else None
+                if right is not None:
+                    added = matrix[left][first] + matrix[last][right] - matrix[left][right]
+                else:
+                    added = matrix[left][first]
+                gain = removed - added
+                if gain > best_gain:
+                    best_gain = gain
+                    best = j
+
+            if best is not None:
+                run = tour[i:i + length]
+                del tour[i:i + length]
+                at = best + 1 if best < i else best + 1 - length
+                tour[at:at] = run
+                improved = True
+            else:
+                i += 1
+
+            if time.perf_counter() > deadline:
+                return improved
+    return improved
+
+
+def solve_route(matrix, time_budget=DEFAULT_TIME_BUDGET):
+    """Order the stops of a distance matrix, starting from index 0.
+
+    Returns ``(tour, complete)`` where complete is False if the time budget
+    ran out before local search converged.
+    """
+    tour = nearest_neighbour(matrix)
+    if len(tour) <= 3:
+        return tour, True
+
+    deadline = time.perf_counter() + time_budget
+    while time.perf_counter() <= deadline:
+        changed = _two_opt_pass(tour, matrix, deadline)
+        changed = _or_opt_pass(tour, matrix, deadline) or changed
+        if not changed:
+            return tour, True
+    return tour, False
+
+
+def plan_day(origin, stops, start_time, speed_kmh=DEFAULT_TRAVEL_SPEED_KMH,
+             service_minutes=DEFAULT_SERVICE_MINUTES, time_budget=DEFAULT_TIME_BUDGET):
+    """Order ``stops`` from ``origin`` and schedule them from ``start_time``.
+
+    ``stops`` is a list of ``(key, lat, lng)``. Returns a dict with the
+    ordered stops (leg distance, arrival and departure per stop), the total
+    distance and whether local search converged within the time budget.
+    """
+    started = time.perf_counter()
+    matrix = distance_matrix([origin] + [(lat, lng) for _, lat, lng in stops])
+    tour, complete = solve_route(matrix, time_budget)
+
+    schedule = []
+    total_km = 0.0
+    clock = start_time
+    for previous, index in zip(tour, tour[1:]):
+        leg_km = matrix[previous][index]
+        total_km += leg_km
+        arrival = clock + timedelta(hours=leg_km / speed_kmh)
+        clock = arrival + timedelta(minutes=service_minutes)
+        key, lat, lng = stops[index - 1]
+        schedule.append({
+            'key': key,
+            'latitude': lat,
+            'longitude': lng,
+            'leg_distance_km': round(leg_km, 2),
+            'arrival': arrival,
+            'departure': clock,
+        })
+
+    return {
+        'stops': schedule,
+        'total_distance_km': round(total_km, 2),
+        'finish': clock,
+        'converged': complete,
+        'solve_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
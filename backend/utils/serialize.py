@@ -0,0 +1,222 @@
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from ..models.user import User
+from ..models.field import Field
+from ..models.service_request import ServiceRequest
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib encoder is the fallback
+    orjson = None
+
+# Fast serialization for list responses.
+#
+# Instead of loading ORM objects and calling to_dict() on each, list endpoints
+# select just the columns the response needs as plain tuples (no identity map,
+# no attribute instrumentation) and zip them with precomputed keys. orjson
+# encodes dates and datetimes itself, in the same ISO format as to_dict().
+#
+# The output of serialize() is the same as to_dict() for every model here; keep
+# the plans in step with the models.
+#
+# Clients can narrow a response with ?fields=a,b and embed related rows with
+# ?include=field,farmer,operator. For lists, related rows are loaded the way
+# selectinload does it, one IN query per related model for the whole page;
+# detail endpoints join them in. Either way the number of statements does not
+# depend on the page size.
+
+# Columns a model's to_dict() reports, in order
+_COLUMNS = {
+    ServiceRequest: ('id', 'field_id', 'farmer_id', 'operator_id', 'service_type', 'status',
+                     'scheduled_date', 'notes', 'created_at', 'completed_at'),
+    User: ('id', 'email', 'first_name', 'last_name', 'phone', 'role', 'is_premium', 'latitude',
+           'longitude', 'is_available', 'service_radius', 'hourly_rate', 'service_details', 'created_at'),
+    # The bounding box columns are folded into 'bbox' below
+    Field: ('id', 'name', 'description', 'area', 'coordinates', 'crop_type', 'centroid_lat',
+            'centroid_lng', 'user_id', 'created_at', 'min_lat', 'min_lng', 'max_lat', 'max_lng'),
+}
+
+# As in User.to_dict, operator settings are only reported for operators
+_OPERATOR_ONLY = ('is_available', 'service_radius', 'hourly_rate', 'service_details')
+
+_BBOX = ('min_lat', 'min_lng', 'max_lat', 'max_lng')
+
+# Relations that ?include= can embed: name -> (related model, foreign key column)
+RELATIONS = {
+    ServiceRequest: {
+        'field': (Field, 'field_id'),
+        'farmer': (User, 'farmer_id'),
+        'operator': (User, 'operator_id'),
+    },
+}
+
+# columns: the model attributes to select; build: row tuple -> response dict
+Plan = namedtuple('Plan', ['columns', 'build'])
+
+# A parsed ?fields= / ?include= pair; fields is None for every field
+View = namedtuple('View', ['fields', 'include'])
+
+FULL = View(None, ())
+
+_plans = {}
+
+
+def output_fields(model):
+    """The keys of a model's to_dict(), in order"""
+    names = _COLUMNS[model]
+    return names[:-len(_BBOX)] + ('bbox',) if model is Field else names
+
+
+def _needed(model, name):
+    """Columns an output field is computed from"""
+    if model is Field and name == 'bbox':
+        return _BBOX
+    if model is User and name in _OPERATOR_ONLY:
+        return (name, 'role')
+    return (name,)
+
+
+def _finish(model, item):
+    """Apply the to_dict() rules that are more than copying a column"""
+    if model is User and item.get('role') != 'operator':
+        for name in _OPERATOR_ONLY:
+            if name in item:
+                item[name] = None
+    elif model is Field and 'min_lat' in item:
+        bbox = [item.pop(name) for name in _BBOX]
+        item['bbox'] = bbox if bbox[0] is not None else None
+    return item
+
+
+def plan_for(model, view=FULL):
+    """The cached column plan of a model for a view"""
+    key = (model, view)
+    plan = _plans.get(key)
+    if plan is not None:
+        return plan
+
+    outputs = output_fields(model) if view.fields is None else view.fields
+    # id and created_at are always selected for pagination and embedding,
+    # as are the foreign keys of included relations
+    names = ['id', 'created_at']
+    for name in outputs:
+        names.extend(_needed(model, name))
+    names.extend(RELATIONS[model][relation][1] for relation in view.include)
+    names = tuple(dict.fromkeys(names))
+
+    if view.fields is None and model is ServiceRequest:
+        # The hot path: nothing to compute or drop
+        build = lambda row: dict(zip(names, row))
+    elif view.fields is None:
+        build = lambda row: _finish(model, dict(zip(names, row)))
+    else:
+        def build(row):
+            item = _finish(model, dict(zip(names, row)))
+            return {name: item[name] for name in outputs}
+    plan = _plans[key] = Plan(tuple(getattr(model, name) for name in names), build)
+    return plan
+
+
+def parse_view(args, model, includes=()):
+    """Read ?fields= and ?include= from the query string.
+
+    ``includes`` are the relations the endpoint lets the caller embed.
+    Raises ValueError for unknown names.
+    """
+    fields = None
+    if args.get('fields'):
+        requested = set(name.strip() for name in args['fields'].split(',') if name.strip())
+        unknown = requested - set(output_fields(model))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # In to_dict() order, so equal sets share a cached plan
+        fields = tuple(name for name in output_fields(model) if name in requested)
+
+    include = ()
+    if args.get('include'):
+        requested = set(name.strip() for name in args['include'].split(',') if name.strip())
+        unknown = requested - set(includes)
+        if unknown:
+            raise ValueError(f"include must be among: {', '.join(includes) or 'nothing'}")
+        include = tuple(name for name in includes if name in requested)
+    return View(fields, include)
+
+
+def project(query, model, view=FULL):
+    """Select just the plan's columns; filters, joins and ordering are kept.
+
+    Rows still have ``id`` and ``created_at`` attributes, so paginate()
+    works on the projected query.
+    """
+    return query.with_entities(*plan_for(model, view).columns)
+
+
+def serialize(rows, model, view=FULL):
+    """Response dicts for rows of a projected query, with included relations"""
+    rows = list(rows)
+    build = plan_for(model, view).build
+    items = [build(row) for row in rows]
+    if view.include:
+        _embed(items, rows, model, view.include)
+    return items
+
+
+def _embed(items, rows, model, include):
+    """Attach related rows with one IN query per related model"""
+    relations = RELATIONS[model]
+    wanted = {}
+    for relation in include:
+        related, key = relations[relation]
+        wanted.setdefault(related, set()).update(
+            value for value in (getattr(row, key) for row in rows) if value is not None
+        )
+
+    loaded = {}
+    for related, ids in wanted.items():
+        loaded[related] = {}
+        if ids:
+            query = related.query.filter(related.id.in_(ids))
+            for item in serialize(project(query, related), related):
+                loaded[related][item['id']] = item
+
+    for relation in include:
+        related, key = relations[relation]
+        for item, row in zip(items, rows):
+            item[relation] = loaded[related].get(getattr(row, key))
+
+
+def eager(model, include):
+    """Loader options for a single-row ORM query rendered with ``include``.
+
+    The relations are all many-to-one, so they are joined into the query.
+    """
+    return [joinedload(getattr(model, relation)) for relation in include]
+
+
+def to_view(instance, view=FULL):
+    """An ORM instance rendered like serialize() renders rows"""
+    item = instance.to_dict()
+    if view.fields is not None:
+        item = {name: item[name] for name in view.fields}
+    for relation in view.include:
+        related = getattr(instance, relation)
+        item[relation] = related.to_dict() if related is not None else None
+    return item
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def json_response(payload, status=200):
+    """Like jsonify(payload), status, with the fast encoder when available"""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, default=_default, separators=(',', ':'))
+    return current_app.response_class(body, status=status, mimetype='application/json')
@@ -0,0 +1,168 @@
+import time
+import random
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from .weather import UpstreamError
+
+# Shared HTTP client for third-party APIs: keep-alive connection pooling,
+# connect/read timeouts, bounded retries with jitter and a circuit breaker.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, name):
+        super().__init__(503, f'{name} is temporarily unavailable')
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open, calls are refused until ``reset_timeout`` seconds pass; then a
+    single trial call is let through (half-open) and its outcome decides
+    whether the circuit closes again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            # Open, or half-open with the trial call already in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = self.clock()
+
+
+class UpstreamClient:
+    def __init__(self, name, pool_size=10, connect_timeout=3.05, read_timeout=10.0,
+                 max_retries=2, backoff=0.2, max_backoff=2.0, breaker=None):
+        self.name = name
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                    pool_block=False, max_retries=0)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def get_json(self, url, params=None):
+        """GET a JSON document, retrying transient failures.
+
+        Raises UpstreamError (CircuitOpenError while the breaker is open)
+        when no successful response could be obtained.
+        """
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError(self.name)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(url, params)
+            except requests.Timeout:
+                error = UpstreamError(504, f'{self.name} timed out')
+            except requests.RequestException:
+                error = UpstreamError(502, f'{self.name} could not be reached')
+            else:
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response.json()
+                print(f"{self.name} error: Status {response.status_code}, Response: {response.text}")
+                error = UpstreamError(response.status_code, f'{self.name} returned {response.status_code}')
+                if response.status_code not in RETRY_STATUSES:
+                    # The upstream is healthy, the request itself was rejected
+                    self.breaker.record_success()
+                    raise error
+
+            if attempt >= self.max_retries:
+                self._count('failures')
+                self.breaker.record_failure()
+                raise error
+
+            attempt += 1
+            self._count('retries')
+            # Full jitter keeps retrying workers from hitting upstream in lockstep
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def _send(self, url, params):
+        start = time.perf_counter()
+        try:
+            return self.session.get(url, params=params, timeout=self.timeout)
+        finally:
+            with self._lock:
+                self.requests += 1
+                self._latencies.append((time.perf_counter() - start) * 1000)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else None
+
+        pools = []
+        manager = self._adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            pools.append({
+                'host': f'{key.key_scheme}://{key.key_host}:{key.key_port}',
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                # Unused slots in the queue are None placeholders
+                'idle': sum(1 for conn in list(pool.pool.queue) if conn is not None),
+                'max_size': pool.pool.maxsize,
+            })
+
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'retries': self.retries,
+            'rejected': self.rejected,
+            'circuit': self.breaker.state,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': round(latencies[-1], 2) if latencies else None},
+            'pools': pools,
+        }
@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
+# Caching for upstream weather data. Nearby coordinates share an entry:
+# keys are built from lat/lon rounded to a grid bucket plus the units.
+
+
+class UpstreamError(Exception):
+    """The weather provider answered with a non-success status"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def bucket_key(kind, lat, lon, units, bucket=0.01):
+    """Cache key for a weather lookup; 0.01 degree buckets are roughly 1km"""
+    return (kind, round(lat / bucket), round(lon / bucket), units)
+
+
+class CacheEntry:
+    __slots__ = ('value', 'size', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, size, fresh_until, stale_until):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class MemoryStore:
+    """LRU store bounded by the approximate encoded size of its values"""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class WeatherCache:
+    """Read-through cache with stale-while-revalidate.
+
+    Fresh entries are served directly. Entries past their TTL but within
+    ``stale_ttl`` are served immediately while a background thread refreshes
+    them. Anything older is fetched synchronously; concurrent misses for the
+    same key share a single upstream call.
+
+    ``store`` can be swapped for any object with get/set/delete taking
+    CacheEntry values, e.g. one backed by a shared cache server.
+    """
+
+    def __init__(self, store=None, stale_ttl=600, clock=time.monotonic):
+        self.store = store if store is not None else MemoryStore()
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self.degraded = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def get_or_fetch(self, key, fetch, ttl):
+        now = self.clock()
+        entry = self.store.get(key)
+
+        if entry is not None and now < entry.fresh_until:
+            self._count('hits')
+            return entry.value
+
+        if entry is not None and now < entry.stale_until:
+            self._count('stale_hits')
+            self._refresh_in_background(key, fetch, ttl)
+            return entry.value
+
+        self._count('misses')
+        try:
+            return self._fetch_once(key, fetch, ttl)
+        except UpstreamError as e:
+            # While upstream is failing an expired copy beats no data at all
+            if entry is not None and (e.status_code >= 500 or e.status_code == 429):
+                self._count('degraded')
+                return entry.value
+            raise
+
+    def _fetch_once(self, key, fetch, ttl):
+        with self._lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = {'done': threading.Event()}
+
+        if not leader:
+            pending['done'].wait()
+            if 'error' in pending:
+                raise pending['error']
+            return pending['value']
+
+        try:
+            value = fetch()
+            self._store(key, value, ttl)
+            pending['value'] = value
+            return value
+        except Exception as e:
+            pending['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending['done'].set()
+
+    def _refresh_in_background(self, key, fetch, ttl):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._fetch_once(key, fetch, ttl)
+            except Exception:
+                # Keep serving the stale copy until it expires
+                self._count('refresh_errors')
+
+        threading.Thread(target=refresh, name='weather-refresh', daemon=True).start()
+
+    def _store(self, key, value, ttl):
+        now = self.clock()
+        size = len(json.dumps(value))
+        self.store.set(key, CacheEntry(value, size, now + ttl, now + ttl + self.stale_ttl))
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        stats = {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refresh_errors': self.refresh_errors,
+            'degraded': self.degraded,
+        }
+        if isinstance(self.store, MemoryStore):
+            stats.update({
+                'entries': len(self.store),
+                'bytes': self.store.bytes,
+                'max_bytes': self.store.max_bytes,
+                'evictions': self.store.evictions,
+            })
+        return stats
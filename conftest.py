@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.app is imported, and
+# disable the per-worker caches so every request sees the database state
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='agridrone-test-'), 'test.db')
+os.environ['PRINCIPAL_CACHE_TTL'] = '0'
+os.environ['STATS_CACHE_TTL'] = '0'
+
+import pytest
+from flask_jwt_extended import create_access_token
+from backend.app import app as flask_app, db
+from backend.models.user import User
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Insert a user without password hashing and return (id, auth headers)"""
+    counter = [0]
+
+    def _make_user(role, **columns):
+        counter[0] += 1
+        row = {
+            'email': f'{role}{counter[0]}@example.com',
+            'password_hash': 'x',
+            'first_name': role.title(),
+            'last_name': str(counter[0]),
+            'role': role,
+            'is_available': True,
+            'service_radius': 50.0 if role == 'operator' else None,
+        }
+        row.update(columns)
+        user_id = db.session.execute(User.__table__.insert().values(**row)).inserted_primary_key[0]
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        return user_id, headers
+
+    return _make_user
@@ -0,0 +1,19 @@
+import React from 'react';
+import { Button } from 'react-bootstrap';
+
+// "Load more" footer for lists fetched a page at a time (see usePagedList)
+const LoadMoreButton = ({ hasMore, loading, onClick }) => {
+  if (!hasMore) {
+    return null;
+  }
+
+  return (
+    <div className="text-center py-3 border-top">
+      <Button variant="outline-secondary" size="sm" onClick={onClick} disabled={loading}>
+        {loading ? 'Loading...' : 'Load more'}
+      </Button>
+    </div>
+  );
+};
+
+export default LoadMoreButton;
@@ -0,0 +1,89 @@
+import { useState, useEffect, useCallback } from 'react';
+
+/**
+ * Hook for list endpoints that return one page at a time with a next_cursor
+ * @param {Function} fetchPage - Called with a cursor (null for the first page),
+ *   resolves to { items, nextCursor }
+ * @param {Array} deps - The list starts over from the first page when these change
+ * @returns {Object} The loaded items and the paging state
+ */
+const usePagedList = (fetchPage, deps = []) => {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  const loadFirstPage = useCallback(() => fetchPage(null), deps);
+
+  const reload = useCallback(async () => {
+    try {
+      setLoading(true);
+      setError(null);
+      const page = await loadFirstPage();
+      setItems(page.items);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error fetching list:', err);
+      setError(err);
+    } finally {
+      setLoading(false);
+    }
+  }, [loadFirstPage]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(nextCursor);
+      // Rows added or removed since the last page can shift it; keep one copy of each
+      setItems(current => {
+        const seen = new Set(current.map(item => item.id));
+        return [...current, ...page.items.filter(item => !seen.has(item.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error fetching more items:', err);
+      setError(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  return {
+    items,
+    setItems,
+    loading,
+    loadingMore,
+    hasMore: nextCursor !== null,
+    loadMore,
+    reload,
+    error
+  };
+};
+
+/**
+ * Load every page of a list, for the few places that need the whole set
+ * (e.g. a dropdown of all operators) rather than a page at a time
+ * @param {Function} fetchPage - As for usePagedList
+ * @returns {Promise<Array>} The items of all pages, in order
+ */
+export const fetchAllPages = async (fetchPage) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await fetchPage(cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
+};
+
+export default usePagedList;
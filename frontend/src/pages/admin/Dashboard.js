@@ -21,32 +21,22 @@ const AdminDashboard = ({ user }) => {
       try {
         setLoading(true);
         
-        // Fetch users and service requests in parallel
-        const [users, serviceRequests] = await Promise.all([
-          adminService.getUsers(),
-          adminService.getServiceRequests()
+        // Fetch server-side counts and the newest users in parallel
+        const [statsData, users] = await Promise.all([
+          adminService.getStats(),
+          adminService.getUsers(null, { limit: 5 })
         ]);
         
-        // Calculate stats
-        const farmers = users.filter(user => user.role === 'farmer').length;
-        const operators = users.filter(user => user.role === 'operator').length;
-        const pendingRequests = serviceRequests.filter(req => req.status === 'pending').length;
-        const completedServices = serviceRequests.filter(req => req.status === 'completed').length;
-        
         setStats({
-          totalUsers: users.length,
-          farmers,
-          operators,
-          pendingRequests,
-          completedServices
+          totalUsers: statsData.users.total,
+          farmers: statsData.users.farmers,
+          operators: statsData.users.operators,
+          pendingRequests: statsData.service_requests.pending,
+          completedServices: statsData.service_requests.completed
         });
         
-        // Get the most recent users (up to 5)
-        const sortedUsers = [...users].sort((a, b) => {
-          return new Date(b.created_at) - new Date(a.created_at);
-        }).slice(0, 5);
-        
-        setRecentUsers(sortedUsers);
+        // Users come back newest first
+        setRecentUsers(users);
       } catch (err) {
         console.error('Error fetching dashboard data:', err);
         setError('Failed to load dashboard data. Please try again.');
@@ -1,39 +1,50 @@
 import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Button, Table, Badge, Form, Modal, Alert } from 'react-bootstrap';
 import adminService from '../../services/adminService';
+import usePagedList, { fetchAllPages } from '../../hooks/usePagedList';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 const AdminServiceRequests = ({ user }) => {
-  const [serviceRequests, setServiceRequests] = useState([]);
   const [operators, setOperators] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const [statusCounts, setStatusCounts] = useState({});
   const [error, setError] = useState('');
   const [showAssignModal, setShowAssignModal] = useState(false);
   const [currentRequest, setCurrentRequest] = useState(null);
   const [selectedOperator, setSelectedOperator] = useState('');
   const [filterStatus, setFilterStatus] = useState('all');
 
+  // Requests are paged newest first, filtered by status on the server
+  const {
+    items: serviceRequests,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    reload,
+    error: loadError
+  } = usePagedList(
+    (cursor) => adminService.getServiceRequestsPage(filterStatus === 'all' ? null : filterStatus, cursor),
+    [filterStatus]
+  );
+
   useEffect(() => {
     fetchData();
   }, []);
 
+  // Every operator for the assign dialog, and the totals for the status
+  // cards, which cover every request rather than the pages loaded so far
   const fetchData = async () => {
     try {
-      setLoading(true);
-      
-      // Fetch service requests and operators in parallel
-      const [requests, operatorsData] = await Promise.all([
-        adminService.getServiceRequests(),
-        adminService.getOperators()
+      const [operatorsData, stats] = await Promise.all([
+        fetchAllPages(adminService.getOperatorsPage),
+        adminService.getStats()
       ]);
       
-      setServiceRequests(requests);
       setOperators(operatorsData);
-      setError('');
+      setStatusCounts(stats.service_requests);
     } catch (err) {
       console.error('Error fetching data:', err);
       setError(err.error || 'Failed to load data. Please try again.');
-    } finally {
-      setLoading(false);
     }
   };
 
@@ -60,9 +71,9 @@ const AdminServiceRequests = ({ user }) => {
       
       await adminService.assignOperatorToRequest(currentRequest.id, parseInt(selectedOperator));
       
-      // Refresh the service requests list
-      const updatedRequests = await adminService.getServiceRequests();
-      setServiceRequests(updatedRequests);
+      // Refresh the service requests list and the totals
+      reload();
+      fetchData();
       
       handleCloseAssignModal();
     } catch (err) {
@@ -76,9 +87,9 @@ const AdminServiceRequests = ({ user }) => {
       setError('');
       await adminService.cancelServiceRequest(requestId);
       
-      // Refresh the service requests list
-      const updatedRequests = await adminService.getServiceRequests();
-      setServiceRequests(updatedRequests);
+      // Refresh the service requests list and the totals
+      reload();
+      fetchData();
     } catch (err) {
       console.error('Error cancelling request:', err);
       setError(err.error || 'Failed to cancel request. Please try again.');
@@ -101,10 +112,8 @@ const AdminServiceRequests = ({ user }) => {
     }
   };
 
-  // Filter service requests based on selected status
-  const filteredRequests = filterStatus === 'all' 
-    ? serviceRequests 
-    : serviceRequests.filter(request => request.status === filterStatus);
+  // The server applies the status filter
+  const filteredRequests = serviceRequests;
 
   if (loading) {
     return (
@@ -128,6 +137,7 @@ const AdminServiceRequests = ({ user }) => {
       </div>
       
       {error && <Alert variant="danger" className="mb-4">{error}</Alert>}
+      {loadError && <Alert variant="danger" className="mb-4">{loadError.error || 'Failed to load service requests. Please try again.'}</Alert>}
       
       <Row className="mb-4">
         <Col md={3}>
@@ -136,7 +146,7 @@ const AdminServiceRequests = ({ user }) => {
               <i className="fas fa-clipboard-list"></i>
             </div>
             <h3 className="stat-value">
-              {serviceRequests.filter(r => r.status === 'pending').length}
+              {statusCounts.pending || 0}
             </h3>
             <p className="stat-label">Pending</p>
           </Card>
@@ -147,7 +157,7 @@ const AdminServiceRequests = ({ user }) => {
               <i className="fas fa-tasks"></i>
             </div>
             <h3 className="stat-value">
-              {serviceRequests.filter(r => r.status === 'accepted').length}
+              {statusCounts.accepted || 0}
             </h3>
             <p className="stat-label">Accepted</p>
           </Card>
@@ -158,7 +168,7 @@ const AdminServiceRequests = ({ user }) => {
               <i className="fas fa-check-circle"></i>
             </div>
             <h3 className="stat-value">
-              {serviceRequests.filter(r => r.status === 'completed').length}
+              {statusCounts.completed || 0}
             </h3>
             <p className="stat-label">Completed</p>
           </Card>
@@ -169,7 +179,7 @@ const AdminServiceRequests = ({ user }) => {
               <i className="fas fa-times-circle"></i>
             </div>
             <h3 className="stat-value">
-              {serviceRequests.filter(r => r.status === 'cancelled').length}
+              {statusCounts.cancelled || 0}
             </h3>
             <p className="stat-label">Cancelled</p>
           </Card>
@@ -260,6 +270,7 @@ const AdminServiceRequests = ({ user }) => {
               <p className="text-muted mb-0">No service requests found with the selected filter.</p>
             </div>
           )}
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
         </Card.Body>
       </Card>
       
@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Container, Row, Col, Card, Button, Table, Badge, Form, Modal, Alert } from 'react-bootstrap';
 import adminService from '../../services/adminService';
+import usePagedList from '../../hooks/usePagedList';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 const UserManagement = ({ user }) => {
-  const [users, setUsers] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [showEditModal, setShowEditModal] = useState(false);
   const [currentUser, setCurrentUser] = useState(null);
@@ -19,22 +19,19 @@ const UserManagement = ({ user }) => {
   const [updating, setUpdating] = useState(false);
   const [deleting, setDeleting] = useState(null);
 
-  useEffect(() => {
-    const fetchUsers = async () => {
-      try {
-        setLoading(true);
-        const usersData = await adminService.getUsers();
-        setUsers(usersData);
-      } catch (err) {
-        console.error('Error fetching users:', err);
-        setError('Failed to load users. Please try again.');
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchUsers();
-  }, []);
+  // Users are paged newest first, filtered by role on the server
+  const {
+    items: users,
+    setItems: setUsers,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    error: loadError
+  } = usePagedList(
+    (cursor) => adminService.getUsersPage(filterRole === 'all' ? null : filterRole, cursor),
+    [filterRole]
+  );
 
   const handleCloseEditModal = () => {
     setShowEditModal(false);
@@ -122,7 +119,7 @@ const UserManagement = ({ user }) => {
     }
   };
 
-  // Filter users based on selected role
+  // A user whose role was just edited may no longer match the filter
   const filteredUsers = filterRole === 'all' 
     ? users 
     : users.filter(user => user.role === filterRole);
@@ -149,6 +146,7 @@ const UserManagement = ({ user }) => {
       </div>
       
       {error && <Alert variant="danger" className="mb-4">{error}</Alert>}
+      {loadError && <Alert variant="danger" className="mb-4">Failed to load users. Please try again.</Alert>}
       
       <Card>
         <Card.Header>
@@ -225,6 +223,7 @@ const UserManagement = ({ user }) => {
               </Table>
             </div>
           )}
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
         </Card.Body>
       </Card>
       
@@ -31,30 +31,26 @@ const FarmerDashboard = ({ user }) => {
       try {
         setLoading(true);
         
-        // Fetch fields and service requests in parallel
-        const [fields, serviceRequests] = await Promise.all([
+        // Fetch fields, request counts and the newest requests in parallel;
+        // the request list is paged, so the counts come from /stats
+        const [fields, requestStats, recentPage] = await Promise.all([
           farmerService.getFields(),
-          farmerService.getServiceRequests()
+          farmerService.getStats(),
+          farmerService.getServiceRequestsPage({ limit: 5 })
         ]);
         
         // Calculate stats
         const totalArea = fields.reduce((sum, field) => sum + parseFloat(field.area), 0);
-        const pendingRequests = serviceRequests.filter(req => req.status === 'pending').length;
-        const completedServices = serviceRequests.filter(req => req.status === 'completed').length;
         
         setStats({
           totalFields: fields.length,
           totalArea: totalArea.toFixed(1),
-          pendingRequests,
-          completedServices
+          pendingRequests: requestStats.service_requests.pending,
+          completedServices: requestStats.service_requests.completed
         });
         
-        // Get the most recent service requests (up to 5)
-        const sortedRequests = [...serviceRequests].sort((a, b) => {
-          return new Date(b.scheduled_date) - new Date(a.scheduled_date);
-        }).slice(0, 5);
-        
-        setRecentRequests(sortedRequests);
+        // The most recently created service requests (up to 5)
+        setRecentRequests(recentPage.items);
       } catch (err) {
         console.error('Error fetching dashboard data:', err);
         setError('Failed to load dashboard data. Please try again.');
@@ -1,11 +1,11 @@
 import React, { useState, useEffect } from 'react';
 import { Container, Card, Button, Table, Badge, Form, Modal, Alert } from 'react-bootstrap';
 import farmerService from '../../services/farmerService';
+import usePagedList from '../../hooks/usePagedList';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 const ServiceRequests = ({ user }) => {
-  const [serviceRequests, setServiceRequests] = useState([]);
   const [fields, setFields] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [showAddModal, setShowAddModal] = useState(false);
   const [formData, setFormData] = useState({
     field_id: '',
@@ -16,27 +16,32 @@ const ServiceRequests = ({ user }) => {
   const [error, setError] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
 
+  // Requests are paged newest first, filtered by status on the server
+  const {
+    items: serviceRequests,
+    setItems: setServiceRequests,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    error: loadError
+  } = usePagedList(
+    (cursor) => farmerService.getServiceRequestsPage(statusFilter === 'all' ? {} : { status: statusFilter }, cursor),
+    [statusFilter]
+  );
+
   useEffect(() => {
-    const fetchData = async () => {
+    const fetchFields = async () => {
       try {
-        setLoading(true);
-        // Fetch fields and service requests in parallel
-        const [fieldsData, requestsData] = await Promise.all([
-          farmerService.getFields(),
-          farmerService.getServiceRequests()
-        ]);
-        
+        const fieldsData = await farmerService.getFields();
         setFields(fieldsData);
-        setServiceRequests(requestsData);
       } catch (err) {
-        console.error('Error fetching data:', err);
+        console.error('Error fetching fields:', err);
         setError('Failed to load data. Please try again.');
-      } finally {
-        setLoading(false);
       }
     };
 
-    fetchData();
+    fetchFields();
   }, []);
 
   const handleCloseAddModal = () => {
@@ -123,7 +128,7 @@ const ServiceRequests = ({ user }) => {
     }
   };
 
-  // Filter service requests based on status
+  // Requests cancelled here since the page loaded may no longer match the filter
   const filteredRequests = statusFilter === 'all' 
     ? serviceRequests 
     : serviceRequests.filter(request => request.status === statusFilter);
@@ -153,6 +158,7 @@ const ServiceRequests = ({ user }) => {
       </div>
       
       {error && <Alert variant="danger" className="mb-4">{error}</Alert>}
+      {loadError && <Alert variant="danger" className="mb-4">Failed to load data. Please try again.</Alert>}
       
       <Card>
         <Card.Header>
@@ -234,6 +240,7 @@ const ServiceRequests = ({ user }) => {
               </Table>
             </div>
           )}
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
         </Card.Body>
       </Card>
       
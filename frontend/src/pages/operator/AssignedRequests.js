@@ -1,32 +1,24 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Container, Card, Button, Table, Badge, Modal, Form, Alert } from 'react-bootstrap';
 import operatorService from '../../services/operatorService';
+import usePagedList from '../../hooks/usePagedList';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 const AssignedRequests = ({ user }) => {
-  const [assignedRequests, setAssignedRequests] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [showCompleteModal, setShowCompleteModal] = useState(false);
   const [currentRequest, setCurrentRequest] = useState(null);
   const [completionNotes, setCompletionNotes] = useState('');
   const [completing, setCompleting] = useState(false);
 
-  useEffect(() => {
-    const fetchAssignedRequests = async () => {
-      try {
-        setLoading(true);
-        const requests = await operatorService.getAssignedRequests();
-        setAssignedRequests(requests);
-      } catch (err) {
-        console.error('Error fetching assigned requests:', err);
-        setError('Failed to load assigned requests. Please try again.');
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchAssignedRequests();
-  }, []);
+  // Active and completed requests are paged separately, newest first
+  const active = usePagedList(
+    (cursor) => operatorService.getAssignedRequestsPage({ status: 'accepted' }, cursor)
+  );
+  const completed = usePagedList(
+    (cursor) => operatorService.getAssignedRequestsPage({ status: 'completed' }, cursor)
+  );
+  const loading = active.loading || completed.loading;
 
   const handleShowCompleteModal = (request) => {
     setCurrentRequest(request);
@@ -46,19 +38,12 @@ const AssignedRequests = ({ user }) => {
       // Complete the service request using the API
       await operatorService.completeRequest(currentRequest.id);
       
-      // Update the local state
-      const updatedRequests = assignedRequests.map(request => {
-        if (request.id === currentRequest.id) {
-          return {
-            ...request,
-            status: 'completed',
-            completion_notes: completionNotes
-          };
-        }
-        return request;
-      });
-      
-      setAssignedRequests(updatedRequests);
+      // Move the request from the active list to the top of the completed one
+      active.setItems(active.items.filter(request => request.id !== currentRequest.id));
+      completed.setItems([
+        { ...currentRequest, status: 'completed', completion_notes: completionNotes },
+        ...completed.items
+      ]);
       handleCloseCompleteModal();
     } catch (err) {
       console.error('Error completing request:', err);
@@ -94,9 +79,8 @@ const AssignedRequests = ({ user }) => {
     );
   }
 
-  // Filter requests by status
-  const activeRequests = assignedRequests.filter(request => request.status === 'accepted');
-  const completedRequests = assignedRequests.filter(request => request.status === 'completed');
+  const activeRequests = active.items;
+  const completedRequests = completed.items;
 
   return (
     <Container className="py-4">
@@ -106,6 +90,9 @@ const AssignedRequests = ({ user }) => {
       </div>
       
       {error && <Alert variant="danger" className="mb-4">{error}</Alert>}
+      {(active.error || completed.error) && (
+        <Alert variant="danger" className="mb-4">Failed to load assigned requests. Please try again.</Alert>
+      )}
       
       <Card className="mb-4">
         <Card.Header>
@@ -152,6 +139,7 @@ const AssignedRequests = ({ user }) => {
               <p className="mb-0">No active requests at the moment.</p>
             </div>
           )}
+          <LoadMoreButton hasMore={active.hasMore} loading={active.loadingMore} onClick={active.loadMore} />
         </Card.Body>
       </Card>
       
@@ -192,6 +180,7 @@ const AssignedRequests = ({ user }) => {
               <p className="mb-0">No completed requests yet.</p>
             </div>
           )}
+          <LoadMoreButton hasMore={completed.hasMore} loading={completed.loadingMore} onClick={completed.loadMore} />
         </Card.Body>
       </Card>
       
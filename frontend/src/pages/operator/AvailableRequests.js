@@ -1,31 +1,24 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Container, Row, Col, Card, Button, Table, Modal, Alert } from 'react-bootstrap';
 import operatorService from '../../services/operatorService';
+import usePagedList from '../../hooks/usePagedList';
+import LoadMoreButton from '../../components/LoadMoreButton';
 
 const AvailableRequests = ({ user }) => {
-  const [availableRequests, setAvailableRequests] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState('');
   const [showDetailsModal, setShowDetailsModal] = useState(false);
   const [currentRequest, setCurrentRequest] = useState(null);
   const [acceptingId, setAcceptingId] = useState(null);
 
-  useEffect(() => {
-    const fetchAvailableRequests = async () => {
-      try {
-        setLoading(true);
-        const requests = await operatorService.getAvailableRequests();
-        setAvailableRequests(requests);
-      } catch (err) {
-        console.error('Error fetching available requests:', err);
-        setError('Failed to load available requests. Please try again.');
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchAvailableRequests();
-  }, []);
+  // Nearest first when the operator has a location, otherwise newest first
+  const {
+    items: availableRequests,
+    setItems: setAvailableRequests,
+    loading,
+    loadingMore,
+    hasMore,
+    loadMore,
+    error
+  } = usePagedList((cursor) => operatorService.getAvailableRequestsPage({}, cursor));
 
   const handleShowDetails = async (request) => {
     try {
@@ -105,7 +98,7 @@ const AvailableRequests = ({ user }) => {
         <p className="dashboard-subtitle">Browse and accept new drone service opportunities</p>
       </div>
       
-      {error && <Alert variant="danger" className="mb-4">{error}</Alert>}
+      {error && <Alert variant="danger" className="mb-4">Failed to load available requests. Please try again.</Alert>}
       
       <Card>
         <Card.Header>
@@ -166,6 +159,7 @@ const AvailableRequests = ({ user }) => {
               <p className="text-muted">Check back later for new opportunities.</p>
             </div>
           )}
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
         </Card.Body>
       </Card>
       
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Button, Table, Badge, Alert } from 'react-bootstrap';
 import { Link } from 'react-router-dom';
 import operatorService from '../../services/operatorService';
+import { fetchAllPages } from '../../hooks/usePagedList';
 import Weather from '../../components/Weather';
 
 const OperatorDashboard = ({ user }) => {
@@ -20,24 +21,23 @@ const OperatorDashboard = ({ user }) => {
       try {
         setLoading(true);
         
-        // Fetch available and assigned requests in parallel
-        const [availableRequests, assignedRequestsData] = await Promise.all([
-          operatorService.getAvailableRequests(),
-          operatorService.getAssignedRequests()
+        // The lists are paged: counts of our own requests come from /stats, the
+        // available ones are counted by ids only, and every accepted job is
+        // loaded so the soonest ones can be picked
+        const [requestStats, availableIds, acceptedRequests] = await Promise.all([
+          operatorService.getStats(),
+          fetchAllPages(cursor => operatorService.getAvailableRequestsPage({ fields: 'id', limit: 500 }, cursor)),
+          fetchAllPages(cursor => operatorService.getAssignedRequestsPage({ status: 'accepted', limit: 500 }, cursor))
         ]);
         
-        // Calculate stats
-        const completedServices = assignedRequestsData.filter(req => req.status === 'completed').length;
-        
         setStats({
-          availableRequests: availableRequests.length,
-          assignedRequests: assignedRequestsData.filter(req => req.status === 'accepted').length,
-          completedServices
+          availableRequests: availableIds.length,
+          assignedRequests: requestStats.service_requests.accepted,
+          completedServices: requestStats.service_requests.completed
         });
         
-        // Get the most recent assigned requests (up to 5)
-        const sortedRequests = [...assignedRequestsData]
-          .filter(req => req.status === 'accepted')
+        // Get the upcoming assigned requests (up to 5)
+        const sortedRequests = [...acceptedRequests]
           .sort((a, b) => new Date(a.scheduled_date) - new Date(b.scheduled_date))
           .slice(0, 5);
         
@@ -2,10 +2,10 @@ import api from './api';
 
 // Admin service for handling API calls related to admin functionalities
 
-// Get all users
-const getUsers = async (role) => {
+// Get users, newest first (supports limit/cursor pagination params)
+const getUsers = async (role, pageParams = {}) => {
   try {
-    const params = role ? { role } : {};
+    const params = role ? { role, ...pageParams } : { ...pageParams };
     const response = await api.get('/admin/users', { params });
     return response.data.users;
   } catch (error) {
@@ -13,6 +13,20 @@ const getUsers = async (role) => {
   }
 };
 
+// Get one page of users, newest first; resolves to { items, nextCursor }
+const getUsersPage = async (role, cursor) => {
+  try {
+    const params = role ? { role } : {};
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/admin/users', { params });
+    return { items: response.data.users, nextCursor: response.data.next_cursor };
+  } catch (error) {
+    throw error.response?.data || { error: 'Failed to fetch users' };
+  }
+};
+
 // Get a specific user
 const getUser = async (userId) => {
   try {
@@ -64,6 +78,20 @@ const getServiceRequests = async (status) => {
   }
 };
 
+// Get one page of service requests, newest first; resolves to { items, nextCursor }
+const getServiceRequestsPage = async (status, cursor) => {
+  try {
+    const params = status ? { status } : {};
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/admin/service-requests', { params });
+    return { items: response.data.service_requests, nextCursor: response.data.next_cursor };
+  } catch (error) {
+    throw error.response?.data || { error: 'Failed to fetch service requests' };
+  }
+};
+
 // Get a specific service request
 const getServiceRequest = async (requestId) => {
   try {
@@ -114,6 +142,20 @@ const getOperators = async () => {
   }
 };
 
+// Get one page of operators, up to the largest page size; resolves to { items, nextCursor }
+const getOperatorsPage = async (cursor) => {
+  try {
+    const params = { limit: 500 };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/admin/operators', { params });
+    return { items: response.data.operators, nextCursor: response.data.next_cursor };
+  } catch (error) {
+    throw error.response?.data || { error: 'Failed to fetch operators' };
+  }
+};
+
 // Get dashboard statistics
 const getStats = async () => {
   try {
@@ -124,19 +166,36 @@ const getStats = async () => {
   }
 };
 
+// Download a report export ('service-requests', 'users' or 'fields') as a Blob
+const exportRows = async (kind, format = 'csv', filters = {}) => {
+  try {
+    const response = await api.get(`/admin/export/${kind}`, {
+      params: { ...filters, format },
+      responseType: 'blob'
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || { error: 'Failed to export data' };
+  }
+};
+
 const adminService = {
   getUsers,
+  getUsersPage,
   getUser,
   createUser,
   updateUser,
   deleteUser,
   getServiceRequests,
+  getServiceRequestsPage,
   getServiceRequest,
   assignOperatorToRequest,
   cancelServiceRequest,
   updateServiceRequest,
   getOperators,
-  getStats
+  getOperatorsPage,
+  getStats,
+  exportRows
 };
 
 export default adminService;
@@ -51,16 +51,39 @@ const farmerService = {
     }
   },
 
-  // Get all service requests for the current farmer
-  getServiceRequests: async () => {
+  // Get all service requests for the current farmer; params may set
+  // fields (e.g. 'id,status') and include ('field', 'operator')
+  getServiceRequests: async (params = {}) => {
     try {
-      const response = await api.get('/farmers/service-requests');
+      const response = await api.get('/farmers/service-requests', { params });
       return response.data.service_requests;
     } catch (error) {
       throw error.response ? error.response.data : { error: 'Network error' };
     }
   },
 
+  // Get one page of service requests, newest first; resolves to { items, nextCursor }
+  getServiceRequestsPage: async (params = {}, cursor = null) => {
+    try {
+      const response = await api.get('/farmers/service-requests', {
+        params: cursor ? { ...params, cursor } : params
+      });
+      return { items: response.data.service_requests, nextCursor: response.data.next_cursor };
+    } catch (error) {
+      throw error.response ? error.response.data : { error: 'Network error' };
+    }
+  },
+
+  // Get request counts by status, over all requests rather than one page
+  getStats: async () => {
+    try {
+      const response = await api.get('/farmers/stats');
+      return response.data;
+    } catch (error) {
+      throw error.response ? error.response.data : { error: 'Network error' };
+    }
+  },
+
   // Get a specific service request
   getServiceRequest: async (requestId) => {
     try {
@@ -1,26 +1,61 @@
 import api from './api';
 
 const operatorService = {
-  // Get available service requests
-  getAvailableRequests: async () => {
+  // Get available service requests; params may set fields and include ('field')
+  getAvailableRequests: async (params = {}) => {
     try {
-      const response = await api.get('/operators/service-requests/available');
+      const response = await api.get('/operators/service-requests/available', { params });
       return response.data.service_requests;
     } catch (error) {
       throw error.response ? error.response.data : { error: 'Network error' };
     }
   },
 
-  // Get assigned service requests
-  getAssignedRequests: async () => {
+  // Get one page of available requests, nearest first when the operator has a
+  // location; resolves to { items, nextCursor }
+  getAvailableRequestsPage: async (params = {}, cursor = null) => {
     try {
-      const response = await api.get('/operators/service-requests');
+      const response = await api.get('/operators/service-requests/available', {
+        params: cursor ? { ...params, cursor } : params
+      });
+      return { items: response.data.service_requests, nextCursor: response.data.next_cursor };
+    } catch (error) {
+      throw error.response ? error.response.data : { error: 'Network error' };
+    }
+  },
+
+  // Get assigned service requests; params may set fields and include ('field', 'farmer')
+  getAssignedRequests: async (params = {}) => {
+    try {
+      const response = await api.get('/operators/service-requests', { params });
       return response.data.service_requests;
     } catch (error) {
       throw error.response ? error.response.data : { error: 'Network error' };
     }
   },
 
+  // Get one page of assigned requests, newest first; resolves to { items, nextCursor }
+  getAssignedRequestsPage: async (params = {}, cursor = null) => {
+    try {
+      const response = await api.get('/operators/service-requests', {
+        params: cursor ? { ...params, cursor } : params
+      });
+      return { items: response.data.service_requests, nextCursor: response.data.next_cursor };
+    } catch (error) {
+      throw error.response ? error.response.data : { error: 'Network error' };
+    }
+  },
+
+  // Get request counts by status, over all requests rather than one page
+  getStats: async () => {
+    try {
+      const response = await api.get('/operators/stats');
+      return response.data;
+    } catch (error) {
+      throw error.response ? error.response.data : { error: 'Network error' };
+    }
+  },
+
   // Accept a service request
   acceptRequest: async (requestId) => {
     try {
@@ -0,0 +1,30 @@
+"""Geohash of each user's location for the nearby operator search
+
+Existing rows get their geohash from python -m backend.utils.db_init.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 12:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('ix_users_role_available_geohash', ['role', 'is_available', 'geohash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_available_geohash')
+        batch_op.drop_column('geohash')
@@ -0,0 +1,40 @@
+"""Field centroids and geohashes for the available requests feed
+
+Existing rows get their centroid and geohash from python -m backend.utils.db_init.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 12:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('centroid_lat', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('centroid_lng', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('ix_fields_geohash', ['geohash'], unique=False)
+
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.create_index('ix_service_requests_field_status', ['field_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_requests_field_status')
+
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.drop_index('ix_fields_geohash')
+        batch_op.drop_column('geohash')
+        batch_op.drop_column('centroid_lng')
+        batch_op.drop_column('centroid_lat')
@@ -0,0 +1,38 @@
+"""Outbox of service request events for the database event broker
+
+Only used with EVENTS_BACKEND=database; rows older than the retention
+window are deleted by the broker.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('service_request_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('service_request_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_service_request_events_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service_request_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_service_request_events_created_at'))
+
+    op.drop_table('service_request_events')
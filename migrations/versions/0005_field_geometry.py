@@ -0,0 +1,38 @@
+"""Field bounding boxes and packed outlines
+
+Existing rows get their geometry columns from python -m backend.utils.db_init.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('min_lat', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_lat', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('min_lng', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_lng', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('vertices', sa.LargeBinary(), nullable=True))
+        batch_op.create_index('ix_fields_bbox', ['min_lat', 'min_lng'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.drop_index('ix_fields_bbox')
+        batch_op.drop_column('vertices')
+        batch_op.drop_column('max_lng')
+        batch_op.drop_column('min_lng')
+        batch_op.drop_column('max_lat')
+        batch_op.drop_column('min_lat')
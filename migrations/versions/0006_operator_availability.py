@@ -0,0 +1,75 @@
+"""Operator availability calendar
+
+Weekly rules, dated intervals and blackouts, plus the per-day bookings
+index the capacity checks use.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 12:25:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('availability_blackouts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('reason', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['operator_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('availability_blackouts', schema=None) as batch_op:
+        batch_op.create_index('ix_availability_blackouts_operator_dates', ['operator_id', 'start_date', 'end_date'], unique=False)
+
+    op.create_table('availability_intervals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['operator_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('availability_intervals', schema=None) as batch_op:
+        batch_op.create_index('ix_availability_intervals_operator_dates', ['operator_id', 'start_date', 'end_date'], unique=False)
+
+    op.create_table('availability_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['operator_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('operator_id', 'weekday', name='uq_availability_rules_operator_weekday')
+    )
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.create_index('ix_service_requests_operator_date', ['operator_id', 'scheduled_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_requests_operator_date')
+
+    op.drop_table('availability_rules')
+    with op.batch_alter_table('availability_intervals', schema=None) as batch_op:
+        batch_op.drop_index('ix_availability_intervals_operator_dates')
+
+    op.drop_table('availability_intervals')
+    with op.batch_alter_table('availability_blackouts', schema=None) as batch_op:
+        batch_op.drop_index('ix_availability_blackouts_operator_dates')
+
+    op.drop_table('availability_blackouts')
@@ -0,0 +1,51 @@
+"""Daily rollups behind the admin time-series reports
+
+Existing requests are counted in with python -m backend.utils.rollups backfill.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 12:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('request_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('service_type', sa.String(length=50), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('lead_time_seconds', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'status', 'service_type', name='uq_request_daily_rollups_bucket')
+    )
+    op.create_table('operator_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('jobs', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['operator_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('operator_id', 'day', name='uq_operator_daily_rollups_bucket')
+    )
+    with op.batch_alter_table('operator_daily_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_operator_daily_rollups_day', ['day'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('operator_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_operator_daily_rollups_day')
+
+    op.drop_table('operator_daily_rollups')
+    op.drop_table('request_daily_rollups')
@@ -0,0 +1,50 @@
+"""Indexes for the paged list endpoints
+
+The list endpoints page newest first on (created_at, id) within a farmer,
+operator, role or status, so each gets an index in that order and neither
+the filter nor the sort needs a table scan.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.create_index('ix_service_requests_farmer_created', ['farmer_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_service_requests_operator_created', ['operator_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_service_requests_created', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_service_requests_status_created', ['status', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.create_index('ix_fields_user_created', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_users_role_created', ['role', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_created')
+        batch_op.drop_index('ix_users_created')
+
+    with op.batch_alter_table('fields', schema=None) as batch_op:
+        batch_op.drop_index('ix_fields_user_created')
+
+    with op.batch_alter_table('service_requests', schema=None) as batch_op:
+        batch_op.drop_index('ix_service_requests_status_created')
+        batch_op.drop_index('ix_service_requests_created')
+        batch_op.drop_index('ix_service_requests_operator_created')
+        batch_op.drop_index('ix_service_requests_farmer_created')
@@ -0,0 +1,29 @@
+"""Count the completions that carry lead time in the request rollups
+
+Rebuild the rollups afterwards with python -m backend.utils.rollups backfill;
+until then buckets report no average lead time.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('request_daily_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lead_time_requests', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('request_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_column('lead_time_requests')
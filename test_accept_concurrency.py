@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import date, timedelta
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+
+
+def test_concurrent_accepts_have_exactly_one_winner(app, make_user):
+    """Hundreds of parallel accepts against the same requests: one winner each"""
+    farmer_id, _ = make_user('farmer')
+    operators = [make_user('operator') for _ in range(20)]
+
+    field = Field(name='Stress', coordinates='40.7,-74.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    # One request per day, so no operator can reach their daily capacity and
+    # every losing accept is a 404 rather than a 409
+    request_ids = []
+    for day in range(15):
+        service_request = ServiceRequest(field_id=field.id, farmer_id=farmer_id,
+                                         service_type='pesticide',
+                                         scheduled_date=date(2026, 1, 1) + timedelta(days=day))
+        db.session.add(service_request)
+        db.session.commit()
+        request_ids.append(service_request.id)
+
+    def accept(job):
+        request_id, (operator_id, headers) = job
+        # Each thread needs its own client so requests get separate sessions
+        response = app.test_client().post(
+            f'/api/operators/service-requests/{request_id}/accept', headers=headers)
+        return request_id, operator_id, response.status_code
+
+    jobs = [(request_id, operator) for request_id in request_ids for operator in operators]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(accept, jobs))
+
+    assert len(results) == 300
+    assert {status for _, _, status in results} <= {200, 404}
+
+    winners = Counter(request_id for request_id, _, status in results if status == 200)
+    assert winners == Counter({request_id: 1 for request_id in request_ids})
+
+    db.session.expire_all()
+    for request_id, operator_id, status in results:
+        if status == 200:
+            stored = db.session.get(ServiceRequest, request_id)
+            assert stored.status == 'accepted'
+            assert stored.operator_id == operator_id
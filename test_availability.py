@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.geo import encode_geohash
+from sqlalchemy import event
+from backend.utils.availability import capacity_expression, booked_expression, calendar_days, free_places
+
+MONDAY = date(2030, 1, 7)
+
+
+def next_weekday(day, weekday):
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def test_calendar_precedence_and_sql_agree(app, client, make_user):
+    operator_id, headers = make_user('operator')
+    response = client.post('/api/operators/availability', headers=headers, json={
+        'weekly': [{'weekday': 0, 'capacity': 2}, {'weekday': 2, 'capacity': 3}],
+        'intervals': [{'start_date': '2030-01-08', 'end_date': '2030-01-09', 'capacity': 5}],
+        'blackouts': [{'start_date': '2030-01-09', 'reason': 'Maintenance'}]
+    })
+    assert response.status_code == 200
+
+    days = client.get('/api/operators/availability?from=2030-01-07&to=2030-01-13', headers=headers).get_json()['days']
+    # Mon rule, Tue interval, Wed interval but blacked out, Thu-Sun not in the calendar
+    assert [day['capacity'] for day in days] == [2, 5, 0, 0, 0, 0, 0]
+
+    for offset in range(7):
+        day = MONDAY + timedelta(days=offset)
+        sql = db.session.query(capacity_expression(operator_id, day) - booked_expression(operator_id, day)).scalar()
+        assert sql == calendar_days(operator_id, day, day)[0]['free']
+
+    assert client.post('/api/operators/availability', headers=headers,
+                       json={'weekly': [{'weekday': 7, 'capacity': 1}]}).status_code == 400
+    assert client.post('/api/operators/availability', headers=headers,
+                       json={'intervals': [{'start_date': '2030-01-09', 'end_date': '2030-01-08', 'capacity': 1}]}).status_code == 400
+
+
+def test_free_places_agree_with_the_sql_check(app, client, make_user):
+    farmer_id, _ = make_user('farmer')
+    calendar_id, headers = make_user('operator')
+    default_id, _ = make_user('operator')
+    client.post('/api/operators/availability', headers=headers, json={
+        'weekly': [{'weekday': 0, 'capacity': 1}, {'weekday': 1, 'capacity': 2}],
+        'blackouts': [{'start_date': '2030-01-15'}]
+    })
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.flush()
+    for operator_id, day in [(calendar_id, MONDAY), (calendar_id, MONDAY), (default_id, MONDAY)]:
+        db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, operator_id=operator_id,
+                                      service_type='spraying', status='accepted', scheduled_date=day))
+    db.session.commit()
+
+    pairs = [(operator_id, MONDAY + timedelta(days=offset))
+             for operator_id in (calendar_id, default_id) for offset in (0, 1, 2, 8)]
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    places = free_places(pairs)
+    event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 4
+    for operator_id, day in pairs:
+        sql = db.session.query(capacity_expression(operator_id, day) - booked_expression(operator_id, day)).scalar()
+        assert places[(operator_id, day)] == sql
+    # Monday is overbooked, the blacked-out Tuesday has nothing
+    assert places[(calendar_id, MONDAY)] == -1
+    assert places[(calendar_id, MONDAY + timedelta(days=8))] == 0
+
+
+def test_operators_without_a_calendar_use_the_default_capacity(app, make_user):
+    operator_id, _ = make_user('operator')
+    assert calendar_days(operator_id, MONDAY, MONDAY)[0]['capacity'] == app.config['OPERATOR_DAILY_CAPACITY']
+
+
+def test_booking_and_acceptance_respect_capacity(app, client, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    busy_id, busy_headers = make_user('operator', latitude=17.0, longitude=78.0,
+                                       geohash=encode_geohash(17.0, 78.0))
+    free_id, _ = make_user('operator', latitude=17.0, longitude=78.1, geohash=encode_geohash(17.0, 78.1))
+    client.post('/api/operators/availability', headers=busy_headers,
+                json={'weekly': [{'weekday': weekday, 'capacity': 1} for weekday in range(7)]})
+
+    field = Field(name='Plot', coordinates='17.0,78.05', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    day = next_weekday(date.today() + timedelta(days=1), 0).isoformat()
+    booking = {'field_id': field.id, 'service_type': 'spraying', 'scheduled_date': day, 'operator_id': busy_id}
+    first = client.post('/api/farmers/service-requests', headers=farmer_headers, json=booking)
+    assert first.status_code == 201
+    assert client.post('/api/farmers/service-requests', headers=farmer_headers, json=booking).status_code == 409
+
+    # The busy operator is full that day, so only the other one shows up
+    nearby = client.get(f'/api/farmers/nearby-operators?latitude=17.0&longitude=78.05&date={day}',
+                        headers=farmer_headers).get_json()['operators']
+    assert [op['id'] for op in nearby] == [free_id]
+
+    # Accepting the pre-booked request does not count it twice
+    booked_id = first.get_json()['service_request']['id']
+    assert client.post(f'/api/operators/service-requests/{booked_id}/accept', headers=busy_headers).status_code == 200
+
+    open_request = ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                                  scheduled_date=date.fromisoformat(day))
+    db.session.add(open_request)
+    db.session.commit()
+    response = client.post(f'/api/operators/service-requests/{open_request.id}/accept', headers=busy_headers)
+    assert response.status_code == 409
+
+
+def test_rescheduling_a_booking_respects_capacity(app, client, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    operator_id, operator_headers = make_user('operator')
+    client.post('/api/operators/availability', headers=operator_headers,
+                json={'weekly': [{'weekday': weekday, 'capacity': 1} for weekday in range(7)]})
+    field = Field(name='Plot', coordinates='17.0,78.05', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    monday = next_weekday(date.today() + timedelta(days=1), 0)
+    ids = []
+    for day in (monday, monday + timedelta(days=1)):
+        response = client.post('/api/farmers/service-requests', headers=farmer_headers, json={
+            'field_id': field.id, 'service_type': 'spraying', 'scheduled_date': day.isoformat(),
+            'operator_id': operator_id
+        })
+        ids.append(response.get_json()['service_request']['id'])
+
+    # The operator's only place on Monday is taken
+    response = client.put(f'/api/farmers/service-requests/{ids[1]}', headers=farmer_headers,
+                          json={'scheduled_date': monday.isoformat(), 'notes': 'Earlier please'})
+    assert response.status_code == 409
+    db.session.expire_all()
+    moved = db.session.get(ServiceRequest, ids[1])
+    assert (moved.scheduled_date, moved.notes) == (monday + timedelta(days=1), None)
+
+    # Keeping the same day, or moving to a free one, is fine
+    for day in (monday + timedelta(days=1), monday + timedelta(days=2)):
+        response = client.put(f'/api/farmers/service-requests/{ids[1]}', headers=farmer_headers,
+                              json={'scheduled_date': day.isoformat()})
+        assert response.status_code == 200
+    response = client.put(f'/api/farmers/service-requests/{ids[1]}', headers=farmer_headers,
+                          json={'scheduled_date': 'soon'})
+    assert response.status_code == 400
@@ -0,0 +1,112 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils import batch
+
+DAY = (date.today() + timedelta(days=7)).isoformat()
+
+
+def make_field(farmer_id):
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+    return field.id
+
+
+def count_statements():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_batch_create_reports_each_item(app, client, make_user):
+    farmer_id, headers = make_user('farmer')
+    other_id, _ = make_user('farmer')
+    operator_id, operator_headers = make_user('operator')
+    client.post('/api/operators/availability', headers=operator_headers,
+                json={'weekly': [{'weekday': weekday, 'capacity': 1} for weekday in range(7)]})
+    field_id = make_field(farmer_id)
+    foreign_field_id = make_field(other_id)
+
+    statements, stop = count_statements()
+    response = client.post('/api/farmers/service-requests/batch', headers=headers, json={'requests': [
+        {'field_id': field_id, 'service_type': 'spraying', 'scheduled_date': DAY},
+        {'field_id': foreign_field_id, 'service_type': 'spraying', 'scheduled_date': DAY},
+        {'field_id': field_id, 'service_type': 'spraying', 'scheduled_date': 'soon'},
+        {'field_id': field_id, 'service_type': 'spraying', 'scheduled_date': DAY, 'operator_id': operator_id},
+        {'field_id': field_id, 'service_type': 'spraying', 'scheduled_date': DAY, 'operator_id': operator_id},
+    ]})
+    stop()
+
+    assert response.status_code == 201
+    report = response.get_json()
+    assert [r['status'] for r in report['results']] == [201, 404, 400, 201, 409]
+    assert (report['succeeded'], report['failed']) == (2, 3)
+    # One insert statement for the whole batch
+    assert sum(1 for sql in statements if sql.startswith('INSERT INTO service_requests')) == 1
+
+    created = ServiceRequest.query.filter_by(farmer_id=farmer_id).order_by(ServiceRequest.id).all()
+    assert [sr.id for sr in created] == [report['results'][0]['id'], report['results'][3]['id']]
+    assert created[1].operator_id == operator_id
+
+    assert client.post('/api/farmers/service-requests/batch', headers=headers,
+                       json={'requests': []}).status_code == 400
+
+
+def test_batches_in_the_same_tick_get_their_own_ids(app, client, make_user, monkeypatch):
+    farmer_id, headers = make_user('farmer')
+    field_id = make_field(farmer_id)
+
+    class FrozenClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2030, 1, 1, 12)
+
+    monkeypatch.setattr(batch, 'datetime', FrozenClock)
+    reports = [client.post('/api/farmers/service-requests/batch', headers=headers, json={'requests': [
+        {'field_id': field_id, 'service_type': service_type, 'scheduled_date': DAY} for _ in range(3)
+    ]}).get_json() for service_type in ('spraying', 'seeding')]
+
+    for report, service_type in zip(reports, ('spraying', 'seeding')):
+        ids = [result['id'] for result in report['results']]
+        assert len(set(ids)) == 3
+        assert {db.session.get(ServiceRequest, request_id).service_type for request_id in ids} == {service_type}
+
+
+def test_batch_transitions(app, client, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    operator_id, operator_headers = make_user('operator')
+    rival_id, _ = make_user('operator')
+    client.post('/api/operators/availability', headers=operator_headers,
+                json={'weekly': [{'weekday': weekday, 'capacity': 2} for weekday in range(7)]})
+    field_id = make_field(farmer_id)
+
+    def request(**columns):
+        service_request = ServiceRequest(field_id=field_id, farmer_id=farmer_id, service_type='spraying',
+                                         scheduled_date=date.fromisoformat(DAY), **columns)
+        db.session.add(service_request)
+        db.session.commit()
+        return service_request.id
+
+    open_ids = [request() for _ in range(3)]
+    taken = request(operator_id=rival_id, status='accepted')
+
+    response = client.post('/api/operators/service-requests/batch-accept', headers=operator_headers,
+                           json={'ids': open_ids + [taken, 999999]})
+    assert [r['status'] for r in response.get_json()['results']] == [200, 200, 409, 404, 404]
+
+    response = client.post('/api/operators/service-requests/batch-complete', headers=operator_headers,
+                           json={'ids': [open_ids[0], open_ids[2]]})
+    assert [r['status'] for r in response.get_json()['results']] == [200, 404]
+    assert db.session.get(ServiceRequest, open_ids[0]).completed_at is not None
+
+    response = client.post('/api/farmers/service-requests/batch-cancel', headers=farmer_headers,
+                           json={'ids': [open_ids[2], open_ids[1], 999999]})
+    assert [r['status'] for r in response.get_json()['results']] == [200, 400, 404]
+    assert db.session.get(ServiceRequest, open_ids[2]).status == 'cancelled'
+
+    assert client.post('/api/farmers/service-requests/batch-cancel', headers=farmer_headers,
+                       json={'ids': ['1']}).status_code == 400
@@ -0,0 +1,123 @@
+import json
+import math
+from datetime import date
+import pytest
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.coverage import plan_coverage, METERS_PER_DEGREE
+
+LAT = 20.0
+
+
+def rectangle(width_m, height_m):
+    """Outline of a width (east-west) by height (north-south) rectangle"""
+    dlat = height_m / METERS_PER_DEGREE
+    dlng = width_m / (METERS_PER_DEGREE * math.cos(math.radians(LAT)))
+    return [(LAT, 78.0), (LAT + dlat, 78.0), (LAT + dlat, 78.0 + dlng), (LAT, 78.0 + dlng)]
+
+
+def test_rectangle_is_covered_in_parallel_passes():
+    plan = plan_coverage(rectangle(100, 50), swath=10, heading=0, speed=5, turn_seconds=0, rate=10)
+
+    assert plan['passes'] == 10
+    assert plan['turns'] == 9
+    assert plan['spray_distance_m'] == pytest.approx(500, rel=0.01)
+    assert plan['transit_distance_m'] == pytest.approx(90, rel=0.01)
+    assert plan['covered_area_ha'] == pytest.approx(0.5, rel=0.01)
+    assert plan['spray_volume_l'] == pytest.approx(5.0, rel=0.01)
+    assert plan['flight_time_s'] == pytest.approx(118, rel=0.01)
+    assert len(plan['path']) == 20
+
+
+def test_heading_defaults_to_the_longest_edge():
+    # A long east-west strip is flown east-west, with few long passes
+    plan = plan_coverage(rectangle(400, 40), swath=10)
+
+    assert plan['heading'] % 180 == pytest.approx(90, abs=0.5)
+    assert plan['passes'] == 4
+
+
+def test_concave_field_splits_passes_around_the_gap():
+    dlat = 1 / METERS_PER_DEGREE
+    dlng = 1 / (METERS_PER_DEGREE * math.cos(math.radians(LAT)))
+    # U shape: two 20m wide arms, 60m apart, joined along the south edge
+    outline = [(LAT + y * dlat, 78.0 + x * dlng) for x, y in
+               [(0, 0), (100, 0), (100, 100), (80, 100), (80, 20), (20, 20), (20, 100), (0, 100)]]
+
+    plan = plan_coverage(outline, swath=10, heading=90)
+
+    # Every pass above the base crosses both arms
+    assert plan['passes'] == 10
+    assert plan['turns'] > plan['passes']
+    assert plan['spray_distance_m'] == pytest.approx(2 * 20 * 8 + 100 * 2, rel=0.02)
+
+
+def inside(point, outline):
+    """Even-odd test for a (lat, lng) point"""
+    lat, lng = point
+    result = False
+    for (lat1, lng1), (lat2, lng2) in zip(outline, outline[1:] + outline[:1]):
+        if (lng1 > lng) != (lng2 > lng) and lat < lat1 + (lng - lng1) * (lat2 - lat1) / (lng2 - lng1):
+            result = not result
+    return result
+
+
+def test_narrow_notches_are_crossed_without_spraying():
+    dlat = 1 / METERS_PER_DEGREE
+    dlng = 1 / (METERS_PER_DEGREE * math.cos(math.radians(LAT)))
+    # 100m square with a 4m wide notch cut 60m in from the north edge
+    outline = [(LAT + y * dlat, 78.0 + x * dlng) for x, y in
+               [(0, 0), (100, 0), (100, 100), (52, 100), (52, 40), (48, 40), (48, 100), (0, 100)]]
+
+    plan = plan_coverage(outline, swath=10, heading=90, rate=10)
+
+    path = plan['path']
+    for start, end in zip(path[::2], path[1::2]):
+        # Sampled finely enough to land in the notch; the end points sit on the
+        # outline, give or take the rounding of the waypoints
+        for step in range(1, 100):
+            t = step / 100
+            point = (start[0] + t * (end[0] - start[0]), start[1] + t * (end[1] - start[1]))
+            assert inside(point, outline), (start, end)
+    # The passes through the notch are sprayed on both sides of it only
+    assert plan['spray_distance_m'] == pytest.approx(100 * 10 - 4 * 6, rel=0.01)
+    assert plan['covered_area_ha'] == pytest.approx((100 * 100 - 4 * 60) / 10000, rel=0.01)
+    # Crossing the notch is not a turn
+    assert plan['turns'] == plan['passes'] - 1
+    assert plan['transit_distance_m'] == pytest.approx(9 * 10 + 6 * 4, rel=0.01)
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        plan_coverage(rectangle(100, 50), swath=0)
+    with pytest.raises(ValueError):
+        plan_coverage(rectangle(100, 50), swath=0.01)
+    with pytest.raises(ValueError):
+        plan_coverage(rectangle(100, 50)[:2])
+
+
+def test_service_request_detail_includes_a_cached_plan(app, client, make_user):
+    farmer_id, _ = make_user('farmer')
+    _, headers = make_user('operator')
+    field = Field(name='Plot', coordinates=json.dumps([list(p) for p in rectangle(100, 50)]), user_id=farmer_id)
+    point = Field(name='Point', coordinates='20.0,78.0', user_id=farmer_id)
+    db.session.add_all([field, point])
+    db.session.commit()
+    requests = [ServiceRequest(field_id=f.id, farmer_id=farmer_id, service_type='spraying',
+                               scheduled_date=date(2026, 1, 1)) for f in (field, point)]
+    db.session.add_all(requests)
+    db.session.commit()
+
+    url = f'/api/operators/service-requests/{requests[0].id}'
+    first = client.get(url + '?swath=10&heading=0', headers=headers)
+    assert first.status_code == 200
+    coverage = first.get_json()['coverage']
+    assert coverage['passes'] == 10
+    assert coverage['spray_volume_l'] == pytest.approx(5.0, rel=0.01)
+    assert client.get(url + '?swath=10&heading=0', headers=headers).get_json()['coverage'] == coverage
+
+    assert client.get(url + '?swath=-1', headers=headers).status_code == 400
+
+    response = client.get(f'/api/operators/service-requests/{requests[1].id}', headers=headers)
+    assert response.get_json()['coverage'] is None
@@ -0,0 +1,116 @@
+import random
+import itertools
+from datetime import date, timedelta
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils import dispatch
+from backend.utils.dispatch import solve_assignment, EPSILON
+
+
+def brute_force(edges, capacity, unassigned_cost):
+    """Lowest total cost, counting unassigned_cost for every request left out"""
+    requests = list(edges)
+    best = None
+    choices = [[None] + [(cost, op) for cost, op, _ in edges[r]] for r in requests]
+    for combination in itertools.product(*choices):
+        used = {}
+        for choice in combination:
+            if choice is not None:
+                used[choice[1]] = used.get(choice[1], 0) + 1
+        if any(count > capacity[op] for op, count in used.items()):
+            continue
+        total = sum(unassigned_cost if choice is None else choice[0] for choice in combination)
+        if best is None or total < best:
+            best = total
+    return best
+
+
+def test_auction_matches_brute_force_on_small_instances():
+    rng = random.Random(3)
+    for _ in range(30):
+        operators = range(3)
+        capacity = {op: rng.choice([1, 2]) for op in operators}
+        edges = {}
+        for request_index in range(5):
+            options = rng.sample(list(operators), rng.randint(1, 3))
+            edges[request_index] = sorted((rng.uniform(1, 100), op, 0.0) for op in options)
+
+        solution = solve_assignment(edges, lambda r, op: op, capacity, unassigned_cost=150.0)
+
+        total = sum(c for _, c, _ in solution.values()) + 150.0 * (len(edges) - len(solution))
+        assert total <= brute_force(edges, capacity, 150.0) + len(edges) * EPSILON + 1e-6
+        for op in operators:
+            assert sum(1 for o, _, _ in solution.values() if o == op) <= capacity[op]
+
+
+def test_dispatch_assigns_within_radius_and_capacity(app, client, make_user):
+    app.config['OPERATOR_DAILY_CAPACITY'] = 2
+    farmer_id, _ = make_user('farmer')
+    _, admin_headers = make_user('admin')
+    near_id, _ = make_user('operator', latitude=17.0, longitude=78.0, service_radius=30.0, hourly_rate=10.0)
+    far_id, _ = make_user('operator', latitude=17.0, longitude=78.25, service_radius=30.0, hourly_rate=10.0)
+
+    day = date.today() + timedelta(days=1)
+    field = Field(name='Near', coordinates='17.0,78.05', user_id=farmer_id)
+    remote = Field(name='Remote', coordinates='20.0,80.0', user_id=farmer_id)
+    db.session.add_all([field, remote])
+    db.session.flush()
+    ids = []
+    for f in [field] * 3 + [remote]:
+        service_request = ServiceRequest(field_id=f.id, farmer_id=farmer_id, service_type='spraying',
+                                         scheduled_date=day)
+        db.session.add(service_request)
+        db.session.flush()
+        ids.append(service_request.id)
+    db.session.commit()
+
+    try:
+        preview = client.post('/api/admin/dispatch', json={'dry_run': True}, headers=admin_headers).get_json()
+        assert preview['proposed'] == 3
+        assert preview['assigned'] == 0
+        assert preview['unreachable'] == 1
+        assert ServiceRequest.query.filter_by(status='pending').count() == 4
+
+        report = client.post('/api/admin/dispatch', headers=admin_headers).get_json()
+        assert report['assigned'] == 3
+        assert set(report['timings_ms']) >= {'load_ms', 'candidates_ms', 'capacity_ms', 'solve_ms', 'commit_ms', 'total_ms'}
+
+        db.session.expire_all()
+        assigned = {sr.id: sr.operator_id for sr in ServiceRequest.query.filter_by(status='accepted')}
+        # The nearer operator is full after two, the third goes to the other one
+        assert sorted(assigned) == ids[:3]
+        assert sorted(assigned.values()) == [near_id, near_id, far_id]
+    finally:
+        app.config['OPERATOR_DAILY_CAPACITY'] = 8
+
+
+def test_dispatch_respects_bookings_made_while_solving(app, client, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'OPERATOR_DAILY_CAPACITY', 1)
+    farmer_id, _ = make_user('farmer')
+    _, admin_headers = make_user('admin')
+    operator_id, _ = make_user('operator', latitude=17.0, longitude=78.0, service_radius=30.0)
+
+    day = date.today() + timedelta(days=1)
+    field = Field(name='Near', coordinates='17.0,78.05', user_id=farmer_id)
+    db.session.add(field)
+    db.session.flush()
+    db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                                  scheduled_date=day))
+    db.session.commit()
+
+    solve = dispatch.solve_assignment
+
+    def solve_while_operator_accepts(*args, **kwargs):
+        solution = solve(*args, **kwargs)
+        # The operator's only place goes to another request before the commit
+        db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='seeding',
+                                      scheduled_date=day, operator_id=operator_id, status='accepted'))
+        db.session.commit()
+        return solution
+
+    monkeypatch.setattr(dispatch, 'solve_assignment', solve_while_operator_accepts)
+    report = client.post('/api/admin/dispatch', headers=admin_headers).get_json()
+    assert report['proposed'] == 1
+    assert report['assigned'] == 0
+    assert ServiceRequest.query.filter_by(operator_id=operator_id).count() == 1
@@ -0,0 +1,72 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, exc, text
+from backend.app import app as flask_app, db
+from backend.utils.engine import engine_options, configure_engine, pool_stats, timed_queue_pool
+
+
+def test_sqlite_connections_use_wal(app):
+    with db.engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1
+        assert pragma('busy_timeout') == app.config['SQLITE_BUSY_TIMEOUT']
+
+
+def test_server_database_pool_options():
+    config = dict(flask_app.config, SQLALCHEMY_DATABASE_URI='postgresql://agridrone@db/agridrone',
+                  DB_POOL_SIZE=20, DB_POOL_RECYCLE=600)
+    options = engine_options(config)
+    assert (options['pool_size'], options['pool_recycle'], options['pool_pre_ping']) == (20, 600, True)
+    assert engine_options(dict(config, SQLALCHEMY_DATABASE_URI='sqlite://')) == {}
+
+
+def make_engine(path, timeout):
+    engine = create_engine(f'sqlite:///{path}', poolclass=timed_queue_pool(),
+                           pool_size=1, max_overflow=0, pool_timeout=timeout)
+    configure_engine(engine, flask_app.config)
+    return engine
+
+
+def test_pool_stats_count_timeouts(tmp_path):
+    engine = make_engine(tmp_path / 'pool.db', 0.01)
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    stats = pool_stats(engine)
+    assert (stats['checkouts'], stats['timeouts'], stats['size']) == (1, 1, 1)
+    engine.dispose()
+
+
+def test_pool_stats_count_waiting_checkouts(tmp_path):
+    engine = make_engine(tmp_path / 'pool.db', 30)
+    held = engine.connect()
+    waiting = threading.Event()
+    results = []
+
+    def checkout():
+        waiting.set()
+        with engine.connect() as connection:
+            results.append(connection.execute(text('PRAGMA journal_mode')).scalar())
+
+    # The second checkout blocks on the pool until the first connection is returned
+    worker = threading.Thread(target=checkout)
+    worker.start()
+    waiting.wait()
+    held.close()
+    worker.join()
+
+    assert results == ['wal']
+    stats = pool_stats(engine)
+    assert (stats['checkouts'], stats['timeouts'], stats['checked_out']) == (2, 0, 0)
+    assert stats['wait_ms']['max'] is not None
+    engine.dispose()
+
+
+def test_db_stats_endpoint(client, make_user):
+    _, headers = make_user('admin')
+    response = client.get('/api/admin/db-stats', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['checkouts'] > 0
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from backend.app import db
+from backend.utils.auth import Principal
+from backend.utils.events import MemoryBroker, DatabaseBroker, can_see
+
+
+def event(event_type, operator_id=None, farmer_id=1):
+    return {'type': event_type, 'service_request': {'id': 7, 'farmer_id': farmer_id, 'operator_id': operator_id}}
+
+
+def test_memory_broker_fans_out_to_every_subscriber():
+    broker = MemoryBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+    broker.publish(event('created'))
+    assert first.get(timeout=1)['id'] == second.get(timeout=1)['id'] == 1
+
+    second.close()
+    broker.publish(event('cancelled'))
+    assert first.get(timeout=1)['type'] == 'cancelled'
+    assert second.get(timeout=0.01) is None
+
+
+def test_full_queues_drop_events_instead_of_blocking():
+    broker = MemoryBroker(queue_size=1)
+    subscription = broker.subscribe()
+    broker.publish(event('created'))
+    broker.publish(event('cancelled'))
+    assert subscription.get(timeout=1)['type'] == 'created'
+    assert subscription.get(timeout=0.01) is None
+
+
+def test_visibility():
+    admin = Principal(1, 'admin', True)
+    farmer, other_farmer = Principal(2, 'farmer', True), Principal(3, 'farmer', True)
+    operator, other_operator = Principal(4, 'operator', True), Principal(5, 'operator', True)
+
+    created = event('created', farmer_id=2)
+    assert [can_see(user, created) for user in (admin, farmer, other_farmer, operator)] == [True, True, False, True]
+
+    # Every operator drops an accepted request from the available feed
+    accepted = event('accepted', operator_id=4, farmer_id=2)
+    assert can_see(operator, accepted) and can_see(other_operator, accepted)
+    assert not can_see(other_farmer, accepted)
+
+    completed = event('completed', operator_id=4, farmer_id=2)
+    assert can_see(operator, completed) and can_see(farmer, completed)
+    assert not can_see(other_operator, completed)
+
+    assert can_see(other_operator, event('cancelled'))
+    assert not can_see(other_operator, event('cancelled', operator_id=4))
+
+
+def test_database_broker_polls_published_events(app):
+    broker = DatabaseBroker(db.engine, poll_interval=0.01, retention=timedelta(minutes=5))
+    broker.publish(event('cancelled'))
+    # Only events published after the first subscribe() are delivered
+    subscription = broker.subscribe()
+    broker.publish(event('created'))
+    broker.publish(event('accepted', operator_id=4))
+
+    received = [subscription.get(timeout=5), subscription.get(timeout=5)]
+    assert [e['type'] for e in received] == ['created', 'accepted']
+    assert received[0]['id'] < received[1]['id']
+    subscription.close()
+    broker.stop()
+
+
+def test_open_streams_do_not_hold_a_database_connection(app, client, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'EVENTS_STREAM_TIMEOUT', 1)
+    _, headers = make_user('operator')
+
+    response = client.get('/api/events', headers=headers, buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    # The principal lookup is done; the stream itself needs no connection
+    assert db.engine.pool.checkedout() == 0
+    response.close()
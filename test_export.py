@@ -0,0 +1,49 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils import export
+
+
+def test_exports_stream_filtered_rows(app, client, make_user, monkeypatch):
+    farmer_id, _ = make_user('farmer')
+    _, admin_headers = make_user('admin')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+    db.session.add_all([
+        ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                       status='completed' if i % 3 == 0 else 'pending', scheduled_date=date(2030, 1, 1))
+        for i in range(30)
+    ])
+    db.session.commit()
+    # Small batches and flushes so the stream is made of many chunks
+    monkeypatch.setattr(export, 'EXPORT_BATCH', 4)
+    monkeypatch.setattr(export, 'FLUSH_BYTES', 256)
+
+    response = client.get('/api/admin/export/service-requests?status=completed', headers=admin_headers)
+    assert response.status_code == 200 and response.is_streamed
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 10 and {row['status'] for row in rows} == {'completed'}
+    assert rows[0]['id'] > rows[-1]['id'] and rows[0]['scheduled_date'] == '2030-01-01'
+
+    response = client.get('/api/admin/export/users?format=csv&role=farmer',
+                          headers=dict(admin_headers, **{'Accept-Encoding': 'gzip'}))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    table = list(csv.DictReader(io.StringIO(gzip.decompress(response.get_data()).decode())))
+    assert [row['id'] for row in table] == [str(farmer_id)]
+    assert 'password_hash' not in table[0] and table[0]['service_radius'] == ''
+
+    # An explicit q=0 refuses gzip
+    response = client.get('/api/admin/export/users?format=csv&role=farmer',
+                          headers=dict(admin_headers, **{'Accept-Encoding': 'gzip;q=0, identity'}))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True).startswith('id,')
+
+    assert client.get('/api/admin/export/payments', headers=admin_headers).status_code == 404
+    assert client.get('/api/admin/export/fields?format=xml', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/export/fields?date_from=yesterday', headers=admin_headers).status_code == 400
@@ -0,0 +1,114 @@
+import io
+import json
+import pytest
+from backend.models.field import Field
+from backend.utils import imports
+from backend.utils.imports import iter_geojson_features, iter_kml_placemarks
+
+
+def square(lng, lat, size=0.001):
+    return [[lng, lat], [lng + size, lat], [lng + size, lat + size], [lng, lat + size], [lng, lat]]
+
+
+def collection(features):
+    return json.dumps({'type': 'FeatureCollection', 'name': 'farm', 'features': features}).encode()
+
+
+def feature(name, ring, **properties):
+    return {'type': 'Feature', 'properties': dict(name=name, **properties),
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+
+
+KML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document><name>Co-op</name>
+  <Placemark><name>North</name><ExtendedData><Data name="crop_type"><value>Rice</value></Data></ExtendedData>
+    <Polygon><outerBoundaryIs><LinearRing><coordinates>
+      78.0,17.0,0 78.001,17.0,0 78.001,17.001,0 78.0,17.001,0 78.0,17.0,0
+    </coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>
+  <Placemark><name>Broken</name><Polygon><outerBoundaryIs><LinearRing><coordinates>
+      78.0,abc 78.1,17.0</coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>
+  <Folder><Placemark><name>Pin</name><Point><coordinates>78.0,17.0</coordinates></Point></Placemark></Folder>
+</Document></kml>'''
+
+
+def test_geojson_features_stream_across_chunk_boundaries():
+    features = [feature(f'Plot {i}', square(78 + i * 0.01, 17), note='a "quoted" ] value') for i in range(20)]
+    parsed = list(iter_geojson_features(io.BytesIO(collection(features)), chunk_size=7))
+    assert parsed == features
+
+
+def test_kml_placemarks_become_features():
+    parsed = list(iter_kml_placemarks(io.BytesIO(KML)))
+    assert [f['properties']['name'] for f in parsed] == ['North', 'Broken', 'Pin']
+    assert parsed[0]['properties']['crop_type'] == 'Rice'
+    assert parsed[0]['geometry']['coordinates'][0][0] == [78.0, 17.0]
+    assert 'error' in parsed[1]
+    assert parsed[2]['geometry'] is None
+
+
+def test_import_reports_per_feature_errors(app, client, make_user):
+    farmer_id, headers = make_user('farmer')
+    body = collection([
+        feature('Good', square(78, 17), crop_type='Wheat'),
+        feature('Line', [[78, 17], [78.1, 17], [78, 17]]),
+        {'type': 'Feature', 'properties': {'name': 'Empty'}, 'geometry': None},
+        feature('Also good', square(78.01, 17)),
+    ])
+
+    response = client.post('/api/farmers/fields/import', data=body, headers=headers,
+                           content_type='application/geo+json')
+    assert response.status_code == 201
+    report = response.get_json()
+    assert report['imported'] == 2
+    assert report['failed'] == 2
+    assert [(e['index'], e['name']) for e in report['errors']] == [(1, 'Line'), (2, 'Empty')]
+
+    fields = Field.query.filter_by(user_id=farmer_id).order_by(Field.id).all()
+    assert [f.name for f in fields] == ['Good', 'Also good']
+    assert fields[0].crop_type == 'Wheat'
+    assert 2.5 < fields[0].area < 3.0
+    assert fields[0].centroid_lat is not None and len(fields[0].outline) == 4
+
+
+def test_kml_upload_and_truncated_documents(app, client, make_user):
+    farmer_id, headers = make_user('farmer')
+
+    response = client.post('/api/farmers/fields/import', headers=headers,
+                           data={'file': (io.BytesIO(KML), 'coop.kml')})
+    assert response.get_json()['imported'] == 1
+
+    truncated = collection([feature('A', square(78, 17)), feature('B', square(78.1, 17))])[:-40]
+    response = client.post('/api/farmers/fields/import', data=truncated, headers=headers)
+    assert response.status_code == 400
+    # Nothing from a broken upload is kept
+    assert Field.query.filter_by(user_id=farmer_id).count() == 1
+
+
+def test_geojson_scan_handles_escapes_split_across_chunks():
+    features = [feature('Plot \\ "one"', square(78, 17), note='{[\\"]}' * 5), {'type': 'Feature', 'n': [[1], {}]}]
+    document = collection(features)
+    for chunk_size in (1, 2, 3, 5):
+        assert list(iter_geojson_features(io.BytesIO(document), chunk_size=chunk_size)) == features
+
+
+def test_geojson_features_are_decoded_once(monkeypatch):
+    calls = []
+    decode = json.JSONDecoder.raw_decode
+    monkeypatch.setattr(json.JSONDecoder, 'raw_decode', lambda self, s, idx=0: calls.append(1) or decode(self, s, idx))
+
+    features = [feature(f'Plot {i}', square(78 + i * 0.01, 17)) for i in range(3)]
+    assert list(iter_geojson_features(io.BytesIO(collection(features)), chunk_size=4)) == features
+    assert len(calls) == len(features)
+
+
+def test_oversized_features_are_rejected(client, make_user, monkeypatch):
+    huge = collection([feature('A', square(78, 17), note='x' * (2 * imports.CHUNK_SIZE))])
+    with pytest.raises(ValueError, match='character limit'):
+        list(iter_geojson_features(io.BytesIO(huge), chunk_size=256, max_feature_size=1024))
+
+    monkeypatch.setattr(imports, 'MAX_FEATURE_SIZE', 1024)
+    farmer_id, headers = make_user('farmer')
+    response = client.post('/api/farmers/fields/import', data=huge, headers=headers)
+    assert response.status_code == 400
+    assert 'character limit' in response.get_json()['error']
+    assert Field.query.filter_by(user_id=farmer_id).count() == 0
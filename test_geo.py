@@ -0,0 +1,172 @@
+import math
+import random
+from datetime import date, timedelta
+from backend.app import db
+from backend.models.user import User
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.geo import (
+    EARTH_RADIUS_KM, GEOHASH_PRECISION, encode_geohash, geohash_cell_size, haversine_km, distances_km,
+    rank_by_distance, bounding_box, longitude_ranges, covering_geohashes, nearby_clause
+)
+import pytest
+
+
+def central_angle_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance from the Vincenty form of the central angle"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlam = math.radians(lng2 - lng1)
+    y = math.hypot(math.cos(phi2) * math.sin(dlam),
+                   math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlam))
+    x = math.sin(phi1) * math.sin(phi2) + math.cos(phi1) * math.cos(phi2) * math.cos(dlam)
+    return EARTH_RADIUS_KM * math.atan2(y, x)
+
+
+def test_distances_match_known_values():
+    degree = 2 * math.pi * EARTH_RADIUS_KM / 360
+    assert haversine_km(0.0, 0.0, 0.0, 1.0) == pytest.approx(degree)
+    assert haversine_km(0.0, 0.0, 1.0, 0.0) == pytest.approx(degree)
+    assert haversine_km(10.0, 20.0, -10.0, -160.0) == pytest.approx(math.pi * EARTH_RADIUS_KM)
+    assert haversine_km(0.0, 179.5, 0.0, -179.5) == pytest.approx(degree)
+    # London to New York
+    assert haversine_km(51.5007, -0.1246, 40.6892, -74.0445) == pytest.approx(5574.8, abs=0.5)
+
+    rng = random.Random(3)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+    distances = distances_km(17.0, 78.0, [p[0] for p in points], [p[1] for p in points])
+    for (lat, lng), distance in zip(points, distances):
+        assert distance == pytest.approx(central_angle_km(17.0, 78.0, lat, lng), rel=1e-9, abs=1e-6)
+        assert distance == pytest.approx(haversine_km(lat, lng, 17.0, 78.0), rel=1e-9)
+
+
+def test_rank_by_distance():
+    east = lambda km: km / (2 * math.pi * EARTH_RADIUS_KM / 360)
+    rows = [
+        ('far', 0.0, east(30), None),
+        ('near', 0.0, east(10), None),
+        ('tie-b', 0.0, east(20), None),
+        ('tie-a', 0.0, -east(20), None),   # Same distance on the other side
+        ('short-reach', 0.0, east(15), 12.0),
+        ('unlocated', None, None, None),
+    ]
+    ranked = rank_by_distance(0.0, 0.0, rows)
+    assert [key for _, key in ranked] == ['near', 'tie-a', 'tie-b', 'far']
+    assert [round(distance, 6) for distance, _ in ranked] == [10.0, 20.0, 20.0, 30.0]
+
+    # Equal distances are ordered by key, with or without a limit
+    assert rank_by_distance(0.0, 0.0, rows, limit=2) == ranked[:2]
+    assert [key for _, key in rank_by_distance(0.0, 0.0, rows, radius_km=20.0)] == ['near', 'tie-a', 'tie-b']
+    assert [key for _, key in rank_by_distance(0.0, 0.0, rows, after=ranked[1])] == ['tie-b', 'far']
+    assert rank_by_distance(0.0, 0.0, []) == []
+
+
+def destination(lat, lng, bearing, distance_km):
+    """The point ``distance_km`` from (lat, lng) along a bearing in degrees"""
+    phi, lam, theta = math.radians(lat), math.radians(lng), math.radians(bearing)
+    delta = distance_km / EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi),
+                            math.cos(delta) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+
+def search_cases(seed, count):
+    """Random (lat, lng, radius, points) searches, with points around the circle's
+    edge and on geohash cell boundaries, including near the antimeridian and poles"""
+    rng = random.Random(seed)
+    cell_lat, cell_lng = geohash_cell_size(GEOHASH_PRECISION)
+    centers = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(count)]
+    centers += [(rng.uniform(-60, 60), rng.choice([-1, 1]) * rng.uniform(179.0, 180.0)) for _ in range(count // 2)]
+    centers += [(rng.choice([-1, 1]) * rng.uniform(85.0, 89.9), rng.uniform(-180, 180)) for _ in range(3)]
+    for lat, lng in centers:
+        radius = rng.choice([1.0, 5.0, 25.0, 100.0, 300.0])
+        points = []
+        for _ in range(60):
+            point = destination(lat, lng, rng.uniform(0, 360), radius * rng.uniform(0.0, 1.5))
+            points.append(point)
+            # The same point snapped onto the geohash cell grid
+            points.append((max(-90.0, min(90.0, round(point[0] / cell_lat) * cell_lat)),
+                           (round(point[1] / cell_lng) * cell_lng + 540.0) % 360.0 - 180.0))
+        # Just inside and just outside the circle
+        for bearing in (0, 90, 180, 270):
+            points.append(destination(lat, lng, bearing, radius * 0.999))
+            points.append(destination(lat, lng, bearing, radius * 1.001))
+        yield lat, lng, radius, points
+
+
+def prefilter(lat, lng, radius):
+    """What nearby_clause() selects, as a Python predicate"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    ranges = longitude_ranges(min_lng, max_lng)
+    cells = covering_geohashes(lat, lng, radius)
+    return lambda point: (min_lat <= point[0] <= max_lat and
+                          any(low <= point[1] <= high for low, high in ranges) and
+                          (cells is None or encode_geohash(*point).startswith(tuple(cells))))
+
+
+def test_prefilter_keeps_every_point_in_range():
+    for lat, lng, radius, points in search_cases(seed=1, count=300):
+        selects = prefilter(lat, lng, radius)
+        for point in points:
+            if haversine_km(lat, lng, *point) <= radius:
+                assert selects(point), (lat, lng, radius, point)
+
+
+def test_nearby_query_matches_a_brute_force_scan(app):
+    cases = list(search_cases(seed=2, count=12))
+    rows = [{'email': f'op{i}@example.com', 'password_hash': 'x', 'first_name': 'Op', 'last_name': str(i),
+             'role': 'operator', 'latitude': point[0], 'longitude': point[1], 'geohash': encode_geohash(*point)}
+            for i, point in enumerate(point for case in cases for point in case[3])]
+    db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+    located = db.session.query(User.id, User.latitude, User.longitude).all()
+
+    for lat, lng, radius, _ in cases:
+        candidates = db.session.query(User.id, User.latitude, User.longitude).filter(
+            nearby_clause(User.latitude, User.longitude, User.geohash, lat, lng, radius)).all()
+        expected = {row.id for row in located if haversine_km(lat, lng, row.latitude, row.longitude) <= radius}
+        found = {row.id for row in candidates if haversine_km(lat, lng, row.latitude, row.longitude) <= radius}
+        assert found == expected, (lat, lng, radius)
+        # The prefilter actually prunes
+        assert len(candidates) < len(located)
+
+
+def test_available_requests_page_by_distance(app, client, make_user):
+    farmer_id, _ = make_user('farmer')
+    _, headers = make_user('operator', latitude=17.0, longitude=78.0, service_radius=50.0,
+                           geohash=encode_geohash(17.0, 78.0))
+    fields = [Field(name=f'Plot {i}', coordinates=f'{17.0 + i * 0.05},78.0', user_id=farmer_id) for i in range(4)]
+    # Out of range
+    fields.append(Field(name='Far', coordinates='18.0,78.0', user_id=farmer_id))
+    db.session.add_all(fields)
+    db.session.flush()
+    # Several requests per field, so equal distances fall on page boundaries
+    for offset in (2, 0, 1):
+        for field in fields:
+            db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                                          scheduled_date=date(2030, 1, 1) + timedelta(days=offset)))
+    db.session.commit()
+
+    def page(**params):
+        response = client.get('/api/operators/service-requests/available', headers=headers, query_string=params)
+        assert response.status_code == 200
+        return response.get_json()
+
+    everything = page()
+    assert everything['next_cursor'] is None
+    ranked = [(item['distance'], item['scheduled_date'], item['id']) for item in everything['service_requests']]
+    assert len(ranked) == 12
+    assert ranked == sorted(ranked)
+
+    paged = []
+    cursor = None
+    while True:
+        body = page(limit=5, **({'cursor': cursor} if cursor else {}))
+        paged.extend(item['id'] for item in body['service_requests'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert paged == [request_id for _, _, request_id in ranked]
+
+    response = client.get('/api/operators/service-requests/available?cursor=bm9wZQ', headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,100 @@
+import json
+import math
+import random
+import pytest
+from backend.app import db
+from backend.models.field import Field
+from backend.utils.geometry import (
+    analyze, parse_coordinates, geodesic_area_m2, encode_vertices, decode_vertices, VERTEX_SCALE, WGS84_RADIUS_M
+)
+
+SQUARE = [[17.0, 78.0], [17.0, 78.01], [17.01, 78.01], [17.01, 78.0]]
+
+
+@pytest.mark.parametrize('text', [
+    None, '', '17.0', '17.0,78.0,1', 'abc,78.0', '91.0,78.0', '17.0,181.0', '[', '[[17.0]]', '[]',
+    '{"type": "Point", "coordinates": [78.0, 17.0]}', '[[17.0, 78.0], [17.0, 78.0], [17.0, 78.0]]',
+    '[[17.0, 78.0], [17.0, 78.01], [17.0, 78.02]]', '[[17.0, 78.0], [17.01, 78.01], [17.02, 78.02]]',
+])
+def test_invalid_outlines_are_rejected(text):
+    with pytest.raises(ValueError):
+        analyze(text)
+
+
+def test_formats_agree():
+    ring = [[lng, lat] for lat, lng in SQUARE + SQUARE[:1]]
+    polygon = {'type': 'Polygon', 'coordinates': [ring]}
+    texts = [json.dumps(SQUARE), json.dumps(polygon), json.dumps({'type': 'Feature', 'geometry': polygon})]
+    assert len({tuple(parse_coordinates(text)[:4]) for text in texts}) == 1
+
+
+def test_geodesic_area_of_a_degree_cell():
+    # A 1 x 1 degree cell on the sphere is R^2 * dlng * (sin(lat2) - sin(lat1))
+    exact = WGS84_RADIUS_M ** 2 * math.radians(1) * math.sin(math.radians(1))
+    points = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+    assert geodesic_area_m2(points) == pytest.approx(exact, rel=1e-3)
+    # Orientation and a repeated closing vertex don't matter
+    assert geodesic_area_m2(points[::-1] + points[-1:]) == pytest.approx(geodesic_area_m2(points))
+
+
+def test_centroid_and_bbox():
+    geometry = analyze(json.dumps(SQUARE))
+    assert geometry.centroid == pytest.approx((17.005, 78.005), abs=1e-6)
+    assert geometry.bbox == (17.0, 17.01, 78.0, 78.01)
+    assert geometry.area_acres == pytest.approx(geodesic_area_m2(geometry.points) / 4046.8564224)
+
+    # The area-weighted centroid of an L shape lies away from its vertex average
+    ell = [[0, 0], [0, 0.02], [0.01, 0.02], [0.01, 0.01], [0.02, 0.01], [0.02, 0]]
+    lat, lng = analyze(json.dumps(ell)).centroid
+    assert lat == pytest.approx(lng, abs=1e-6)
+    assert lat == pytest.approx(0.05 / 6, abs=1e-5)
+
+
+def test_vertex_blob_round_trip():
+    rng = random.Random(7)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(200)]
+    points += [(90.0, 180.0), (-90.0, -180.0), (0.0, 0.0)]
+    blob = encode_vertices(points)
+    assert len(blob) == 8 * len(points)
+    for (lat, lng), (decoded_lat, decoded_lng) in zip(points, decode_vertices(blob)):
+        assert abs(lat - decoded_lat) <= 0.5 / VERTEX_SCALE
+        assert abs(lng - decoded_lng) <= 0.5 / VERTEX_SCALE
+
+
+def test_field_updates_keep_derived_columns_in_step(app, client, make_user):
+    _, headers = make_user('farmer')
+    response = client.post('/api/farmers/fields', headers=headers, json={
+        'name': 'Plot', 'coordinates': json.dumps(SQUARE), 'area': 999})
+    field_id = response.get_json()['field']['id']
+    measured = response.get_json()['field']['area']
+    assert measured != 999
+
+    def update(**data):
+        return client.put(f'/api/farmers/fields/{field_id}', headers=headers, json=data)
+
+    response = update(coordinates='[[17.0, 78.0], [17.0, 78.0]]')
+    assert response.status_code == 400
+    field = db.session.get(Field, field_id)
+    db.session.refresh(field)
+    assert (field.area, field.min_lat) == (measured, 17.0)
+
+    # Polygon to point: the measured area goes, unless the client sends one
+    field = update(coordinates='18.0,79.0').get_json()['field']
+    assert field['area'] is None
+    assert field['bbox'] == [18.0, 79.0, 18.0, 79.0]
+    assert (field['centroid_lat'], field['centroid_lng']) == (18.0, 79.0)
+    assert db.session.get(Field, field_id).vertices is None
+    assert update(coordinates='18.5,79.5', area=3.5).get_json()['field']['area'] == 3.5
+
+    # Point to polygon: measured again, and the client's area is ignored
+    field = update(coordinates=json.dumps(SQUARE), area=1).get_json()['field']
+    assert field['area'] == measured
+    assert field['bbox'] == [17.0, 78.0, 17.01, 78.01]
+
+
+def test_update_geometry_raises_for_invalid_rows(app, make_user):
+    farmer_id, _ = make_user('farmer')
+    db.session.execute(Field.__table__.insert().values(name='Broken', coordinates='nowhere', user_id=farmer_id))
+    field = Field.query.filter_by(name='Broken').one()
+    with pytest.raises(ValueError):
+        field.update_geometry()
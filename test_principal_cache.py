@@ -0,0 +1,54 @@
+import pytest
+from backend.app import db
+from backend.models.user import User
+from backend.utils import auth
+from backend.utils.auth import load_principal
+
+
+@pytest.fixture
+def cached(app, monkeypatch):
+    """Turn the principal cache on, starting empty"""
+    monkeypatch.setitem(app.config, 'PRINCIPAL_CACHE_TTL', 300)
+    monkeypatch.setattr(auth, '_principals', auth.TTLCache())
+
+
+def test_cache_serves_principals_until_invalidated(cached, make_user):
+    user_id, _ = make_user('farmer')
+    assert load_principal(user_id).role == 'farmer'
+    # A write that bypasses the routes is not seen until the entry is dropped
+    db.session.execute(User.__table__.update().where(User.id == user_id).values(role='operator'))
+    db.session.commit()
+    assert load_principal(user_id).role == 'farmer'
+    auth.invalidate_principal(user_id)
+    assert load_principal(user_id).role == 'operator'
+
+
+def test_role_change_applies_to_the_next_request(cached, client, make_user):
+    _, admin_headers = make_user('admin')
+    user_id, headers = make_user('farmer')
+    assert client.get('/api/farmers/fields', headers=headers).status_code == 200
+    assert client.get('/api/operators/service-requests', headers=headers).status_code == 403
+
+    response = client.put(f'/api/admin/users/{user_id}', headers=admin_headers, json={'role': 'operator'})
+    assert response.status_code == 200
+    assert client.get('/api/farmers/fields', headers=headers).status_code == 403
+    assert client.get('/api/operators/service-requests', headers=headers).status_code == 200
+
+
+def test_deleted_user_is_rejected_on_the_next_request(cached, client, make_user):
+    _, admin_headers = make_user('admin')
+    user_id, headers = make_user('farmer')
+    assert client.get('/api/farmers/fields', headers=headers).status_code == 200
+
+    assert client.delete(f'/api/admin/users/{user_id}', headers=admin_headers).status_code == 200
+    assert client.get('/api/farmers/fields', headers=headers).status_code == 403
+
+
+def test_availability_change_applies_to_the_next_request(cached, client, make_user):
+    user_id, headers = make_user('operator')
+    assert load_principal(user_id).is_available is True
+
+    response = client.post('/api/operators/update-location', headers=headers, json={'is_available': False})
+    assert response.status_code == 200
+    assert load_principal(user_id).is_available is False
+    assert client.get('/api/operators/service-requests', headers=headers).status_code == 200
@@ -0,0 +1,97 @@
+import re
+from datetime import date, timedelta
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import event, text
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.geo import encode_geohash
+
+DAY = (date.today() + timedelta(days=3)).isoformat()
+
+# (role, method, url): the read queries behind each route must not scan a
+# whole table. Paged list routes must also be ordered by an index.
+ROUTES = [
+    ('farmer', 'get', '/api/farmers/fields', False),
+    ('farmer', 'get', '/api/farmers/service-requests', True),
+    ('farmer', 'get', '/api/farmers/service-requests?status=pending', False),
+    ('farmer', 'get', f'/api/farmers/nearby-operators?latitude=17&longitude=78&date={DAY}', False),
+    ('operator', 'get', '/api/operators/service-requests/available', False),
+    ('operator', 'get', '/api/operators/service-requests', True),
+    ('operator', 'get', f'/api/operators/route-plan?date={DAY}', False),
+    ('operator', 'get', '/api/operators/availability', False),
+    ('admin', 'get', '/api/admin/users', True),
+    ('admin', 'get', '/api/admin/users?role=farmer', True),
+    ('admin', 'get', '/api/admin/operators', True),
+    ('admin', 'get', '/api/admin/service-requests', True),
+    ('admin', 'get', '/api/admin/service-requests?status=pending', True),
+    ('admin', 'post', '/api/admin/dispatch?dry_run=1', False),
+    ('admin', 'get', '/api/admin/reports/timeseries', False),
+    ('operator', 'post', '/api/operators/service-requests/{request_id}/accept', False),
+]
+
+_TABLES = {table.name for table in db.metadata.sorted_tables}
+
+
+@pytest.fixture
+def seeded(app, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    _, operator_headers = make_user('operator', latitude=17.0, longitude=78.0, geohash=encode_geohash(17.0, 78.0))
+    _, admin_headers = make_user('admin')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+    service_request = ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                                     scheduled_date=date.fromisoformat(DAY))
+    db.session.add(service_request)
+    db.session.commit()
+    headers = {'farmer': farmer_headers, 'operator': operator_headers, 'admin': admin_headers}
+    return headers, service_request.id
+
+
+def query_plans(client, method, url, headers):
+    """Run a request and EXPLAIN every SELECT it issued"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = getattr(client, method)(url, headers=headers)
+        response.get_data()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, (url, response.get_json())
+
+    connection = db.engine.raw_connection()
+    try:
+        return [(statement, [row[-1] for row in connection.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters)])
+                for statement, parameters in statements]
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize('role,method,url,paged', ROUTES)
+def test_route_queries_use_indexes(client, seeded, role, method, url, paged):
+    headers, request_id = seeded
+    for statement, plan in query_plans(client, method, url.format(request_id=request_id), headers[role]):
+        for detail in plan:
+            match = re.match(r'SCAN (\w+)$', detail)
+            assert not (match and match.group(1) in _TABLES), f'{detail} in {statement}'
+        if paged and 'LIMIT' in statement:
+            assert not any('TEMP B-TREE FOR ORDER BY' in detail for detail in plan), f'{plan} in {statement}'
+
+
+def test_migrations_build_the_model_schema(app):
+    db.drop_all()
+    upgrade()
+    with db.engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+    downgrade(revision='base')
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE alembic_version'))
@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import create_engine
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils import replica
+
+DAY = (date.today() + timedelta(days=5)).isoformat()
+
+
+@pytest.fixture
+def replica_engine(app, tmp_path):
+    """Attach a file-copy "replica"; snapshot() copies the primary into it"""
+    path = tmp_path / 'replica.db'
+
+    def snapshot():
+        source = sqlite3.connect(db.engine.url.database)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        target.close()
+        engine.dispose()
+
+    engine = create_engine(f'sqlite:///{path}')
+    db.engines[replica.REPLICA_BIND] = engine
+    replica._recent_writers.clear()
+    yield snapshot
+    del db.engines[replica.REPLICA_BIND]
+    engine.dispose()
+
+
+def test_reads_go_to_the_replica_except_after_a_write(app, client, make_user, replica_engine):
+    farmer_id, farmer_headers = make_user('farmer')
+    _, admin_headers = make_user('admin')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+    replica_engine()
+
+    def listed(headers, url):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        return len(response.get_json()['service_requests'])
+
+    response = client.post('/api/farmers/service-requests', headers=farmer_headers, json={
+        'field_id': field.id, 'service_type': 'spraying', 'scheduled_date': DAY})
+    assert response.status_code == 201
+
+    # The farmer reads their own write from the primary; others see the lagging replica
+    assert listed(farmer_headers, '/api/farmers/service-requests') == 1
+    assert listed(admin_headers, '/api/admin/service-requests') == 0
+
+    # Once the window has passed the farmer reads from the replica again
+    replica._recent_writers.clear()
+    assert listed(farmer_headers, '/api/farmers/service-requests') == 0
+    replica_engine()
+    assert listed(farmer_headers, '/api/farmers/service-requests') == 1
+
+
+def test_writes_never_go_to_the_replica(app, client, make_user, replica_engine, monkeypatch):
+    farmer_id, farmer_headers = make_user('farmer')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+    replica_engine()
+    monkeypatch.setitem(app.config, 'REPLICA_STICKY_SECONDS', 0)
+
+    response = client.post('/api/farmers/service-requests/batch', headers=farmer_headers, json={'requests': [
+        {'field_id': field.id, 'service_type': 'spraying', 'scheduled_date': DAY}]})
+    assert response.status_code == 201
+    assert ServiceRequest.query.filter_by(farmer_id=farmer_id).count() == 1
+
+    # Without stickiness the next read sees the replica, which has not caught up
+    response = client.get('/api/farmers/service-requests', headers=farmer_headers)
+    assert response.get_json()['service_requests'] == []
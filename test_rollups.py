@@ -0,0 +1,142 @@
+from datetime import date, datetime, timedelta
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.models.rollup import RequestDailyRollup, OperatorDailyRollup
+from backend.utils.geo import encode_geohash
+from backend.utils.rollups import backfill
+
+DAY = (date.today() + timedelta(days=3)).isoformat()
+
+
+def rollup_state():
+    requests = {(r.day, r.status, r.service_type): (r.requests, round(r.lead_time_seconds, 3), r.lead_time_requests)
+                for r in RequestDailyRollup.query if r.requests or r.lead_time_seconds or r.lead_time_requests}
+    operators = {(r.operator_id, r.day): (r.jobs, r.completed)
+                 for r in OperatorDailyRollup.query if r.jobs or r.completed}
+    return requests, operators
+
+
+def test_incremental_rollups_match_a_backfill(app, client, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    operator_id, operator_headers = make_user('operator', latitude=17.0, longitude=78.0,
+                                              geohash=encode_geohash(17.0, 78.0))
+    _, admin_headers = make_user('admin')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    def create(service_type='spraying'):
+        response = client.post('/api/farmers/service-requests', headers=farmer_headers, json={
+            'field_id': field.id, 'service_type': service_type, 'scheduled_date': DAY})
+        return response.get_json()['service_request']['id']
+
+    single = [create() for _ in range(4)]
+    batch = client.post('/api/farmers/service-requests/batch', headers=farmer_headers, json={'requests': [
+        {'field_id': field.id, 'service_type': 'fertilizing', 'scheduled_date': DAY} for _ in range(4)
+    ]}).get_json()
+    batch = [result['id'] for result in batch['results']]
+
+    client.post(f'/api/operators/service-requests/{single[0]}/accept', headers=operator_headers)
+    client.post('/api/operators/service-requests/batch-accept', headers=operator_headers,
+                json={'ids': [single[1], batch[0], batch[1]]})
+    client.post(f'/api/operators/service-requests/{single[0]}/complete', headers=operator_headers)
+    client.post('/api/operators/service-requests/batch-complete', headers=operator_headers, json={'ids': [batch[0]]})
+    client.delete(f'/api/farmers/service-requests/{single[2]}', headers=farmer_headers)
+    client.post('/api/farmers/service-requests/batch-cancel', headers=farmer_headers, json={'ids': [batch[2]]})
+    client.put(f'/api/farmers/service-requests/{single[3]}', headers=farmer_headers, json={'service_type': 'seeding'})
+    client.put(f'/api/admin/service-requests/{batch[1]}', headers=admin_headers, json={'status': 'pending'})
+    client.post('/api/admin/dispatch', headers=admin_headers, json={})
+
+    incremental = rollup_state()
+    requests, operators = incremental
+    today = date.today()
+    assert requests[(today, 'completed', 'spraying')][0] == 1
+    moved = db.session.get(ServiceRequest, single[3])
+    assert requests[(today, moved.status, 'seeding')] == (1, 0, 0)
+    assert sum(jobs for jobs, _ in operators.values()) == ServiceRequest.query.filter(
+        ServiceRequest.status.in_(['accepted', 'completed'])).count()
+
+    report = backfill()
+    assert report['requests'] == 8
+    assert rollup_state() == incremental
+
+
+def test_timeseries_report(app, client, make_user):
+    _, admin_headers = make_user('admin')
+    farmer_id, _ = make_user('farmer')
+    operator_id, _ = make_user('operator')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    monday = datetime(2030, 1, 7)
+    for offset, status in [(0, 'pending'), (0, 'completed'), (1, 'accepted'), (8, 'completed')]:
+        created = monday + timedelta(days=offset)
+        db.session.add(ServiceRequest(
+            field_id=field.id, farmer_id=farmer_id, service_type='spraying', status=status,
+            operator_id=operator_id if status != 'pending' else None, scheduled_date=created.date(),
+            created_at=created, completed_at=created + timedelta(hours=6) if status == 'completed' else None))
+    db.session.commit()
+
+    def report(**params):
+        response = client.get('/api/admin/reports/timeseries', headers=admin_headers,
+                              query_string=dict({'from': '2030-01-07', 'to': '2030-01-20'}, **params))
+        return response.status_code, response.get_json()
+
+    status, body = report(interval='week', group_by='status')
+    assert status == 200
+    series = {s['key']: [p['requests'] for p in s['points']] for s in body['series']}
+    assert series == {'accepted': [1, 0], 'completed': [1, 1], 'pending': [1, 0]}
+
+    _, body = report(metric='lead_time', interval='week')
+    assert [p['average_hours'] for p in body['series'][0]['points']] == [6.0, 6.0]
+
+    _, body = report(metric='utilization', interval='week', operator_id=operator_id)
+    points = body['series'][0]['points']
+    assert [p['jobs'] for p in points] == [2, 1]
+    assert points[0]['capacity'] == 7 * app.config['OPERATOR_DAILY_CAPACITY']
+
+    assert report(metric='lead_time', group_by='status')[0] == 400
+    assert report(interval='year')[0] == 400
+
+
+def test_admin_completion_counts_towards_lead_time(app, client, make_user):
+    _, admin_headers = make_user('admin')
+    farmer_id, _ = make_user('farmer')
+    operator_id, _ = make_user('operator')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.commit()
+
+    created = datetime.utcnow() - timedelta(hours=3)
+    accepted, untimed = [ServiceRequest(
+        field_id=field.id, farmer_id=farmer_id, operator_id=operator_id, service_type='spraying',
+        status=status, scheduled_date=created.date(), created_at=created
+    ) for status in ('accepted', 'completed')]
+    db.session.add_all([accepted, untimed])
+    db.session.commit()
+
+    response = client.put(f'/api/admin/service-requests/{accepted.id}', headers=admin_headers,
+                          json={'status': 'completed'})
+    assert response.status_code == 200
+    assert response.get_json()['service_request']['completed_at'] is not None
+
+    day = created.date().isoformat()
+    points = client.get('/api/admin/reports/timeseries', headers=admin_headers, query_string={
+        'metric': 'lead_time', 'from': day, 'to': day}).get_json()['series'][0]['points']
+    # The completion without a completed_at is counted but has no lead time
+    assert points[0]['completed'] == 2
+    assert points[0]['average_hours'] == 3.0
+
+    incremental = rollup_state()
+    backfill()
+    assert rollup_state() == incremental
+
+    response = client.put(f'/api/admin/service-requests/{accepted.id}', headers=admin_headers,
+                          json={'status': 'accepted'})
+    assert response.get_json()['service_request']['completed_at'] is None
+    points = client.get('/api/admin/reports/timeseries', headers=admin_headers, query_string={
+        'metric': 'lead_time', 'from': day, 'to': day}).get_json()['series'][0]['points']
+    assert points[0]['completed'] == 1
+    assert points[0]['average_hours'] is None
@@ -0,0 +1,67 @@
+import random
+import time
+from datetime import date, datetime
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils.routing import distance_matrix, nearest_neighbour, route_length, solve_route, plan_day
+
+
+def test_solver_visits_every_stop_and_improves_on_greedy():
+    rng = random.Random(7)
+    points = [(rng.uniform(17, 18), rng.uniform(78, 79)) for _ in range(121)]
+    matrix = distance_matrix(points)
+
+    tour, _ = solve_route(matrix)
+
+    assert tour[0] == 0
+    assert sorted(tour) == list(range(len(points)))
+    assert route_length(tour, matrix) <= route_length(nearest_neighbour(matrix), matrix)
+
+
+def test_two_hundred_stops_plan_within_budget():
+    rng = random.Random(11)
+    stops = [(i, rng.uniform(17, 18), rng.uniform(78, 79)) for i in range(200)]
+
+    start = time.perf_counter()
+    plan = plan_day((17.5, 78.5), stops, datetime(2026, 1, 1, 8))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    assert len(plan['stops']) == 200
+    assert elapsed < 100
+
+
+def test_route_plan_orders_the_days_accepted_jobs(app, client, make_user):
+    farmer_id, _ = make_user('farmer')
+    operator_id, headers = make_user('operator', latitude=17.0, longitude=78.0)
+
+    # Fields due east of the operator, created out of order
+    requests = {}
+    for offset in (0.3, 0.1, 0.2):
+        field = Field(name=f'East {offset}', coordinates=f'17.0,{78.0 + offset}', user_id=farmer_id)
+        db.session.add(field)
+        db.session.flush()
+        service_request = ServiceRequest(field_id=field.id, farmer_id=farmer_id, operator_id=operator_id,
+                                         service_type='spraying', status='accepted',
+                                         scheduled_date=date(2026, 3, 2))
+        db.session.add(service_request)
+        db.session.flush()
+        requests[offset] = service_request.id
+    # Other days and other statuses are left out
+    db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, operator_id=operator_id,
+                                  service_type='spraying', status='accepted', scheduled_date=date(2026, 3, 3)))
+    db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, operator_id=operator_id,
+                                  service_type='spraying', status='completed', scheduled_date=date(2026, 3, 2)))
+    db.session.commit()
+
+    response = client.get('/api/operators/route-plan?date=2026-03-02&start=07:30&speed=60&service_minutes=20',
+                          headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert [stop['service_request_id'] for stop in data['stops']] == [requests[0.1], requests[0.2], requests[0.3]]
+    assert abs(data['total_distance_km'] - sum(stop['leg_distance_km'] for stop in data['stops'])) < 0.05
+    first = data['stops'][0]
+    assert first['eta'] > '2026-03-02T07:30' and first['departure'] > first['eta']
+
+    assert client.get('/api/operators/route-plan', headers=headers).status_code == 400
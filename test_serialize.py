@@ -0,0 +1,95 @@
+import json
+from datetime import date, datetime
+from sqlalchemy import event
+from backend.app import db
+from backend.models.user import User
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.utils import serialize as fast
+
+
+def roundtrip(rows, model):
+    return json.loads(fast.json_response(fast.serialize(rows, model)).get_data())
+
+
+def test_projection_matches_to_dict(app, make_user, monkeypatch):
+    farmer_id, _ = make_user('farmer', hourly_rate=10.0, created_at=datetime(2030, 1, 2, 3, 4, 5, 678901))
+    make_user('operator', hourly_rate=25.5, service_details='DJI Agras T40', created_at=datetime(2030, 1, 2))
+    outline = Field(name='Outline', coordinates='[[17.0, 78.0], [17.0, 78.01], [17.01, 78.01]]', user_id=farmer_id)
+    outline.update_geometry()
+    db.session.add_all([Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id), outline])
+    db.session.commit()
+    db.session.add_all([
+        ServiceRequest(field_id=1, farmer_id=farmer_id, service_type='spraying', scheduled_date=date(2030, 1, 5)),
+        ServiceRequest(field_id=2, farmer_id=farmer_id, service_type='seeding', status='completed',
+                       scheduled_date=date(2030, 1, 6), notes='North block', completed_at=datetime(2030, 1, 6, 12)),
+    ])
+    db.session.commit()
+
+    for model in (User, Field, ServiceRequest):
+        expected = [json.loads(json.dumps(row.to_dict())) for row in model.query.order_by(model.id)]
+        rows = fast.project(model.query.order_by(model.id), model).all()
+        assert roundtrip(rows, model) == expected
+        # The stdlib fallback produces the same documents
+        monkeypatch.setattr(fast, 'orjson', None)
+        assert roundtrip(rows, model) == expected
+        monkeypatch.undo()
+
+
+def test_list_endpoints_use_the_fast_path(client, make_user):
+    _, headers = make_user('admin')
+    make_user('operator', hourly_rate=25.5)
+    response = client.get('/api/admin/users', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['users'] == [user.to_dict() for user in
+                                            User.query.order_by(User.created_at.desc(), User.id.desc())]
+
+
+def count_selects(client, url, headers):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json(), sum(1 for sql in statements if sql.lstrip().startswith('SELECT'))
+
+
+def test_includes_take_a_constant_number_of_queries(client, make_user):
+    _, admin_headers = make_user('admin')
+    farmer_ids = [make_user('farmer')[0] for _ in range(3)]
+    operator_id, _ = make_user('operator')
+    fields = [Field(name=f'Plot {i}', coordinates='17.0,78.0', user_id=farmer_ids[i % 3]) for i in range(6)]
+    db.session.add_all(fields)
+    db.session.commit()
+    db.session.add_all([ServiceRequest(
+        field_id=fields[i % 6].id, farmer_id=fields[i % 6].user_id, service_type='spraying',
+        operator_id=operator_id if i % 2 else None, scheduled_date=date(2030, 1, 5)
+    ) for i in range(30)])
+    db.session.commit()
+
+    url = '/api/admin/service-requests?include=field,farmer,operator&fields=id,status'
+    small, small_count = count_selects(client, url + '&limit=2', admin_headers)
+    large, large_count = count_selects(client, url + '&limit=30', admin_headers)
+    assert len(large['service_requests']) == 30
+    assert small_count == large_count
+
+    item = large['service_requests'][-1]
+    assert set(item) == {'id', 'status', 'field', 'farmer', 'operator'}
+    service_request = db.session.get(ServiceRequest, item['id'])
+    assert item['field']['name'] == service_request.field.name
+    assert item['farmer']['email'] == service_request.farmer.email
+    assert item['operator'] == (service_request.operator.to_dict() if service_request.operator else None)
+
+    # The detail endpoint joins the relations into its one query
+    detail, detail_count = count_selects(
+        client, f"/api/admin/service-requests/{item['id']}?include=field,farmer,operator", admin_headers)
+    _, plain_count = count_selects(client, f"/api/admin/service-requests/{item['id']}", admin_headers)
+    assert detail_count == plain_count
+    assert detail['service_request']['field']['id'] == service_request.field_id
+
+    assert client.get('/api/admin/service-requests?fields=password_hash', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/service-requests?include=owner', headers=admin_headers).status_code == 400
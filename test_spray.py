@@ -0,0 +1,106 @@
+from datetime import date
+import pytest
+from backend.app import db
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.routes import weather
+from backend.utils import spray
+from backend.utils.spray import SLOT_SECONDS, forecast_columns, score_slots
+from backend.utils.weather import WeatherCache
+
+NOW = 1_900_000_000
+
+
+def slot(offset, temp=18.0, wind=2.0, gust=3.0, pop=0.0):
+    return {'dt': NOW + offset * SLOT_SECONDS, 'main': {'temp': temp}, 'wind': {'speed': wind, 'gust': gust}, 'pop': pop}
+
+
+FORECAST = {'list': [
+    slot(-1),                    # Already over
+    slot(0),                     # Calm
+    slot(1, wind=4.0),           # Breezy but under the spraying limit
+    slot(2, gust=8.0),           # Gusts too strong to spray
+    slot(3, pop=0.5),            # Likely rain
+    slot(4, temp=35.0),          # Too hot to spray
+    {'dt': NOW + 5 * SLOT_SECONDS, 'main': {}, 'wind': {'speed': 1.0}},  # No temperature
+]}
+
+
+def test_windows_are_scored_against_the_service_thresholds():
+    columns = forecast_columns(FORECAST)
+    windows = score_slots(columns, 'spraying', now=NOW)
+    assert [w['start'] for w in windows] == columns['start'][1:3]
+    assert windows[0]['end'] == windows[1]['start']
+    # Margin to the tightest limit, here the wind (2 and 4 of 4.5 m/s) rather than gusts (3 of 7)
+    assert [w['score'] for w in windows] == [round(1 - 2 / 4.5, 3), round(1 - 4 / 4.5, 3)]
+
+    # Imaging only cares about flyability, and old names map to the new ones
+    assert len(score_slots(columns, 'imaging', now=NOW)) == 4
+    assert score_slots(columns, 'pesticide', now=NOW) == windows
+    assert score_slots(columns, 'unknown', now=NOW) == score_slots(columns, 'other', now=NOW)
+
+
+@pytest.fixture
+def forecasts(monkeypatch):
+    """Serve FORECAST for every location and record the upstream calls"""
+    calls = []
+
+    def fetch(endpoint, lat, lng, units):
+        calls.append((lat, lng))
+        return FORECAST
+
+    monkeypatch.setattr(weather, 'API_KEY', 'test-key')
+    monkeypatch.setattr(weather, 'weather_cache', WeatherCache())
+    monkeypatch.setattr(weather, '_fetch_json', fetch)
+    return calls
+
+
+def test_spray_windows_share_forecasts_and_scores(app, client, make_user, forecasts, monkeypatch):
+    farmer_id, headers = make_user('farmer')
+    _, other_headers = make_user('farmer')
+    fields = [
+        Field(name='North', coordinates='17.00001,78.00001', user_id=farmer_id),
+        Field(name='South', coordinates='17.00002,78.00002', user_id=farmer_id),  # Same bucket as North
+        Field(name='Far', coordinates='18.5,79.5', user_id=farmer_id),
+    ]
+    db.session.add_all(fields)
+    db.session.flush()
+    service_request = ServiceRequest(field_id=fields[0].id, farmer_id=farmer_id, service_type='imaging',
+                                     scheduled_date=date(2030, 1, 1))
+    db.session.add(service_request)
+    db.session.commit()
+
+    scored = []
+    original = spray.score_slots
+    monkeypatch.setattr(weather, 'score_slots', lambda columns, service_type: (
+        scored.append(service_type) or original(columns, service_type, now=NOW)))
+
+    response = client.post('/api/weather/spray-windows', headers=headers, json={
+        'field_ids': [field.id for field in fields] + [9999],
+        'service_request_ids': [service_request.id],
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(forecasts) == 2
+    assert sorted(scored) == ['imaging', 'spraying', 'spraying']
+    results = {(r.get('service_request_id'), r['field_id']): r for r in body['results']}
+    assert len(results[(None, fields[0].id)]['windows']) == 2
+    assert len(results[(service_request.id, fields[0].id)]['windows']) == 4
+    assert body['errors'] == [{'field_id': 9999, 'error': 'Field not found'}]
+
+    # Another farmer's fields are reported as missing
+    body = client.post('/api/weather/spray-windows', headers=other_headers,
+                       json={'field_ids': [fields[0].id]}).get_json()
+    assert body['results'] == [] and body['errors'][0]['field_id'] == fields[0].id
+
+
+def test_spray_windows_validate_the_request(app, client, make_user, forecasts):
+    _, farmer_headers = make_user('farmer')
+    _, operator_headers = make_user('operator')
+    assert client.post('/api/weather/spray-windows', headers=operator_headers,
+                       json={'field_ids': [1]}).status_code == 400
+    assert client.post('/api/weather/spray-windows', headers=farmer_headers,
+                       json={'field_ids': ['x']}).status_code == 400
+    assert client.post('/api/weather/spray-windows', headers=farmer_headers,
+                       json={'field_ids': list(range(weather.MAX_SPRAY_WINDOW_ITEMS + 1))}).status_code == 400
+    assert forecasts == []
@@ -0,0 +1,78 @@
+from datetime import date
+from backend.app import db
+from backend.models.user import User
+from backend.models.field import Field
+from backend.models.service_request import ServiceRequest
+from backend.routes import admin
+from backend.utils.cache import TTLCache
+
+
+def seed(make_user):
+    farmer_id, _ = make_user('farmer')
+    make_user('farmer')
+    operator_id, _ = make_user('operator')
+    fields = [Field(name=f'Plot {i}', coordinates='17.0,78.0', user_id=farmer_id) for i in range(3)]
+    db.session.add_all(fields)
+    db.session.flush()
+    for status in ('pending', 'pending', 'accepted', 'completed', 'completed', 'completed', 'cancelled'):
+        db.session.add(ServiceRequest(field_id=fields[0].id, farmer_id=farmer_id, service_type='spraying',
+                                      status=status, operator_id=operator_id if status != 'pending' else None,
+                                      scheduled_date=date(2030, 1, 1)))
+    db.session.commit()
+
+
+def test_union_counts_match_per_table_counts(app, client, make_user):
+    _, headers = make_user('admin')
+    seed(make_user)
+
+    stats = client.get('/api/admin/stats', headers=headers).get_json()
+    count_role = lambda role: User.query.filter_by(role=role).count()
+    count_status = lambda status: ServiceRequest.query.filter_by(status=status).count()
+    assert stats['users'] == {'farmers': count_role('farmer'), 'operators': count_role('operator'),
+                              'total': User.query.count()}
+    assert stats['service_requests'] == {
+        'pending': count_status('pending'), 'accepted': count_status('accepted'),
+        'completed': count_status('completed'), 'cancelled': count_status('cancelled'),
+        'total': ServiceRequest.query.count()
+    }
+    assert stats['fields'] == Field.query.count() == 3
+    assert (stats['service_requests']['pending'], stats['service_requests']['completed']) == (2, 3)
+
+
+def test_stats_cache(app, client, make_user, monkeypatch):
+    _, headers = make_user('admin')
+    monkeypatch.setattr(admin, '_stats_cache', TTLCache(maxsize=1))
+    fetch = lambda: client.get('/api/admin/stats', headers=headers).get_json()['users']['farmers']
+
+    # With a TTL of 0 every request counts again
+    monkeypatch.setitem(app.config, 'STATS_CACHE_TTL', 0)
+    assert fetch() == 0
+    make_user('farmer')
+    assert fetch() == 1
+    assert admin._stats_cache.get('stats') is None
+
+    monkeypatch.setitem(app.config, 'STATS_CACHE_TTL', 60)
+    assert fetch() == 1
+    make_user('farmer')
+    assert fetch() == 1
+
+
+def test_farmer_and_operator_counts_cover_every_page(app, client, make_user):
+    farmer_id, farmer_headers = make_user('farmer')
+    operator_id, operator_headers = make_user('operator')
+    field = Field(name='Plot', coordinates='17.0,78.0', user_id=farmer_id)
+    db.session.add(field)
+    db.session.flush()
+    for status in ['pending'] * 3 + ['accepted'] * 2 + ['completed']:
+        db.session.add(ServiceRequest(field_id=field.id, farmer_id=farmer_id, service_type='spraying',
+                                      scheduled_date=date(2030, 1, 7), status=status,
+                                      operator_id=None if status == 'pending' else operator_id))
+    db.session.commit()
+
+    page = client.get('/api/farmers/service-requests?limit=2', headers=farmer_headers).get_json()
+    assert len(page['service_requests']) == 2 and page['next_cursor']
+    counts = client.get('/api/farmers/stats', headers=farmer_headers).get_json()['service_requests']
+    assert counts == {'pending': 3, 'accepted': 2, 'completed': 1, 'cancelled': 0, 'total': 6}
+    counts = client.get('/api/operators/stats', headers=operator_headers).get_json()['service_requests']
+    assert counts == {'pending': 0, 'accepted': 2, 'completed': 1, 'cancelled': 0, 'total': 3}
+    assert client.get('/api/farmers/stats', headers=operator_headers).status_code == 403
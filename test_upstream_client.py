@@ -0,0 +1,123 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend.utils.upstream import UpstreamClient, CircuitBreaker, CircuitOpenError
+from backend.utils.weather import WeatherCache, UpstreamError
+
+
+@pytest.fixture
+def fake_server():
+    """Local HTTP/1.1 server whose responses are scripted per test"""
+    state = {'responses': [], 'calls': 0, 'delay': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            state['calls'] += 1
+            status = state['responses'].pop(0) if state['responses'] else 200
+            time.sleep(state['delay'])
+            body = json.dumps({'call': state['calls']}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state['url'] = f'http://127.0.0.1:{server.server_port}/data'
+    yield state
+    server.shutdown()
+
+
+def make_client(**kwargs):
+    kwargs.setdefault('backoff', 0.001)
+    return UpstreamClient('Fake API', **kwargs)
+
+
+def test_connections_are_reused(fake_server):
+    client = make_client()
+    for _ in range(5):
+        client.get_json(fake_server['url'])
+
+    stats = client.stats()
+    assert stats['requests'] == 5
+    assert stats['pools'][0]['connections_opened'] == 1
+    assert stats['pools'][0]['idle'] == 1
+    assert stats['latency_ms']['p50'] is not None
+
+
+def test_transient_errors_are_retried(fake_server):
+    fake_server['responses'] = [503, 502]
+    client = make_client(max_retries=2)
+    assert client.get_json(fake_server['url']) == {'call': 3}
+    assert client.stats()['retries'] == 2
+
+
+def test_retries_are_bounded_and_client_errors_are_not_retried(fake_server):
+    fake_server['responses'] = [500, 500, 500, 500]
+    client = make_client(max_retries=2)
+    with pytest.raises(UpstreamError) as error:
+        client.get_json(fake_server['url'])
+    assert error.value.status_code == 500
+    assert fake_server['calls'] == 3
+
+    fake_server['responses'] = [401]
+    with pytest.raises(UpstreamError) as error:
+        client.get_json(fake_server['url'])
+    assert error.value.status_code == 401
+    assert fake_server['calls'] == 4
+
+
+def test_read_timeout_bounds_slow_upstream(fake_server):
+    fake_server['delay'] = 0.5
+    client = make_client(read_timeout=0.1, max_retries=0)
+    start = time.perf_counter()
+    with pytest.raises(UpstreamError) as error:
+        client.get_json(fake_server['url'])
+    assert error.value.status_code == 504
+    assert time.perf_counter() - start < 0.45
+
+
+def test_circuit_opens_and_recovers(fake_server):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    client = make_client(max_retries=0, breaker=breaker)
+
+    fake_server['responses'] = [503, 503]
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            client.get_json(fake_server['url'])
+    assert breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        client.get_json(fake_server['url'])
+    assert fake_server['calls'] == 2
+
+    now[0] += 31  # half-open: one trial call goes through and closes the circuit
+    assert client.get_json(fake_server['url']) == {'call': 3}
+    assert breaker.state == 'closed'
+
+
+def test_cache_serves_expired_copy_while_upstream_is_down(fake_server):
+    now = [0.0]
+    cache = WeatherCache(stale_ttl=0, clock=lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, clock=lambda: now[0])
+    client = make_client(max_retries=0, breaker=breaker)
+
+    fetch = lambda: client.get_json(fake_server['url'])
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 1}
+
+    now[0] += 60
+    fake_server['responses'] = [503]
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 1}
+    # The breaker is now open: served from cache without calling upstream
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 1}
+    assert fake_server['calls'] == 2
+    assert cache.stats()['degraded'] == 2
@@ -0,0 +1,109 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend.routes import weather
+from backend.utils.weather import WeatherCache, MemoryStore, UpstreamError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def stub_upstream(monkeypatch):
+    """Local stand-in for OpenWeatherMap that records the paths it served"""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            body = json.dumps({'path': self.path.split('?')[0], 'call': len(calls)}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(weather, 'BASE_URL', f'http://127.0.0.1:{server.server_port}')
+    monkeypatch.setattr(weather, 'API_KEY', 'test-key')
+    monkeypatch.setattr(weather, 'weather_cache', WeatherCache())
+    yield calls
+    server.shutdown()
+
+
+def test_nearby_coordinates_share_one_upstream_call(client, stub_upstream):
+    first = client.get('/api/weather/current?lat=12.9716&lon=77.5946')
+    second = client.get('/api/weather/current?lat=12.9718&lon=77.5949')
+    assert first.status_code == second.status_code == 200
+    assert first.json == second.json
+    assert len(stub_upstream) == 1
+
+    # Different units and different endpoints are cached separately
+    client.get('/api/weather/current?lat=12.9716&lon=77.5946&units=imperial')
+    client.get('/api/weather/forecast?lat=12.9716&lon=77.5946')
+    assert len(stub_upstream) == 3
+    assert weather.weather_cache.stats()['hits'] == 1
+
+
+def test_stale_entries_are_served_while_refreshing(clock):
+    cache = WeatherCache(stale_ttl=60, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'call': len(calls)}
+
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 1}
+    clock.now += 30  # past the TTL, inside the stale window
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 1}
+    for _ in range(500):
+        if cache.store.get('k').value == {'call': 2}:
+            break
+        time.sleep(0.01)
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 2}
+
+    clock.now += 200  # beyond the stale window: synchronous fetch
+    assert cache.get_or_fetch('k', fetch, ttl=10) == {'call': 3}
+    assert cache.stats()['stale_hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_errors_are_not_cached(clock):
+    cache = WeatherCache(clock=clock)
+
+    def failing():
+        raise UpstreamError(502, 'Failed to fetch weather data')
+
+    with pytest.raises(UpstreamError):
+        cache.get_or_fetch('k', failing, ttl=10)
+    assert cache.get_or_fetch('k', lambda: {'ok': True}, ttl=10) == {'ok': True}
+
+
+def test_memory_cap_evicts_least_recently_used(clock):
+    cache = WeatherCache(MemoryStore(max_bytes=100), clock=clock)
+    payload = {'data': 'x' * 30}
+    for key in ('a', 'b', 'c'):
+        cache.get_or_fetch(key, lambda: payload, ttl=10)
+        cache.get_or_fetch('a', lambda: payload, ttl=10)
+
+    stats = cache.stats()
+    assert stats['bytes'] <= 100
+    assert stats['evictions'] == 1
+    assert cache.store.get('a') is not None
+    assert cache.store.get('b') is None